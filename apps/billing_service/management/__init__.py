@@ -0,0 +1,3 @@
+"""
+计费服务管理命令
+"""
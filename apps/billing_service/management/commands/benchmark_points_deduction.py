@@ -0,0 +1,164 @@
+"""
+积分扣减并发压力测试命令
+"""
+
+import time
+import uuid
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.auth_service.models import User
+from apps.billing_service.models import UserPoints, PointsTransaction
+from apps.tenant_service.models import Tenant
+
+
+class Command(BaseCommand):
+    """
+    多线程并发扣减同一积分账户，校验不会透支，并对比条件UPDATE与行锁两种扣减方式的吞吐量
+    
+    命令会创建临时租户、用户和积分账户，结束后删除
+    
+    用法:
+        python manage.py benchmark_points_deduction
+        python manage.py benchmark_points_deduction --threads 32 --deductions 100 --balance 2000
+    """
+    help = '积分扣减并发压力测试，校验不透支并对比条件UPDATE与select_for_update的吞吐量'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='并发线程数，默认16'
+        )
+        parser.add_argument(
+            '--deductions',
+            type=int,
+            default=50,
+            help='每个线程的扣减次数，默认50'
+        )
+        parser.add_argument(
+            '--balance',
+            type=int,
+            default=500,
+            help='初始余额，默认500，小于扣减总数时可验证不会透支'
+        )
+    
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:12]
+        tenant = Tenant.objects.create(
+            name=f'benchmark-{suffix}',
+            slug=f'benchmark-{suffix}',
+            subdomain=f'benchmark-{suffix}',
+            contact_email=f'benchmark-{suffix}@example.com'
+        )
+        user = User.objects.create(
+            username=f'benchmark-{suffix}',
+            email=f'benchmark-{suffix}@example.com'
+        )
+        
+        try:
+            failed = False
+            for label, deduct in (
+                ('条件UPDATE', self._deduct_conditional),
+                ('select_for_update', self._deduct_locked),
+            ):
+                failed |= not self._run(label, deduct, tenant, user, options)
+        finally:
+            user.delete()
+            tenant.delete()
+        
+        if failed:
+            raise CommandError('积分扣减结果校验失败')
+    
+    @staticmethod
+    def _deduct_conditional(account_id):
+        """使用条件UPDATE扣减"""
+        try:
+            UserPoints.objects.get(pk=account_id).deduct_points(1, source='benchmark')
+            return True
+        except ValueError:
+            return False
+    
+    @staticmethod
+    def _deduct_locked(account_id):
+        """使用行锁先读后写扣减，作为对比基准"""
+        with transaction.atomic():
+            account = UserPoints.objects.select_for_update().get(pk=account_id)
+            if account.balance < 1:
+                return False
+            account.balance -= 1
+            account.total_spent += 1
+            account.save(update_fields=['balance', 'total_spent', 'updated_at'])
+            PointsTransaction.objects.create(
+                tenant_id=account.tenant_id,
+                user_id=account.user_id,
+                user_points=account,
+                points=-1,
+                balance_after=account.balance,
+                transaction_type=PointsTransaction.TYPE_SPEND,
+                source='benchmark'
+            )
+            return True
+    
+    def _run(self, label, deduct, tenant, user, options):
+        """
+        并发执行扣减并校验结果
+        
+        Returns:
+            bool: 校验是否通过
+        """
+        UserPoints.objects.filter(tenant=tenant, user=user).delete()
+        account = UserPoints.objects.create(tenant=tenant, user=user, balance=options['balance'])
+        
+        succeeded = []
+        errors = []
+        lock = threading.Lock()
+        
+        def worker():
+            count = 0
+            try:
+                for _ in range(options['deductions']):
+                    if deduct(account.id):
+                        count += 1
+            except Exception as e:
+                errors.append(str(e))
+            finally:
+                with lock:
+                    succeeded.append(count)
+                connection.close()
+        
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        account.refresh_from_db()
+        success = sum(succeeded)
+        ledger = PointsTransaction.objects.filter(user_points=account)
+        attempts = options['threads'] * options['deductions']
+        
+        valid = (
+            not errors
+            and account.balance >= 0
+            and account.balance == options['balance'] - success
+            and ledger.count() == success
+            and success == min(attempts, options['balance'])
+        )
+        
+        self.stdout.write(
+            f"{label}: 尝试 {attempts} 次, 成功 {success} 次, 余额 {account.balance}, "
+            f"交易记录 {ledger.count()} 条, 耗时{elapsed:.2f}秒, {attempts / elapsed:.1f}次/秒"
+        )
+        for error in errors[:5]:
+            self.stdout.write(self.style.ERROR(f"  {error}"))
+        if not valid:
+            self.stdout.write(self.style.ERROR(f"  {label} 结果校验失败"))
+        
+        ledger.delete()
+        return valid
@@ -5,7 +5,8 @@
 from apps.billing_service.models.payment import Payment
 from apps.billing_service.models.order import Order
 from apps.billing_service.models.subscription import Subscription, SubscriptionPlan
-from apps.billing_service.models.points import UserPoints, PointsTransaction
+from apps.billing_service.models.points import UserPoints, PointsTransaction, PointsBalanceSnapshot, PointsLot, PointsHold
+from apps.billing_service.models.usage import UsageEvent
 from apps.billing_service.models.invoice import Invoice
 from apps.billing_service.models.payment_gateway import PaymentGatewayConfig
 
@@ -16,6 +17,10 @@ __all__ = [
     'SubscriptionPlan',
     'UserPoints',
     'PointsTransaction',
+    'PointsBalanceSnapshot',
+    'PointsLot',
+    'PointsHold',
+    'UsageEvent',
     'Invoice',
     'PaymentGatewayConfig'
 ]
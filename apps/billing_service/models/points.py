@@ -3,7 +3,10 @@
 """
 
 import uuid
-from django.db import models
+from datetime import timedelta
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Value, When
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -18,6 +21,7 @@ class UserPoints(models.Model):
     tenant = models.ForeignKey('tenant_service.Tenant', on_delete=models.CASCADE, related_name='user_points', verbose_name=_('租户'))
     user = models.ForeignKey('auth_service.User', on_delete=models.CASCADE, related_name='points_account', verbose_name=_('用户'))
     balance = models.IntegerField(default=0, verbose_name=_('积分余额'))
+    held_balance = models.IntegerField(default=0, verbose_name=_('冻结积分'), help_text=_('预留中尚未结算的积分，不计入可用余额'))
     total_earned = models.IntegerField(default=0, verbose_name=_('总获得积分'))
     total_spent = models.IntegerField(default=0, verbose_name=_('总消费积分'))
     is_active = models.BooleanField(default=True, verbose_name=_('是否激活'))
@@ -36,15 +40,18 @@ class UserPoints(models.Model):
     def __str__(self):
         return f"{self.user} - {self.balance} 积分"
     
-    def add_points(self, points, reason=None, source=None, transaction_type=None):
+    def add_points(self, points, reason=None, source=None, transaction_type=None, expires_at=None):
         """
         为用户添加积分
         
+        使用F表达式原子增加余额，避免与并发扣减互相覆盖；获得的积分记为一个积分批次
+        
         Args:
             points: 积分数量（正整数）
             reason: 添加原因
             source: 积分来源
             transaction_type: 交易类型
+            expires_at: 过期时间，为空时按POINTS_LOT_TTL_DAYS计算
             
         Returns:
             PointsTransaction: 积分交易记录
@@ -52,29 +59,48 @@ class UserPoints(models.Model):
         if points <= 0:
             raise ValueError(_('添加的积分必须为正数'))
             
-        # 更新积分余额
-        self.balance += points
-        self.total_earned += points
-        self.save()
-        
-        # 创建交易记录
-        transaction = PointsTransaction.objects.create(
-            tenant=self.tenant,
-            user=self.user,
-            user_points=self,
-            points=points,
-            balance_after=self.balance,
-            transaction_type=transaction_type or PointsTransaction.TYPE_EARN,
-            source=source,
-            description=reason
-        )
+        with transaction.atomic():
+            # 更新积分余额
+            UserPoints.objects.filter(pk=self.pk).update(
+                balance=F('balance') + points,
+                total_earned=F('total_earned') + points,
+                updated_at=timezone.now()
+            )
+            self.refresh_from_db(fields=['balance', 'total_earned', 'updated_at'])
+            
+            # 创建交易记录
+            points_transaction = PointsTransaction.objects.create(
+                tenant_id=self.tenant_id,
+                user_id=self.user_id,
+                user_points=self,
+                points=points,
+                balance_after=self.balance,
+                transaction_type=transaction_type or PointsTransaction.TYPE_EARN,
+                source=source,
+                description=reason
+            )
+            
+            # 记录积分批次
+            PointsLot.objects.create(
+                tenant_id=self.tenant_id,
+                user_id=self.user_id,
+                user_points=self,
+                transaction=points_transaction,
+                points=points,
+                remaining=points,
+                expires_at=expires_at or PointsLot.default_expires_at()
+            )
         
-        return transaction
+        return points_transaction
     
     def deduct_points(self, points, reason=None, source=None, transaction_type=None):
         """
         扣除用户积分
         
+        使用带余额条件的UPDATE原子扣减，根据影响行数判断余额是否足够，
+        并发扣减不会透支也不会丢失更新，扣减和交易记录在同一事务中写入；
+        扣减的积分按过期时间先后从积分批次中扣除
+        
         Args:
             points: 积分数量（正整数）
             reason: 扣除原因
@@ -90,27 +116,33 @@ class UserPoints(models.Model):
         if points <= 0:
             raise ValueError(_('扣除的积分必须为正数'))
             
-        if self.balance < points:
-            raise ValueError(_('积分余额不足'))
+        with transaction.atomic():
+            # 余额足够时才扣减，余额不足时影响行数为0
+            updated = UserPoints.objects.filter(pk=self.pk, balance__gte=points).update(
+                balance=F('balance') - points,
+                total_spent=F('total_spent') + points,
+                updated_at=timezone.now()
+            )
+            if not updated:
+                raise ValueError(_('积分余额不足'))
             
-        # 更新积分余额
-        self.balance -= points
-        self.total_spent += points
-        self.save()
-        
-        # 创建交易记录
-        transaction = PointsTransaction.objects.create(
-            tenant=self.tenant,
-            user=self.user,
-            user_points=self,
-            points=-points,  # 负数表示支出
-            balance_after=self.balance,
-            transaction_type=transaction_type or PointsTransaction.TYPE_SPEND,
-            source=source,
-            description=reason
-        )
+            # UPDATE持有行锁直到事务结束，读取到的即为本次扣减后的余额
+            self.refresh_from_db(fields=['balance', 'total_spent', 'updated_at'])
+            PointsLot.consume({self.pk: points})
+            
+            # 创建交易记录
+            points_transaction = PointsTransaction.objects.create(
+                tenant_id=self.tenant_id,
+                user_id=self.user_id,
+                user_points=self,
+                points=-points,  # 负数表示支出
+                balance_after=self.balance,
+                transaction_type=transaction_type or PointsTransaction.TYPE_SPEND,
+                source=source,
+                description=reason
+            )
         
-        return transaction
+        return points_transaction
 
 
 class PointsTransaction(models.Model):
@@ -165,7 +197,8 @@ class PointsTransaction(models.Model):
         verbose_name_plural = _('积分交易记录')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['tenant', 'user']),
+            # 与历史记录键集分页的排序(created_at, id)一致
+            models.Index(fields=['tenant', 'user', 'created_at', 'id']),
             models.Index(fields=['tenant', 'transaction_type']),
             models.Index(fields=['tenant', 'created_at']),
         ]
@@ -174,4 +207,183 @@ class PointsTransaction(models.Model):
         if self.points > 0:
             return f"{self.user} 获得 {self.points} 积分 ({self.get_transaction_type_display()})"
         else:
-            return f"{self.user} 消费 {abs(self.points)} 积分 ({self.get_transaction_type_display()})" 
\ No newline at end of file
+            return f"{self.user} 消费 {abs(self.points)} 积分 ({self.get_transaction_type_display()})"
+
+
+class PointsBalanceSnapshot(models.Model):
+    """
+    积分余额快照模型
+    
+    定期为有交易的账户记录截至某一时间点的余额和累计收支，
+    历史余额和区间汇总从最近的快照加上其后少量交易计算，无需扫描全部交易记录
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name=_('ID'))
+    tenant = models.ForeignKey('tenant_service.Tenant', on_delete=models.CASCADE, related_name='points_snapshots', verbose_name=_('租户'))
+    user = models.ForeignKey('auth_service.User', on_delete=models.CASCADE, related_name='points_snapshots', verbose_name=_('用户'))
+    user_points = models.ForeignKey('billing_service.UserPoints', on_delete=models.CASCADE, related_name='snapshots', verbose_name=_('积分账户'))
+    as_of = models.DateTimeField(verbose_name=_('快照时间'), help_text=_('包含创建时间不晚于该时间的全部交易'))
+    balance = models.IntegerField(verbose_name=_('余额'))
+    total_credits = models.BigIntegerField(default=0, verbose_name=_('累计收入'))
+    total_debits = models.BigIntegerField(default=0, verbose_name=_('累计支出'))
+    transaction_count = models.BigIntegerField(default=0, verbose_name=_('累计交易笔数'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    
+    class Meta:
+        verbose_name = _('积分余额快照')
+        verbose_name_plural = _('积分余额快照')
+        ordering = ['-as_of']
+        indexes = [
+            models.Index(fields=['tenant', 'user', 'as_of']),
+        ]
+        unique_together = [('user_points', 'as_of')]
+    
+    def __str__(self):
+        return f"{self.user} {self.as_of} 余额 {self.balance}"
+
+
+class PointsLot(models.Model):
+    """
+    积分批次模型
+    
+    每笔获得的积分记为一个批次，记录剩余数量和过期时间；
+    扣减积分时按过期时间先后消耗批次，过期任务将批次的剩余积分从余额中扣除
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name=_('ID'))
+    tenant = models.ForeignKey('tenant_service.Tenant', on_delete=models.CASCADE, related_name='points_lots', verbose_name=_('租户'))
+    user = models.ForeignKey('auth_service.User', on_delete=models.CASCADE, related_name='points_lots', verbose_name=_('用户'))
+    user_points = models.ForeignKey('billing_service.UserPoints', on_delete=models.CASCADE, related_name='lots', verbose_name=_('积分账户'))
+    transaction = models.ForeignKey(
+        'billing_service.PointsTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lots',
+        verbose_name=_('获得交易记录')
+    )
+    points = models.IntegerField(verbose_name=_('获得积分'))
+    remaining = models.IntegerField(verbose_name=_('剩余积分'))
+    expired_points = models.IntegerField(default=0, verbose_name=_('过期积分'))
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name=_('过期时间'), help_text=_('为空表示永不过期'))
+    expired_at = models.DateTimeField(null=True, blank=True, verbose_name=_('过期处理时间'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    
+    class Meta:
+        verbose_name = _('积分批次')
+        verbose_name_plural = _('积分批次')
+        ordering = ['expires_at', 'created_at']
+        indexes = [
+            models.Index(fields=['user_points', 'expires_at']),
+            models.Index(fields=['expires_at', 'remaining']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} 积分批次 {self.remaining}/{self.points}"
+    
+    @staticmethod
+    def default_expires_at():
+        """
+        计算新批次的默认过期时间
+        
+        Returns:
+            datetime: 过期时间，POINTS_LOT_TTL_DAYS为0时返回None表示永不过期
+        """
+        ttl_days = getattr(settings, 'POINTS_LOT_TTL_DAYS', 365)
+        if not ttl_days:
+            return None
+        return timezone.now() + timedelta(days=ttl_days)
+    
+    @classmethod
+    def consume(cls, amounts):
+        """
+        按过期时间先后（FIFO）从积分批次中扣除积分
+        
+        一次查询读取相关账户的有效批次，一条UPDATE写回所有批次的剩余数量；
+        调用方须在同一事务中已更新（锁定）对应的积分账户行，保证同一账户的批次不会被并发扣除；
+        批次剩余积分不足时只扣除到0，不足部分视为从未记录批次的历史积分中扣除
+        
+        Args:
+            amounts: {积分账户ID: 扣除积分}
+        """
+        pending = {account_id: points for account_id, points in amounts.items() if points > 0}
+        if not pending:
+            return
+        
+        lots = cls.objects.filter(
+            user_points_id__in=pending,
+            remaining__gt=0
+        ).order_by(
+            'user_points_id',
+            F('expires_at').asc(nulls_last=True),
+            'created_at'
+        ).values_list('id', 'user_points_id', 'remaining')
+        
+        updates = {}
+        for lot_id, account_id, remaining in lots:
+            points = pending[account_id]
+            if points <= 0:
+                continue
+            used = min(points, remaining)
+            pending[account_id] = points - used
+            updates[lot_id] = remaining - used
+        
+        if updates:
+            cls.objects.filter(pk__in=updates).update(
+                remaining=Case(
+                    *[When(pk=lot_id, then=Value(remaining)) for lot_id, remaining in updates.items()],
+                    output_field=IntegerField()
+                )
+            )
+
+
+class PointsHold(models.Model):
+    """
+    积分预留模型
+    
+    按量计费的任务开始前预留积分，任务结束后按实际用量结算，未结算的部分退回余额
+    """
+    # 预留状态选项
+    STATUS_HELD = 'held'
+    STATUS_COMMITTED = 'committed'
+    STATUS_RELEASED = 'released'
+    STATUS_EXPIRED = 'expired'
+    
+    STATUS_CHOICES = (
+        (STATUS_HELD, _('预留中')),
+        (STATUS_COMMITTED, _('已结算')),
+        (STATUS_RELEASED, _('已释放')),
+        (STATUS_EXPIRED, _('已过期')),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name=_('ID'))
+    tenant = models.ForeignKey('tenant_service.Tenant', on_delete=models.CASCADE, related_name='points_holds', verbose_name=_('租户'))
+    user = models.ForeignKey('auth_service.User', on_delete=models.CASCADE, related_name='points_holds', verbose_name=_('用户'))
+    user_points = models.ForeignKey('billing_service.UserPoints', on_delete=models.CASCADE, related_name='holds', verbose_name=_('积分账户'))
+    points = models.IntegerField(verbose_name=_('预留积分'))
+    committed_points = models.IntegerField(default=0, verbose_name=_('结算积分'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_HELD, verbose_name=_('状态'))
+    source = models.CharField(max_length=100, blank=True, null=True, verbose_name=_('来源/去向'))
+    description = models.TextField(blank=True, null=True, verbose_name=_('描述'))
+    metadata = models.JSONField(default=dict, verbose_name=_('元数据'))
+    transaction = models.ForeignKey(
+        'billing_service.PointsTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='holds',
+        verbose_name=_('结算交易记录')
+    )
+    expires_at = models.DateTimeField(verbose_name=_('过期时间'))
+    settled_at = models.DateTimeField(null=True, blank=True, verbose_name=_('结算时间'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    
+    class Meta:
+        verbose_name = _('积分预留')
+        verbose_name_plural = _('积分预留')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', 'user']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} 预留 {self.points} 积分 ({self.get_status_display()})"
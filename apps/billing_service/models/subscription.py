@@ -139,6 +139,7 @@ class Subscription(models.Model):
     canceled_at = models.DateTimeField(blank=True, null=True, verbose_name=_('取消日期'))
     current_period_start = models.DateTimeField(verbose_name=_('当前计费周期开始日期'))
     current_period_end = models.DateTimeField(verbose_name=_('当前计费周期结束日期'))
+    renewal_requested_for = models.DateTimeField(blank=True, null=True, verbose_name=_('已发起续订的周期'), help_text=_('已创建续订订单的计费周期结束日期，同一周期只续订一次'))
     
     # 价格信息
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('订阅价格'), help_text=_('订阅时的价格，可能与计划当前价格不同'))
@@ -159,6 +160,7 @@ class Subscription(models.Model):
             models.Index(fields=['tenant', 'user']),
             models.Index(fields=['tenant', 'status']),
             models.Index(fields=['tenant', 'end_date']),
+            models.Index(fields=['status', 'end_date']),
         ]
     
     def __str__(self):
@@ -256,6 +258,29 @@ class Subscription(models.Model):
         
         self.save()
         
+    def apply_renewal(self, period_start):
+        """
+        续订订单支付成功后进入新的计费周期
+        
+        只有当前周期结束日期等于续订订单的周期开始日期时才推进周期，重复的支付通知不会重复续订；
+        续订订单支付前订阅已因周期结束而逾期或过期时同样恢复为激活
+        
+        Args:
+            period_start: 续订订单对应的新周期开始日期
+            
+        Returns:
+            bool: 是否推进了计费周期
+        """
+        if self.current_period_end != period_start:
+            return False
+        
+        self.current_period_start = period_start
+        self.current_period_end = self._calculate_period_end(period_start)
+        self.end_date = self.current_period_end
+        self.status = self.STATUS_ACTIVE
+        self.save()
+        return True
+        
     def change_plan(self, new_plan, prorate=True):
         """
         更换订阅计划
@@ -0,0 +1,57 @@
+"""
+用量计量模型
+"""
+
+import uuid
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class UsageEvent(models.Model):
+    """
+    用量事件模型
+    
+    只追加的原始用量记录，按幂等键去重；
+    定时任务按账户汇总待结算的事件，每个账户每个结算窗口只更新一次余额并写入一条交易记录
+    """
+    # 结算状态选项
+    STATUS_PENDING = 'pending'
+    STATUS_APPLIED = 'applied'
+    
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('待结算')),
+        (STATUS_APPLIED, _('已结算')),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, verbose_name=_('ID'))
+    tenant = models.ForeignKey('tenant_service.Tenant', on_delete=models.CASCADE, related_name='usage_events', verbose_name=_('租户'))
+    user = models.ForeignKey('auth_service.User', on_delete=models.CASCADE, related_name='usage_events', verbose_name=_('用户'))
+    meter = models.CharField(max_length=100, verbose_name=_('计量项'))
+    quantity = models.PositiveIntegerField(verbose_name=_('消耗积分'))
+    idempotency_key = models.CharField(max_length=128, verbose_name=_('幂等键'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name=_('状态'))
+    transaction = models.ForeignKey(
+        'billing_service.PointsTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='usage_events',
+        verbose_name=_('结算交易记录')
+    )
+    metadata = models.JSONField(default=dict, verbose_name=_('元数据'))
+    occurred_at = models.DateTimeField(verbose_name=_('发生时间'))
+    applied_at = models.DateTimeField(null=True, blank=True, verbose_name=_('结算时间'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    
+    class Meta:
+        verbose_name = _('用量事件')
+        verbose_name_plural = _('用量事件')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', 'user']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+        unique_together = [('tenant', 'idempotency_key')]
+    
+    def __str__(self):
+        return f"{self.user} {self.meter} {self.quantity}"
@@ -11,9 +11,17 @@ from apps.billing_service.serializers.subscription_serializers import (
 )
 from apps.billing_service.serializers.points_serializers import (
     UserPointsSerializer,
-    PointsTransactionSerializer
+    PointsTransactionSerializer,
+    PointsHoldSerializer,
+    PointsGrantSerializer,
+    PointsBulkGrantSerializer
 )
+from apps.billing_service.serializers.usage_serializers import UsageEventSerializer, UsageEventBatchSerializer
 from apps.billing_service.serializers.invoice_serializers import InvoiceSerializer, InvoiceDetailSerializer
+from apps.billing_service.serializers.entitlement_serializers import (
+    EntitlementCheckSerializer,
+    EntitlementVerifySerializer
+)
 
 __all__ = [
     'OrderSerializer', 
@@ -25,6 +33,13 @@ __all__ = [
     'SubscriptionDetailSerializer',
     'UserPointsSerializer',
     'PointsTransactionSerializer',
+    'PointsHoldSerializer',
+    'PointsGrantSerializer',
+    'PointsBulkGrantSerializer',
+    'UsageEventSerializer',
+    'UsageEventBatchSerializer',
     'InvoiceSerializer', 
-    'InvoiceDetailSerializer'
+    'InvoiceDetailSerializer',
+    'EntitlementCheckSerializer',
+    'EntitlementVerifySerializer'
 ]
@@ -0,0 +1,27 @@
+"""
+权益校验序列化器
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+
+
+class EntitlementCheckSerializer(serializers.Serializer):
+    """
+    权益校验项序列化器
+    """
+    tenant_id = serializers.UUIDField(required=False)
+    user_id = serializers.UUIDField(required=False, allow_null=True)
+    feature = serializers.CharField(max_length=100, required=False)
+    minimum = serializers.IntegerField(required=False)
+
+
+class EntitlementVerifySerializer(serializers.Serializer):
+    """
+    权益批量校验序列化器
+    """
+    checks = serializers.ListField(
+        child=EntitlementCheckSerializer(),
+        allow_empty=False,
+        max_length=getattr(settings, 'ENTITLEMENT_VERIFY_MAX_CHECKS', 100)
+    )
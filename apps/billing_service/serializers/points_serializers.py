@@ -2,8 +2,9 @@
 积分序列化器
 """
 
+from django.conf import settings
 from rest_framework import serializers
-from apps.billing_service.models import UserPoints, PointsTransaction
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsHold
 
 
 class UserPointsSerializer(serializers.ModelSerializer):
@@ -15,10 +16,10 @@ class UserPointsSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserPoints
         fields = [
-            'id', 'user', 'username', 'balance', 'total_earned', 
+            'id', 'user', 'username', 'balance', 'held_balance', 'total_earned', 
             'total_spent', 'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'username', 'balance', 'total_earned', 
+        read_only_fields = ['id', 'user', 'username', 'balance', 'held_balance', 'total_earned', 
                            'total_spent', 'created_at', 'updated_at']
 
 
@@ -37,4 +38,41 @@ class PointsTransactionSerializer(serializers.ModelSerializer):
             'description', 'order', 'created_at'
         ]
         read_only_fields = ['id', 'user', 'username', 'points', 'balance_after',
-                           'transaction_type', 'transaction_type_display', 'created_at'] 
\ No newline at end of file
+                           'transaction_type', 'transaction_type_display', 'created_at']
+
+
+class PointsHoldSerializer(serializers.ModelSerializer):
+    """
+    积分预留序列化器
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = PointsHold
+        fields = [
+            'id', 'user', 'points', 'committed_points', 'status', 'status_display',
+            'source', 'description', 'metadata', 'transaction', 'expires_at',
+            'settled_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class PointsGrantSerializer(serializers.Serializer):
+    """
+    积分发放序列化器
+    """
+    user_id = serializers.UUIDField()
+    points = serializers.IntegerField(min_value=1)
+
+
+class PointsBulkGrantSerializer(serializers.Serializer):
+    """
+    积分批量发放序列化器
+    """
+    grants = serializers.ListField(
+        child=PointsGrantSerializer(),
+        allow_empty=False,
+        max_length=getattr(settings, 'POINTS_BULK_MAX_GRANTS', 10000)
+    )
+    reason = serializers.CharField(max_length=255)
+    source = serializers.CharField(max_length=100, required=False)
@@ -0,0 +1,29 @@
+"""
+用量计量序列化器
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+
+
+class UsageEventSerializer(serializers.Serializer):
+    """
+    用量事件序列化器
+    """
+    user_id = serializers.UUIDField()
+    meter = serializers.CharField(max_length=100)
+    quantity = serializers.IntegerField(min_value=1)
+    idempotency_key = serializers.CharField(max_length=128)
+    occurred_at = serializers.DateTimeField(required=False)
+    metadata = serializers.JSONField(required=False)
+
+
+class UsageEventBatchSerializer(serializers.Serializer):
+    """
+    用量事件批量提交序列化器
+    """
+    events = serializers.ListField(
+        child=UsageEventSerializer(),
+        allow_empty=False,
+        max_length=getattr(settings, 'POINTS_METERING_MAX_EVENTS', 1000)
+    )
@@ -0,0 +1,289 @@
+"""
+权益服务
+根据有效订阅的计划功能配置计算用户和租户的权益，并缓存供微服务校验
+"""
+
+import time
+import logging
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.billing_service.models import Subscription
+
+logger = logging.getLogger('billing_service')
+
+
+class EntitlementService:
+    """
+    权益服务类
+
+    将(租户, 用户)所有有效订阅的SubscriptionPlan.features合并为一份权益数据写入缓存，
+    缓存命中时校验不执行SQL；缓存键带租户版本号，计划变更时递增版本号使整个租户的缓存失效，
+    订阅变更时只删除对应用户的缓存；缓存有效期不超过最早结束的订阅，订阅到期后自动重新计算
+
+    合并规则：布尔值任一为真即为真；数值取最大值，-1表示不限；列表取并集；其他类型取排序靠前的计划
+    """
+
+    CACHE_KEY_PREFIX = 'billing_service:entitlements'
+
+    # 数值权益中表示不限的值
+    UNLIMITED = -1
+
+    @classmethod
+    def _version_key(cls, tenant_id):
+        """生成租户版本号缓存键"""
+        return f"{cls.CACHE_KEY_PREFIX}:version:{tenant_id}"
+
+    @classmethod
+    def _entitlement_key(cls, tenant_id, user_id, version):
+        """生成权益缓存键，user_id为空时表示租户级权益"""
+        return f"{cls.CACHE_KEY_PREFIX}:{tenant_id}:v{version}:{user_id or 'tenant'}"
+
+    @staticmethod
+    def _initial_version():
+        """
+        生成初始版本号
+
+        使用当前时间戳，版本号缓存被淘汰后重新初始化的值大于之前的版本，不会读到旧的权益缓存
+        """
+        return int(time.time())
+
+    @classmethod
+    def _get_versions(cls, tenant_ids):
+        """
+        批量获取租户版本号，不存在时初始化
+
+        Returns:
+            dict: {租户ID: 版本号}
+        """
+        keys = {cls._version_key(tenant_id): tenant_id for tenant_id in tenant_ids}
+        cached = cache.get_many(list(keys))
+        versions = {keys[key]: version for key, version in cached.items()}
+        for key, tenant_id in keys.items():
+            if tenant_id not in versions:
+                cache.add(key, cls._initial_version(), None)
+                versions[tenant_id] = cache.get(key) or cls._initial_version()
+        return versions
+
+    @classmethod
+    def _merge_features(cls, features_list):
+        """
+        合并多个计划的功能配置
+
+        Args:
+            features_list: 功能配置列表，按计划优先级排序
+
+        Returns:
+            dict: 合并后的权益
+        """
+        merged = {}
+        for features in features_list:
+            for name, value in (features or {}).items():
+                if name not in merged:
+                    merged[name] = list(value) if isinstance(value, list) else value
+                    continue
+
+                current = merged[name]
+                if isinstance(value, bool) or isinstance(current, bool):
+                    merged[name] = bool(current) or bool(value)
+                elif isinstance(value, (int, float)) and isinstance(current, (int, float)):
+                    if cls.UNLIMITED in (current, value):
+                        merged[name] = cls.UNLIMITED
+                    else:
+                        merged[name] = max(current, value)
+                elif isinstance(value, list) and isinstance(current, list):
+                    current.extend(item for item in value if item not in current)
+        return merged
+
+    @classmethod
+    def _materialize(cls, tenant_id, user_ids):
+        """
+        从数据库计算权益
+
+        Args:
+            tenant_id: 租户ID
+            user_ids: 用户ID集合，包含None时同时计算租户级权益
+
+        Returns:
+            dict: {用户ID: 权益数据}
+        """
+        now = timezone.now()
+        subscriptions = Subscription.objects.filter(
+            tenant_id=tenant_id,
+            status__in=[Subscription.STATUS_ACTIVE, Subscription.STATUS_TRIAL],
+            end_date__gt=now
+        )
+        if None not in user_ids:
+            subscriptions = subscriptions.filter(user_id__in=user_ids)
+        rows = subscriptions.order_by('plan__sort_order', 'created_at').values_list(
+            'user_id', 'plan__code', 'plan__features', 'end_date'
+        )
+
+        grouped = {user_id: [] for user_id in user_ids}
+        for user_id, plan_code, features, end_date in rows:
+            user_id = str(user_id)
+            if user_id in grouped:
+                grouped[user_id].append((plan_code, features, end_date))
+            if None in grouped:
+                grouped[None].append((plan_code, features, end_date))
+
+        entitlements = {}
+        for user_id, plans in grouped.items():
+            expires_at = min((end_date for _, _, end_date in plans), default=None)
+            entitlements[user_id] = {
+                'active': bool(plans),
+                'plans': list(dict.fromkeys(plan_code for plan_code, _, _ in plans)),
+                'features': cls._merge_features(features for _, features, _ in plans),
+                'expires_at': expires_at.isoformat() if expires_at else None,
+            }
+        return entitlements
+
+    @classmethod
+    def _cache_timeout(cls, entitlement):
+        """计算权益缓存有效期，不超过最早结束的订阅"""
+        timeout = getattr(settings, 'ENTITLEMENT_CACHE_TIMEOUT', 300)
+        if entitlement['expires_at']:
+            remaining = (
+                datetime.fromisoformat(entitlement['expires_at']) - timezone.now()
+            ).total_seconds()
+            timeout = max(min(timeout, int(remaining)), 1)
+        return timeout
+
+    @classmethod
+    def get_entitlements_many(cls, pairs):
+        """
+        批量获取权益
+
+        Args:
+            pairs: (租户ID, 用户ID)列表，用户ID为None时获取租户级权益
+
+        Returns:
+            dict: {(租户ID, 用户ID): 权益数据}
+        """
+        pairs = {(str(tenant_id), str(user_id) if user_id else None) for tenant_id, user_id in pairs}
+        versions = cls._get_versions({tenant_id for tenant_id, _ in pairs})
+        keys = {cls._entitlement_key(tenant_id, user_id, versions[tenant_id]): (tenant_id, user_id)
+                for tenant_id, user_id in pairs}
+
+        results = {}
+        for key, entitlement in cache.get_many(list(keys)).items():
+            results[keys[key]] = entitlement
+
+        # 未命中缓存的按租户批量计算
+        missing = {}
+        for tenant_id, user_id in pairs:
+            if (tenant_id, user_id) not in results:
+                missing.setdefault(tenant_id, set()).add(user_id)
+        for tenant_id, user_ids in missing.items():
+            for user_id, entitlement in cls._materialize(tenant_id, user_ids).items():
+                results[(tenant_id, user_id)] = entitlement
+                cache.set(
+                    cls._entitlement_key(tenant_id, user_id, versions[tenant_id]),
+                    entitlement,
+                    cls._cache_timeout(entitlement)
+                )
+        return results
+
+    @classmethod
+    def get_entitlements(cls, tenant_id, user_id=None):
+        """
+        获取权益
+
+        Args:
+            tenant_id: 租户ID
+            user_id: 用户ID，为空时获取租户内所有有效订阅合并后的租户级权益
+
+        Returns:
+            dict: 权益数据，包含active、plans、features、expires_at
+        """
+        key = (str(tenant_id), str(user_id) if user_id else None)
+        return cls.get_entitlements_many([key])[key]
+
+    @classmethod
+    def check(cls, entitlement, feature, minimum=None):
+        """
+        校验权益是否包含指定功能
+
+        Args:
+            entitlement: 权益数据
+            feature: 功能名称
+            minimum: 数值权益需要达到的最小值，为空时只要求功能值为真
+
+        Returns:
+            tuple: (是否允许, 功能值)
+        """
+        value = entitlement['features'].get(feature)
+        if minimum is None:
+            return bool(value), value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False, value
+        return value == cls.UNLIMITED or value >= minimum, value
+
+    @classmethod
+    def verify(cls, checks):
+        """
+        批量校验权益
+
+        Args:
+            checks: 校验项列表，每项包含tenant_id，可选user_id、feature、minimum
+
+        Returns:
+            list: 与校验项一一对应的结果，未指定feature时返回完整权益
+        """
+        entitlements = cls.get_entitlements_many(
+            (check['tenant_id'], check.get('user_id')) for check in checks
+        )
+
+        results = []
+        for check in checks:
+            key = (str(check['tenant_id']), str(check['user_id']) if check.get('user_id') else None)
+            entitlement = entitlements[key]
+            result = {
+                'tenant_id': key[0],
+                'user_id': key[1],
+                'active': entitlement['active'],
+                'plans': entitlement['plans'],
+            }
+            feature = check.get('feature')
+            if feature:
+                allowed, value = cls.check(entitlement, feature, check.get('minimum'))
+                result.update({'feature': feature, 'allowed': allowed, 'value': value})
+            else:
+                result.update({'features': entitlement['features'], 'expires_at': entitlement['expires_at']})
+            results.append(result)
+        return results
+
+    @classmethod
+    def invalidate_users(cls, pairs):
+        """
+        清除用户权益缓存，同时清除所在租户的租户级权益缓存
+
+        Args:
+            pairs: (租户ID, 用户ID)列表
+        """
+        try:
+            pairs = {(str(tenant_id), str(user_id)) for tenant_id, user_id in pairs}
+            versions = cls._get_versions({tenant_id for tenant_id, _ in pairs})
+            keys = {cls._entitlement_key(tenant_id, user_id, versions[tenant_id]) for tenant_id, user_id in pairs}
+            keys.update(cls._entitlement_key(tenant_id, None, version) for tenant_id, version in versions.items())
+            cache.delete_many(list(keys))
+        except Exception as e:
+            logger.warning(f"清除权益缓存失败: {str(e)}")
+
+    @classmethod
+    def invalidate_tenant(cls, tenant_id):
+        """
+        使租户的所有权益缓存失效
+
+        Args:
+            tenant_id: 租户ID
+        """
+        key = cls._version_key(tenant_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, cls._initial_version(), None)
+        except Exception as e:
+            logger.warning(f"清除租户权益缓存失败: {str(e)}")
@@ -0,0 +1,249 @@
+"""
+用量计量服务
+实现用量事件的批量接收和按账户汇总结算
+"""
+
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, UUIDField, Value, When
+from django.utils import timezone
+
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsLot, UsageEvent
+
+logger = logging.getLogger('billing_service')
+
+
+class MeteringService:
+    """
+    用量计量服务类
+
+    用量事件只追加写入并按幂等键去重，不直接改动积分余额；
+    定时任务每个结算窗口汇总一次待结算事件，每个账户只执行一次余额更新并写入一条汇总交易记录
+    """
+
+    @staticmethod
+    def ingest(tenant, events):
+        """
+        批量接收用量事件
+
+        Args:
+            tenant: 租户对象
+            events: 用量事件列表，每项包含user_id、meter、quantity、idempotency_key，
+                    可选occurred_at、metadata
+
+        Returns:
+            dict: 接收结果，包含新接收数量、重复数量和被拒绝的事件
+        """
+        from apps.tenant_service.models import TenantUser
+
+        batch_size = getattr(settings, 'POINTS_METERING_BATCH_SIZE', 1000)
+        now = timezone.now()
+
+        # 同一批次内的重复事件只保留第一条
+        unique_events = {}
+        for event in events:
+            unique_events.setdefault(event['idempotency_key'], event)
+        duplicates = len(events) - len(unique_events)
+
+        user_ids = {event['user_id'] for event in unique_events.values()}
+        member_ids = set(
+            TenantUser.objects.filter(
+                tenant=tenant,
+                user_id__in=user_ids,
+                is_active=True
+            ).values_list('user_id', flat=True)
+        )
+
+        existing_keys = set()
+        keys = list(unique_events)
+        for start in range(0, len(keys), batch_size):
+            existing_keys.update(
+                UsageEvent.objects.filter(
+                    tenant=tenant,
+                    idempotency_key__in=keys[start:start + batch_size]
+                ).values_list('idempotency_key', flat=True)
+            )
+
+        rejected = []
+        new_events = []
+        for key, event in unique_events.items():
+            if key in existing_keys:
+                duplicates += 1
+            elif event['user_id'] not in member_ids:
+                rejected.append({'idempotency_key': key, 'error': '用户不是租户的有效成员'})
+            else:
+                new_events.append(UsageEvent(
+                    tenant=tenant,
+                    user_id=event['user_id'],
+                    meter=event['meter'],
+                    quantity=event['quantity'],
+                    idempotency_key=key,
+                    metadata=event.get('metadata') or {},
+                    occurred_at=event.get('occurred_at') or now
+                ))
+
+        # 并发提交相同幂等键时由唯一约束去重，被忽略的事件不会写入
+        UsageEvent.objects.bulk_create(new_events, batch_size=batch_size, ignore_conflicts=True)
+
+        # 事件ID在写入前生成，按本次请求的事件ID回查实际写入的数量
+        accepted = 0
+        event_ids = [event.id for event in new_events]
+        for start in range(0, len(event_ids), batch_size):
+            accepted += UsageEvent.objects.filter(id__in=event_ids[start:start + batch_size]).count()
+        duplicates += len(new_events) - accepted
+
+        logger.info(
+            f"接收用量事件: tenant_id={tenant.id}, accepted={accepted}, "
+            f"duplicates={duplicates}, rejected={len(rejected)}"
+        )
+
+        return {
+            'accepted': accepted,
+            'duplicates': duplicates,
+            'rejected': rejected,
+        }
+
+    @staticmethod
+    def _get_accounts(pairs):
+        """
+        获取(租户, 用户)对应的积分账户，不存在时批量创建
+
+        Args:
+            pairs: (租户ID, 用户ID)集合
+
+        Returns:
+            dict: {(租户ID, 用户ID): 积分账户ID}
+        """
+        tenant_ids = {tenant_id for tenant_id, _ in pairs}
+        user_ids = {user_id for _, user_id in pairs}
+
+        def load():
+            return {
+                (tenant_id, user_id): account_id
+                for account_id, tenant_id, user_id in UserPoints.objects.filter(
+                    tenant_id__in=tenant_ids,
+                    user_id__in=user_ids
+                ).values_list('id', 'tenant_id', 'user_id')
+                if (tenant_id, user_id) in pairs
+            }
+
+        accounts = load()
+        missing = pairs - set(accounts)
+        if missing:
+            UserPoints.objects.bulk_create(
+                [UserPoints(tenant_id=tenant_id, user_id=user_id) for tenant_id, user_id in missing],
+                ignore_conflicts=True
+            )
+            accounts = load()
+        return accounts
+
+    @staticmethod
+    def apply_pending_usage(batch_size=None):
+        """
+        结算待处理的用量事件
+
+        每批锁定一组待结算事件，按账户汇总后：一条UPDATE更新所有账户余额并按FIFO扣除积分批次，
+        一次批量插入写入每个账户的汇总交易记录，一条UPDATE将事件标记为已结算；
+        用量已经发生，余额不足时仍全额扣除，余额可能变为负数；
+        支持SKIP LOCKED的数据库上多个worker可以并发执行
+
+        Args:
+            batch_size: 每批处理的事件数量
+
+        Returns:
+            dict: 结算结果，包含事件数量和账户数量
+        """
+        batch_size = batch_size or getattr(settings, 'POINTS_METERING_BATCH_SIZE', 1000)
+        applied_events = 0
+        applied_accounts = 0
+
+        while True:
+            with transaction.atomic():
+                pending = UsageEvent.objects.filter(
+                    status=UsageEvent.STATUS_PENDING
+                ).order_by('created_at')
+                if connection.features.has_select_for_update_skip_locked:
+                    pending = pending.select_for_update(skip_locked=True)
+                else:
+                    pending = pending.select_for_update()
+                events = list(
+                    pending.values_list('id', 'tenant_id', 'user_id', 'meter', 'quantity', 'occurred_at')[:batch_size]
+                )
+                if not events:
+                    break
+
+                # 按账户汇总
+                totals = defaultdict(int)
+                meters = defaultdict(lambda: defaultdict(int))
+                windows = {}
+                counts = defaultdict(int)
+                for _, tenant_id, user_id, meter, quantity, occurred_at in events:
+                    key = (tenant_id, user_id)
+                    totals[key] += quantity
+                    meters[key][meter] += quantity
+                    counts[key] += 1
+                    start, end = windows.get(key, (occurred_at, occurred_at))
+                    windows[key] = (min(start, occurred_at), max(end, occurred_at))
+
+                accounts = MeteringService._get_accounts(set(totals))
+                charge = Case(
+                    *[When(pk=accounts[key], then=Value(total)) for key, total in totals.items()],
+                    output_field=IntegerField()
+                )
+                now = timezone.now()
+                UserPoints.objects.filter(pk__in=accounts.values()).update(
+                    balance=F('balance') - charge,
+                    total_spent=F('total_spent') + charge,
+                    updated_at=now
+                )
+                balances = dict(
+                    UserPoints.objects.filter(pk__in=accounts.values()).values_list('id', 'balance')
+                )
+                PointsLot.consume({accounts[key]: total for key, total in totals.items()})
+
+                ledger = {}
+                for key, total in totals.items():
+                    tenant_id, user_id = key
+                    start, end = windows[key]
+                    ledger[key] = PointsTransaction(
+                        tenant_id=tenant_id,
+                        user_id=user_id,
+                        user_points_id=accounts[key],
+                        points=-total,  # 负数表示支出
+                        balance_after=balances[accounts[key]],
+                        transaction_type=PointsTransaction.TYPE_SPEND,
+                        source='metering',
+                        description=f"用量计费: {', '.join(sorted(meters[key]))}",
+                        metadata={
+                            'meters': dict(meters[key]),
+                            'events': counts[key],
+                            'window_start': start.isoformat(),
+                            'window_end': end.isoformat(),
+                        }
+                    )
+                PointsTransaction.objects.bulk_create(ledger.values())
+
+                UsageEvent.objects.filter(id__in=[event[0] for event in events]).update(
+                    status=UsageEvent.STATUS_APPLIED,
+                    applied_at=now,
+                    transaction_id=Case(
+                        *[When(tenant_id=tenant_id, user_id=user_id, then=Value(points_transaction.id))
+                          for (tenant_id, user_id), points_transaction in ledger.items()],
+                        output_field=UUIDField()
+                    )
+                )
+
+                overdrawn = [key for key in totals if balances[accounts[key]] < 0]
+                if overdrawn:
+                    logger.warning(f"用量结算后余额为负: {len(overdrawn)} 个账户")
+
+            applied_events += len(events)
+            applied_accounts += len(totals)
+            if len(events) < batch_size:
+                break
+
+        if applied_events:
+            logger.info(f"结算用量事件: events={applied_events}, accounts={applied_accounts}")
+        return {'events': applied_events, 'accounts': applied_accounts}
@@ -98,6 +98,8 @@ class PaymentService:
             tuple: (Payment, payment_url)，支付记录对象和支付链接
         """
         try:
+            gateway_config = None
+            
             # 如果没有指定支付网关，则获取默认网关
             if not payment_gateway:
                 gateway_config = PaymentGatewayConfig.get_default_gateway(order.tenant, payment_method)
@@ -131,7 +133,7 @@ class PaymentService:
             
             if payment_method == Payment.METHOD_ALIPAY:
                 # 支付宝支付
-                payment_url = PaymentService.create_alipay_payment(payment, return_url, notify_url)
+                payment_url = PaymentService.create_alipay_payment(payment, return_url, notify_url, gateway_config)
             elif payment_method == Payment.METHOD_WECHAT:
                 # 微信支付
                 payment_url = PaymentService.create_wechat_payment(payment, return_url, notify_url)
@@ -157,7 +159,7 @@ class PaymentService:
             raise
     
     @staticmethod
-    def create_alipay_payment(payment, return_url=None, notify_url=None):
+    def create_alipay_payment(payment, return_url=None, notify_url=None, gateway_config=None):
         """
         创建支付宝支付
         
@@ -165,6 +167,7 @@ class PaymentService:
             payment: 支付记录对象
             return_url: 支付成功后跳转的URL
             notify_url: 支付结果异步通知URL
+            gateway_config: 支付网关配置对象，为空时使用租户的默认支付宝网关配置
             
         Returns:
             str: 支付链接
@@ -176,8 +179,11 @@ class PaymentService:
             if not notify_url:
                 notify_url = settings.SITE_URL + reverse('billing_service:payment_notify', args=[payment.id])
                 
+            if gateway_config is None:
+                gateway_config = PaymentGatewayConfig.get_default_gateway(payment.tenant, Payment.METHOD_ALIPAY)
+                
             # 创建支付宝支付
-            payment_url = create_alipay_trade_page_pay(payment.order, return_url, notify_url)
+            payment_url = create_alipay_trade_page_pay(payment.order, return_url, notify_url, gateway_config)
             
             logger.info(f"支付宝支付创建成功: payment_id={payment.id}, order_id={payment.order.id}")
             return payment_url
@@ -229,8 +235,9 @@ class PaymentService:
         """
         try:
             if payment.payment_method == Payment.METHOD_ALIPAY:
-                # 查询支付宝支付状态
-                result = query_trade_status(payment.order.order_number)
+                # 查询支付宝支付状态，使用租户的支付宝网关配置
+                gateway_config = PaymentGatewayConfig.get_default_gateway(payment.tenant, Payment.METHOD_ALIPAY)
+                result = query_trade_status(payment.order.order_number, gateway_config)
                 
                 # 解析支付宝返回结果
                 response = result.get('alipay_trade_query_response', {})
@@ -0,0 +1,191 @@
+"""
+积分过期服务
+实现积分批次的批量过期处理
+"""
+
+import logging
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsLot
+
+logger = logging.getLogger('billing_service')
+
+
+class PointsExpirationService:
+    """
+    积分过期服务类
+
+    按账户分批处理到期的积分批次，每批账户只执行一条批次UPDATE、一条余额UPDATE和一次交易记录批量插入；
+    到期批次上仍被预留的积分保留在批次上，预留释放时再过期
+    """
+
+    @staticmethod
+    def expire_points(now=None, batch_size=None):
+        """
+        过期到期的积分批次
+
+        按账户ID顺序分批处理，每批锁定一组账户后按到期先后扣除到期批次的剩余积分，
+        过期积分不超过账户当前可用余额，超出部分是预留中的积分，保留在批次上；
+        支持SKIP LOCKED的数据库上跳过正在变动的账户，留待下次执行
+
+        Args:
+            now: 当前时间，过期时间不晚于该时间的批次视为到期
+            batch_size: 每批处理的账户数量
+
+        Returns:
+            dict: 处理结果，包含过期的账户数量、批次数量和积分总数
+        """
+        batch_size = batch_size or getattr(settings, 'POINTS_EXPIRE_BATCH_SIZE', 1000)
+        now = now or timezone.now()
+        expired_accounts = 0
+        expired_lots = 0
+        expired_points = 0
+        last_account_id = None
+
+        while True:
+            due = PointsLot.objects.filter(expires_at__lte=now, remaining__gt=0)
+            candidates = due.order_by('user_points_id')
+            if last_account_id is not None:
+                candidates = candidates.filter(user_points_id__gt=last_account_id)
+            account_ids = list(
+                candidates.values_list('user_points_id', flat=True).distinct()[:batch_size]
+            )
+            if not account_ids:
+                break
+            last_account_id = account_ids[-1]
+
+            with transaction.atomic():
+                # 先锁定账户再处理批次，与扣减积分的加锁顺序一致
+                accounts = UserPoints.objects.filter(pk__in=account_ids)
+                if connection.features.has_select_for_update_skip_locked:
+                    accounts = accounts.select_for_update(skip_locked=True)
+                else:
+                    accounts = accounts.select_for_update()
+                accounts = {
+                    account_id: (tenant_id, user_id, balance)
+                    for account_id, tenant_id, user_id, balance in accounts.values_list(
+                        'id', 'tenant_id', 'user_id', 'balance'
+                    )
+                }
+                if not accounts:
+                    continue
+
+                result = PointsExpirationService._expire_locked(accounts, now)
+
+            expired_accounts += result['accounts']
+            expired_lots += result['lots']
+            expired_points += result['points']
+
+        if expired_lots:
+            logger.info(
+                f"积分过期: accounts={expired_accounts}, lots={expired_lots}, points={expired_points}"
+            )
+        return {'accounts': expired_accounts, 'lots': expired_lots, 'points': expired_points}
+
+    @staticmethod
+    def _expire_locked(accounts, now):
+        """
+        过期一组已锁定账户的到期批次
+
+        过期积分不超过账户当前可用余额，按到期先后从批次中扣除；
+        预留中的积分保留在到期批次上，预留结算时从批次扣除，释放后由expire_accounts立即过期
+
+        Args:
+            accounts: {积分账户ID: (租户ID, 用户ID, 可用余额)}，调用方须在当前事务中已锁定这些账户
+            now: 当前时间
+
+        Returns:
+            dict: 处理结果，包含过期的账户数量、批次数量和积分总数
+        """
+        lots = PointsLot.objects.filter(
+            user_points_id__in=accounts,
+            expires_at__lte=now,
+            remaining__gt=0
+        ).order_by('user_points_id', 'expires_at', 'created_at').values_list('id', 'user_points_id', 'remaining')
+
+        # 过期积分不超过可用余额
+        available = {account_id: max(balance, 0) for account_id, (_, _, balance) in accounts.items()}
+        expired = {}
+        charges = {}
+        lot_counts = {}
+        for lot_id, account_id, remaining in lots:
+            used = min(remaining, available[account_id])
+            if used <= 0:
+                continue
+            available[account_id] -= used
+            expired[lot_id] = used
+            charges[account_id] = charges.get(account_id, 0) + used
+            lot_counts[account_id] = lot_counts.get(account_id, 0) + 1
+
+        if not charges:
+            return {'accounts': 0, 'lots': 0, 'points': 0}
+
+        lot_expired = Case(
+            *[When(pk=lot_id, then=Value(used)) for lot_id, used in expired.items()],
+            output_field=IntegerField()
+        )
+        PointsLot.objects.filter(pk__in=expired).update(
+            remaining=F('remaining') - lot_expired,
+            expired_points=F('expired_points') + lot_expired,
+            expired_at=now
+        )
+
+        UserPoints.objects.filter(pk__in=charges).update(
+            balance=F('balance') - Case(
+                *[When(pk=account_id, then=Value(charge)) for account_id, charge in charges.items()],
+                output_field=IntegerField()
+            ),
+            updated_at=timezone.now()
+        )
+
+        ledger = []
+        for account_id, charge in charges.items():
+            tenant_id, user_id, balance = accounts[account_id]
+            ledger.append(PointsTransaction(
+                tenant_id=tenant_id,
+                user_id=user_id,
+                user_points_id=account_id,
+                points=-charge,  # 负数表示支出
+                balance_after=balance - charge,
+                transaction_type=PointsTransaction.TYPE_EXPIRE,
+                source='expiration',
+                description="积分过期",
+                metadata={'lots': lot_counts[account_id], 'expired_before': now.isoformat()}
+            ))
+        PointsTransaction.objects.bulk_create(ledger)
+
+        return {'accounts': len(charges), 'lots': len(expired), 'points': sum(charges.values())}
+
+    @staticmethod
+    def expire_accounts(account_ids, now=None):
+        """
+        立即过期指定账户的到期批次
+
+        预留释放后调用，使到期批次上被预留的积分退回后不会成为可用余额
+
+        Args:
+            account_ids: 积分账户ID列表
+            now: 当前时间
+
+        Returns:
+            dict: 处理结果，包含过期的账户数量、批次数量和积分总数
+        """
+        now = now or timezone.now()
+        with transaction.atomic():
+            due_accounts = PointsLot.objects.filter(
+                user_points_id__in=account_ids,
+                expires_at__lte=now,
+                remaining__gt=0
+            ).values_list('user_points_id', flat=True).distinct()
+            accounts = {
+                account_id: (tenant_id, user_id, balance)
+                for account_id, tenant_id, user_id, balance in UserPoints.objects.select_for_update().filter(
+                    pk__in=due_accounts
+                ).values_list('id', 'tenant_id', 'user_id', 'balance')
+            }
+            if not accounts:
+                return {'accounts': 0, 'lots': 0, 'points': 0}
+            return PointsExpirationService._expire_locked(accounts, now)
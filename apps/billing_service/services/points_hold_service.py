@@ -0,0 +1,312 @@
+"""
+积分预留服务
+实现积分预留、结算和释放的业务逻辑
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsLot, PointsHold
+from apps.billing_service.services.points_expiration_service import PointsExpirationService
+
+logger = logging.getLogger('billing_service')
+
+
+class PointsHoldService:
+    """
+    积分预留服务类
+
+    预留时将可用余额原子地转入冻结积分，结算时按实际用量扣除并退回剩余部分，
+    释放或过期时全部退回；预留记录的状态通过条件UPDATE切换，保证每笔预留只结算一次
+    """
+
+    @staticmethod
+    def _get_ttl(ttl):
+        """
+        计算预留有效期
+
+        Args:
+            ttl: 请求的有效期（秒），为空时使用默认值
+
+        Returns:
+            int: 有效期（秒）
+        """
+        default_ttl = getattr(settings, 'POINTS_HOLD_DEFAULT_TTL', 900)
+        max_ttl = getattr(settings, 'POINTS_HOLD_MAX_TTL', 86400)
+        if not ttl:
+            return default_ttl
+        if ttl <= 0:
+            raise ValueError("预留有效期必须为正数")
+        return min(int(ttl), max_ttl)
+
+    @staticmethod
+    def reserve(tenant, user, points, ttl=None, source=None, description=None, metadata=None):
+        """
+        预留积分
+
+        Args:
+            tenant: 租户对象
+            user: 用户对象
+            points: 预留积分数量（正整数）
+            ttl: 有效期（秒），超时未结算的预留由定时任务释放
+            source: 积分去向
+            description: 描述
+            metadata: 元数据
+
+        Returns:
+            tuple: (PointsHold, int)，预留记录和预留后的可用余额
+
+        Raises:
+            ValueError: 参数无效或积分不足
+        """
+        if points <= 0:
+            raise ValueError("预留的积分必须为正数")
+        ttl = PointsHoldService._get_ttl(ttl)
+
+        try:
+            with transaction.atomic():
+                # 余额足够时才转入冻结积分
+                updated = UserPoints.objects.filter(
+                    tenant=tenant,
+                    user=user,
+                    balance__gte=points
+                ).update(
+                    balance=F('balance') - points,
+                    held_balance=F('held_balance') + points,
+                    updated_at=timezone.now()
+                )
+                if not updated:
+                    balance = UserPoints.objects.filter(
+                        tenant=tenant,
+                        user=user
+                    ).values_list('balance', flat=True).first() or 0
+                    raise ValueError(f"积分余额不足，当前余额: {balance}, 需要预留: {points}")
+
+                user_points_id, balance = UserPoints.objects.filter(
+                    tenant=tenant,
+                    user=user
+                ).values_list('id', 'balance').get()
+
+                hold = PointsHold.objects.create(
+                    tenant=tenant,
+                    user=user,
+                    user_points_id=user_points_id,
+                    points=points,
+                    source=source,
+                    description=description,
+                    metadata=metadata or {},
+                    expires_at=timezone.now() + timedelta(seconds=ttl)
+                )
+
+            logger.info(f"预留积分: user_id={user.id}, points={points}, hold_id={hold.id}")
+            return hold, balance
+
+        except ValueError as e:
+            logger.warning(f"预留积分失败: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"预留积分失败: {str(e)}", exc_info=True)
+            raise
+
+    @staticmethod
+    def _settle(hold_id, status, tenant=None, user=None):
+        """
+        将预留中的记录切换为指定状态
+
+        Returns:
+            PointsHold: 切换成功的预留记录
+
+        Raises:
+            ValueError: 预留不存在或已结算
+        """
+        holds = PointsHold.objects.filter(id=hold_id)
+        if tenant is not None:
+            holds = holds.filter(tenant=tenant)
+        if user is not None:
+            holds = holds.filter(user=user)
+
+        now = timezone.now()
+        if not holds.filter(status=PointsHold.STATUS_HELD).update(status=status, settled_at=now):
+            current = holds.values_list('status', flat=True).first()
+            if current is None:
+                raise ValueError("积分预留不存在")
+            raise ValueError(f"积分预留已结束，当前状态: {current}")
+        return holds.get()
+
+    @staticmethod
+    def commit(hold_id, actual_points, tenant=None, user=None, created_by=None):
+        """
+        按实际用量结算预留
+
+        实际用量小于预留时退回差额，大于预留时超出部分从可用余额扣除
+
+        Args:
+            hold_id: 预留ID
+            actual_points: 实际消耗的积分
+            tenant: 租户对象，指定时校验预留属于该租户
+            user: 用户对象，指定时校验预留属于该用户
+            created_by: 创建者
+
+        Returns:
+            tuple: (PointsHold, PointsTransaction, int)，预留记录、交易记录（实际用量为0时为None）和结算后的可用余额
+
+        Raises:
+            ValueError: 预留不存在、已结束或超出部分积分不足
+        """
+        if actual_points < 0:
+            raise ValueError("结算的积分不能为负数")
+
+        try:
+            with transaction.atomic():
+                hold = PointsHoldService._settle(hold_id, PointsHold.STATUS_COMMITTED, tenant, user)
+
+                # 退回差额，差额为负数时表示超出预留，需要余额足够
+                refund = hold.points - actual_points
+                accounts = UserPoints.objects.filter(pk=hold.user_points_id)
+                if refund < 0:
+                    accounts = accounts.filter(balance__gte=-refund)
+                updated = accounts.update(
+                    balance=F('balance') + refund,
+                    held_balance=F('held_balance') - hold.points,
+                    total_spent=F('total_spent') + actual_points,
+                    updated_at=timezone.now()
+                )
+                if not updated:
+                    raise ValueError(f"积分余额不足，超出预留: {-refund}")
+                PointsLot.consume({hold.user_points_id: actual_points})
+
+                balance = UserPoints.objects.filter(pk=hold.user_points_id).values_list('balance', flat=True).get()
+
+                points_transaction = None
+                if actual_points:
+                    points_transaction = PointsTransaction.objects.create(
+                        tenant_id=hold.tenant_id,
+                        user_id=hold.user_id,
+                        user_points_id=hold.user_points_id,
+                        points=-actual_points,  # 负数表示支出
+                        balance_after=balance,
+                        transaction_type=PointsTransaction.TYPE_SPEND,
+                        source=hold.source,
+                        description=hold.description,
+                        metadata={'hold_id': str(hold.id), **hold.metadata},
+                        created_by=created_by
+                    )
+
+                hold.committed_points = actual_points
+                hold.transaction = points_transaction
+                hold.save(update_fields=['committed_points', 'transaction'])
+
+                # 退回的差额中预留期间到期的积分立即过期
+                if refund > 0 and PointsExpirationService.expire_accounts([hold.user_points_id])['points']:
+                    balance = UserPoints.objects.filter(pk=hold.user_points_id).values_list('balance', flat=True).get()
+
+            logger.info(f"结算积分预留: hold_id={hold.id}, reserved={hold.points}, actual={actual_points}")
+            return hold, points_transaction, balance
+
+        except ValueError as e:
+            logger.warning(f"结算积分预留失败: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"结算积分预留失败: {str(e)}", exc_info=True)
+            raise
+
+    @staticmethod
+    def release(hold_id, tenant=None, user=None):
+        """
+        释放预留，预留的积分全部退回可用余额
+
+        Args:
+            hold_id: 预留ID
+            tenant: 租户对象，指定时校验预留属于该租户
+            user: 用户对象，指定时校验预留属于该用户
+
+        Returns:
+            tuple: (PointsHold, int)，预留记录和释放后的可用余额
+
+        Raises:
+            ValueError: 预留不存在或已结束
+        """
+        try:
+            with transaction.atomic():
+                hold = PointsHoldService._settle(hold_id, PointsHold.STATUS_RELEASED, tenant, user)
+                UserPoints.objects.filter(pk=hold.user_points_id).update(
+                    balance=F('balance') + hold.points,
+                    held_balance=F('held_balance') - hold.points,
+                    updated_at=timezone.now()
+                )
+                # 预留期间到期的积分退回后立即过期
+                PointsExpirationService.expire_accounts([hold.user_points_id])
+                balance = UserPoints.objects.filter(pk=hold.user_points_id).values_list('balance', flat=True).get()
+
+            logger.info(f"释放积分预留: hold_id={hold.id}, points={hold.points}")
+            return hold, balance
+
+        except ValueError as e:
+            logger.warning(f"释放积分预留失败: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"释放积分预留失败: {str(e)}", exc_info=True)
+            raise
+
+    @staticmethod
+    def release_expired_holds(batch_size=None, now=None):
+        """
+        批量释放过期的预留
+
+        每批锁定一组过期预留，一条UPDATE切换状态，再按账户汇总后用一条UPDATE退回积分；
+        支持SKIP LOCKED的数据库上多个worker可以并发执行
+
+        Args:
+            batch_size: 每批处理的预留数量
+            now: 当前时间
+
+        Returns:
+            int: 释放的预留数量
+        """
+        batch_size = batch_size or getattr(settings, 'POINTS_HOLD_SWEEP_BATCH_SIZE', 500)
+        now = now or timezone.now()
+        released = 0
+
+        while True:
+            with transaction.atomic():
+                expired = PointsHold.objects.filter(
+                    status=PointsHold.STATUS_HELD,
+                    expires_at__lte=now
+                ).order_by('expires_at')
+                if connection.features.has_select_for_update_skip_locked:
+                    expired = expired.select_for_update(skip_locked=True)
+                else:
+                    expired = expired.select_for_update()
+                hold_ids = list(expired.values_list('id', flat=True)[:batch_size])
+                if not hold_ids:
+                    break
+
+                holds = PointsHold.objects.filter(id__in=hold_ids, status=PointsHold.STATUS_HELD)
+                amounts = dict(
+                    holds.values('user_points_id').annotate(total=Sum('points')).values_list('user_points_id', 'total')
+                )
+                holds.update(status=PointsHold.STATUS_EXPIRED, settled_at=timezone.now())
+
+                refund = Case(
+                    *[When(pk=account_id, then=Value(total)) for account_id, total in amounts.items()],
+                    output_field=IntegerField()
+                )
+                UserPoints.objects.filter(pk__in=amounts).update(
+                    balance=F('balance') + refund,
+                    held_balance=F('held_balance') - refund,
+                    updated_at=timezone.now()
+                )
+                # 预留期间到期的积分退回后立即过期
+                PointsExpirationService.expire_accounts(list(amounts))
+
+            released += len(hold_ids)
+            if len(hold_ids) < batch_size:
+                break
+
+        if released:
+            logger.info(f"释放过期积分预留: {released} 笔")
+        return released
@@ -3,11 +3,16 @@
 实现积分相关的业务逻辑
 """
 
+import json
+import base64
 import logging
+from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
 
-from apps.billing_service.models import UserPoints, PointsTransaction, Order
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsLot, Order
 from apps.billing_service.services.payment_service import PaymentService
 
 logger = logging.getLogger('billing_service')
@@ -50,7 +55,7 @@ class PointsService:
             raise
     
     @staticmethod
-    def add_points(tenant, user, points, reason=None, source=None, transaction_type=None, created_by=None):
+    def add_points(tenant, user, points, reason=None, source=None, transaction_type=None, created_by=None, expires_at=None):
         """
         为用户添加积分
         
@@ -62,6 +67,7 @@ class PointsService:
             source: 积分来源
             transaction_type: 交易类型
             created_by: 创建者
+            expires_at: 积分过期时间，为空时使用默认有效期
             
         Returns:
             tuple: (UserPoints, PointsTransaction)，用户积分账户对象和积分交易记录对象
@@ -75,26 +81,149 @@ class PointsService:
                 user_points = PointsService.get_user_points(tenant, user)
                 
                 # 添加积分
-                transaction = user_points.add_points(
+                points_transaction = user_points.add_points(
                     points=points,
                     reason=reason,
                     source=source,
-                    transaction_type=transaction_type or PointsTransaction.TYPE_EARN
+                    transaction_type=transaction_type or PointsTransaction.TYPE_EARN,
+                    expires_at=expires_at
                 )
                 
                 # 设置创建者
                 if created_by:
-                    transaction.created_by = created_by
-                    transaction.save()
+                    points_transaction.created_by = created_by
+                    points_transaction.save(update_fields=['created_by'])
                 
-                logger.info(f"添加积分: user_id={user.id}, points={points}, source={source}, transaction_id={transaction.id}")
+                logger.info(f"添加积分: user_id={user.id}, points={points}, source={source}, transaction_id={points_transaction.id}")
                 
-                return user_points, transaction
+                return user_points, points_transaction
                 
         except Exception as e:
             logger.error(f"添加积分失败: {str(e)}", exc_info=True)
             raise
     
+    @staticmethod
+    def bulk_add_points(tenant, grants, reason=None, source=None, transaction_type=None, created_by=None,
+                        expires_at=None):
+        """
+        批量为用户添加积分（活动发放、奖励等）
+        
+        按批次处理，每批在一个事务内：批量创建缺失的积分账户，一条UPDATE增加所有账户余额，
+        批量插入交易记录和积分批次；同一用户的多条发放合并为一笔
+        
+        Args:
+            tenant: 租户对象
+            grants: (用户ID, 积分数量)列表，积分数量为正整数
+            reason: 添加原因
+            source: 积分来源
+            transaction_type: 交易类型
+            created_by: 创建者
+            expires_at: 积分过期时间，为空时使用默认有效期
+            
+        Returns:
+            dict: 发放结果，包含发放用户数、发放积分总数和被拒绝的用户
+            
+        Raises:
+            ValueError: 积分数量无效
+        """
+        from apps.tenant_service.models import TenantUser
+        
+        batch_size = getattr(settings, 'POINTS_BULK_BATCH_SIZE', 1000)
+        transaction_type = transaction_type or PointsTransaction.TYPE_EARN
+        expires_at = expires_at or PointsLot.default_expires_at()
+        
+        try:
+            amounts = {}
+            for user_id, points in grants:
+                if points <= 0:
+                    raise ValueError(f"添加的积分必须为正数: user_id={user_id}")
+                amounts[user_id] = amounts.get(user_id, 0) + points
+                
+            user_ids = list(amounts)
+            granted_users = 0
+            granted_points = 0
+            rejected = []
+            
+            for start in range(0, len(user_ids), batch_size):
+                chunk = user_ids[start:start + batch_size]
+                member_ids = set(
+                    TenantUser.objects.filter(
+                        tenant=tenant,
+                        user_id__in=chunk,
+                        is_active=True
+                    ).values_list('user_id', flat=True)
+                )
+                rejected.extend(user_id for user_id in chunk if user_id not in member_ids)
+                chunk = [user_id for user_id in chunk if user_id in member_ids]
+                if not chunk:
+                    continue
+                    
+                with transaction.atomic():
+                    # 缺失的积分账户由唯一约束去重，已存在的账户不受影响
+                    UserPoints.objects.bulk_create(
+                        [UserPoints(tenant=tenant, user_id=user_id) for user_id in chunk],
+                        ignore_conflicts=True
+                    )
+                    
+                    increment = Case(
+                        *[When(user_id=user_id, then=Value(amounts[user_id])) for user_id in chunk],
+                        output_field=IntegerField()
+                    )
+                    accounts = UserPoints.objects.filter(tenant=tenant, user_id__in=chunk)
+                    accounts.update(
+                        balance=F('balance') + increment,
+                        total_earned=F('total_earned') + increment,
+                        updated_at=timezone.now()
+                    )
+                    
+                    transactions = PointsTransaction.objects.bulk_create([
+                        PointsTransaction(
+                            tenant=tenant,
+                            user_id=user_id,
+                            user_points_id=account_id,
+                            points=amounts[user_id],
+                            balance_after=balance,
+                            transaction_type=transaction_type,
+                            source=source,
+                            description=reason,
+                            created_by=created_by
+                        )
+                        for account_id, user_id, balance in accounts.values_list('id', 'user_id', 'balance')
+                    ])
+                    PointsLot.objects.bulk_create([
+                        PointsLot(
+                            tenant=tenant,
+                            user_id=points_transaction.user_id,
+                            user_points_id=points_transaction.user_points_id,
+                            transaction=points_transaction,
+                            points=points_transaction.points,
+                            remaining=points_transaction.points,
+                            expires_at=expires_at
+                        )
+                        for points_transaction in transactions
+                    ])
+                    
+                granted_users += len(chunk)
+                granted_points += sum(amounts[user_id] for user_id in chunk)
+                
+            logger.info(
+                f"批量添加积分: tenant_id={tenant.id}, users={granted_users}, "
+                f"points={granted_points}, rejected={len(rejected)}, source={source}"
+            )
+            
+            return {
+                'users': granted_users,
+                'points': granted_points,
+                'rejected': rejected,
+            }
+            
+        except ValueError as e:
+            logger.warning(f"批量添加积分失败: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"批量添加积分失败: {str(e)}", exc_info=True)
+            raise
+    
     @staticmethod
     def deduct_points(tenant, user, points, reason=None, source=None, transaction_type=None, created_by=None):
         """
@@ -123,26 +252,26 @@ class PointsService:
                 # 获取用户积分账户
                 user_points = PointsService.get_user_points(tenant, user)
                 
-                # 检查积分是否足够
-                if user_points.balance < points:
+                # 扣除积分，余额是否足够由条件UPDATE原子判断
+                try:
+                    points_transaction = user_points.deduct_points(
+                        points=points,
+                        reason=reason,
+                        source=source,
+                        transaction_type=transaction_type or PointsTransaction.TYPE_SPEND
+                    )
+                except ValueError:
+                    user_points.refresh_from_db(fields=['balance'])
                     raise ValueError(f"积分余额不足，当前余额: {user_points.balance}, 需要扣除: {points}")
                 
-                # 扣除积分
-                transaction = user_points.deduct_points(
-                    points=points,
-                    reason=reason,
-                    source=source,
-                    transaction_type=transaction_type or PointsTransaction.TYPE_SPEND
-                )
-                
                 # 设置创建者
                 if created_by:
-                    transaction.created_by = created_by
-                    transaction.save()
+                    points_transaction.created_by = created_by
+                    points_transaction.save(update_fields=['created_by'])
                 
-                logger.info(f"扣除积分: user_id={user.id}, points={points}, source={source}, transaction_id={transaction.id}")
+                logger.info(f"扣除积分: user_id={user.id}, points={points}, source={source}, transaction_id={points_transaction.id}")
                 
-                return user_points, transaction
+                return user_points, points_transaction
                 
         except ValueError as e:
             logger.warning(f"扣除积分失败: {str(e)}")
@@ -223,8 +352,8 @@ class PointsService:
             if end_date:
                 filters['created_at__lte'] = end_date
                 
-            # 查询交易记录
-            transactions = PointsTransaction.objects.filter(**filters).order_by('-created_at')
+            # 查询交易记录，按(created_at, id)排序保证顺序稳定
+            transactions = PointsTransaction.objects.filter(**filters).order_by('-created_at', '-id')
             
             return transactions
             
@@ -232,6 +361,123 @@ class PointsService:
             logger.error(f"获取用户积分交易记录失败: {str(e)}", exc_info=True)
             raise
     
+    @staticmethod
+    def encode_cursor(points_transaction, direction='next'):
+        """
+        根据交易记录生成不透明游标
+        
+        Args:
+            points_transaction: 积分交易记录
+            direction: 翻页方向(next/prev)
+            
+        Returns:
+            str: 游标字符串
+        """
+        payload = json.dumps({
+            'ts': points_transaction.created_at.isoformat(),
+            'id': str(points_transaction.id),
+            'd': direction
+        }, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        解析游标
+        
+        Args:
+            cursor: 游标字符串
+            
+        Returns:
+            tuple: (创建时间, 交易记录ID, 翻页方向)
+            
+        Raises:
+            ValueError: 游标格式无效
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = datetime.fromisoformat(payload['ts'])
+            transaction_id = payload['id']
+            direction = payload.get('d', 'next')
+        except (ValueError, TypeError, KeyError, UnicodeError) as e:
+            raise ValueError(f"无效的游标: {cursor}") from e
+            
+        if direction not in ('next', 'prev'):
+            raise ValueError(f"无效的游标方向: {direction}")
+            
+        return created_at, transaction_id, direction
+    
+    @staticmethod
+    def get_user_points_transactions_by_cursor(tenant, user, transaction_type=None, start_date=None,
+                                               end_date=None, cursor=None, page_size=20):
+        """
+        基于游标获取用户积分交易记录
+        
+        按(created_at, id)倒序进行键集分页，使用(tenant, user, created_at, id)索引定位，
+        翻页代价与历史记录数量和页码深度无关，不执行COUNT
+        
+        Args:
+            tenant: 租户对象
+            user: 用户对象
+            transaction_type: 交易类型
+            start_date: 开始日期
+            end_date: 结束日期
+            cursor: 游标，为空时返回第一页
+            page_size: 每页大小
+            
+        Returns:
+            tuple: (交易记录列表, 下一页游标, 上一页游标)
+            
+        Raises:
+            ValueError: 游标格式无效
+        """
+        transactions = PointsService.get_user_points_transactions(
+            tenant=tenant,
+            user=user,
+            transaction_type=transaction_type,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
+        # 解析游标，向前翻页时反转排序方向
+        direction = 'next'
+        if cursor:
+            cursor_created_at, cursor_id, direction = PointsService.decode_cursor(cursor)
+            if direction == 'next':
+                transactions = transactions.filter(
+                    Q(created_at__lt=cursor_created_at) |
+                    Q(created_at=cursor_created_at, id__lt=cursor_id)
+                )
+            else:
+                transactions = transactions.filter(
+                    Q(created_at__gt=cursor_created_at) |
+                    Q(created_at=cursor_created_at, id__gt=cursor_id)
+                ).order_by('created_at', 'id')
+                
+        # 多取一条用于判断是否还有更多数据
+        transactions = list(transactions[:page_size + 1])
+        has_more = len(transactions) > page_size
+        transactions = transactions[:page_size]
+        
+        if direction == 'prev':
+            transactions.reverse()
+            
+        next_cursor = None
+        prev_cursor = None
+        if transactions:
+            if direction == 'next':
+                if has_more:
+                    next_cursor = PointsService.encode_cursor(transactions[-1], 'next')
+                if cursor:
+                    prev_cursor = PointsService.encode_cursor(transactions[0], 'prev')
+            else:
+                next_cursor = PointsService.encode_cursor(transactions[-1], 'next')
+                if has_more:
+                    prev_cursor = PointsService.encode_cursor(transactions[0], 'prev')
+                    
+        return transactions, next_cursor, prev_cursor
+    
     @staticmethod
     def adjust_points(tenant, user, points_change, reason, created_by=None):
         """
@@ -254,37 +500,36 @@ class PointsService:
                 
                 if points_change > 0:
                     # 增加积分
-                    transaction = user_points.add_points(
+                    points_transaction = user_points.add_points(
                         points=points_change,
                         reason=reason,
                         source='admin_adjustment',
                         transaction_type=PointsTransaction.TYPE_ADJUST
                     )
                 elif points_change < 0:
-                    # 减少积分
-                    # 检查积分是否足够
-                    if user_points.balance < abs(points_change):
+                    # 减少积分，余额是否足够由条件UPDATE原子判断
+                    try:
+                        points_transaction = user_points.deduct_points(
+                            points=abs(points_change),
+                            reason=reason,
+                            source='admin_adjustment',
+                            transaction_type=PointsTransaction.TYPE_ADJUST
+                        )
+                    except ValueError:
+                        user_points.refresh_from_db(fields=['balance'])
                         raise ValueError(f"积分余额不足，当前余额: {user_points.balance}, 需要扣除: {abs(points_change)}")
-                    
-                    # 扣除积分
-                    transaction = user_points.deduct_points(
-                        points=abs(points_change),
-                        reason=reason,
-                        source='admin_adjustment',
-                        transaction_type=PointsTransaction.TYPE_ADJUST
-                    )
                 else:
                     # 积分变动为0，无需操作
                     return user_points, None
                 
                 # 设置创建者
                 if created_by:
-                    transaction.created_by = created_by
-                    transaction.save()
+                    points_transaction.created_by = created_by
+                    points_transaction.save(update_fields=['created_by'])
                 
-                logger.info(f"调整积分: user_id={user.id}, points_change={points_change}, reason={reason}, transaction_id={transaction.id}")
+                logger.info(f"调整积分: user_id={user.id}, points_change={points_change}, reason={reason}, transaction_id={points_transaction.id}")
                 
-                return user_points, transaction
+                return user_points, points_transaction
                 
         except ValueError as e:
             logger.warning(f"调整积分失败: {str(e)}")
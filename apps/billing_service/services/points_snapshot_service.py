@@ -0,0 +1,208 @@
+"""
+积分余额快照服务
+实现积分余额快照的生成，以及基于快照的历史余额和区间汇总查询
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from apps.billing_service.models import UserPoints, PointsTransaction, PointsBalanceSnapshot
+
+logger = logging.getLogger('billing_service')
+
+
+class PointsSnapshotService:
+    """
+    积分余额快照服务类
+
+    快照记录截至某一时间点的余额、累计收入、累计支出和交易笔数；
+    查询任意时间点时从不晚于该时间的最近快照开始，只聚合快照之后的少量交易
+    """
+
+    @staticmethod
+    def _aggregates():
+        """交易记录的收入、支出和笔数聚合表达式"""
+        return {
+            'credits': Sum(Case(
+                When(points__gt=0, then=F('points')),
+                default=Value(0),
+                output_field=IntegerField()
+            )),
+            'debits': Sum(Case(
+                When(points__lt=0, then=-F('points')),
+                default=Value(0),
+                output_field=IntegerField()
+            )),
+            'count': Count('id'),
+        }
+
+    @staticmethod
+    def create_snapshots(cutoff=None, batch_size=None):
+        """
+        为上次快照之后有交易的账户生成快照
+
+        快照时间比当前时间滞后POINTS_SNAPSHOT_LAG秒，避免遗漏尚未提交的交易；
+        上次快照之后的交易按账户分批用一条GROUP BY汇总，与各账户最近一次快照的累计值相加后批量写入，
+        没有新交易的账户沿用原快照
+
+        Args:
+            cutoff: 快照时间，为空时为当前时间减去滞后时间
+            batch_size: 每批处理的账户数量
+
+        Returns:
+            int: 生成的快照数量
+        """
+        batch_size = batch_size or getattr(settings, 'POINTS_SNAPSHOT_BATCH_SIZE', 1000)
+        cutoff = cutoff or timezone.now() - timedelta(seconds=getattr(settings, 'POINTS_SNAPSHOT_LAG', 300))
+
+        since = PointsBalanceSnapshot.objects.aggregate(latest=Max('as_of'))['latest']
+        if since and since >= cutoff:
+            return 0
+
+        window = PointsTransaction.objects.filter(created_at__lte=cutoff)
+        if since:
+            window = window.filter(created_at__gt=since)
+
+        latest_snapshot = PointsBalanceSnapshot.objects.filter(
+            user_points_id=OuterRef('user_points_id')
+        ).order_by('-as_of').values('as_of')[:1]
+        last_balance = PointsTransaction.objects.filter(
+            tenant_id=OuterRef('tenant_id'),
+            user_id=OuterRef('user_id'),
+            created_at__lte=cutoff
+        ).order_by('-created_at', '-id').values('balance_after')[:1]
+
+        created = 0
+        last_account_id = None
+        while True:
+            candidates = window.order_by('user_points_id')
+            if last_account_id is not None:
+                candidates = candidates.filter(user_points_id__gt=last_account_id)
+            account_ids = list(candidates.values_list('user_points_id', flat=True).distinct()[:batch_size])
+            if not account_ids:
+                break
+            last_account_id = account_ids[-1]
+
+            deltas = {
+                row['user_points_id']: row
+                for row in window.filter(user_points_id__in=account_ids).values('user_points_id').annotate(
+                    **PointsSnapshotService._aggregates()
+                )
+            }
+            previous = {
+                account_id: (credits, debits, count)
+                for account_id, credits, debits, count in PointsBalanceSnapshot.objects.filter(
+                    user_points_id__in=account_ids,
+                    as_of=Subquery(latest_snapshot)
+                ).values_list('user_points_id', 'total_credits', 'total_debits', 'transaction_count')
+            }
+            accounts = UserPoints.objects.filter(pk__in=account_ids).annotate(
+                last_balance=Subquery(last_balance)
+            ).values_list('id', 'tenant_id', 'user_id', 'last_balance')
+
+            snapshots = []
+            for account_id, tenant_id, user_id, balance in accounts:
+                delta = deltas[account_id]
+                credits, debits, count = previous.get(account_id, (0, 0, 0))
+                snapshots.append(PointsBalanceSnapshot(
+                    tenant_id=tenant_id,
+                    user_id=user_id,
+                    user_points_id=account_id,
+                    as_of=cutoff,
+                    balance=balance or 0,
+                    total_credits=credits + delta['credits'],
+                    total_debits=debits + delta['debits'],
+                    transaction_count=count + delta['count']
+                ))
+            PointsBalanceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+            created += len(snapshots)
+
+        if created:
+            logger.info(f"生成积分余额快照: {created} 个账户, as_of={cutoff.isoformat()}")
+        return created
+
+    @staticmethod
+    def _get_snapshot(tenant, user, at):
+        """获取不晚于指定时间的最近快照"""
+        return PointsBalanceSnapshot.objects.filter(
+            tenant=tenant,
+            user=user,
+            as_of__lte=at
+        ).order_by('-as_of').first()
+
+    @staticmethod
+    def _get_state(tenant, user, at):
+        """
+        计算截至指定时间的余额和累计收支
+
+        Returns:
+            dict: 包含balance、credits、debits、count
+        """
+        snapshot = PointsSnapshotService._get_snapshot(tenant, user, at)
+        transactions = PointsTransaction.objects.filter(tenant=tenant, user=user, created_at__lte=at)
+        if snapshot:
+            transactions = transactions.filter(created_at__gt=snapshot.as_of)
+
+        state = {
+            key: value or 0
+            for key, value in transactions.aggregate(**PointsSnapshotService._aggregates()).items()
+        }
+        balance = transactions.order_by('-created_at', '-id').values_list('balance_after', flat=True).first()
+        if snapshot:
+            state['credits'] += snapshot.total_credits
+            state['debits'] += snapshot.total_debits
+            state['count'] += snapshot.transaction_count
+            if balance is None:
+                balance = snapshot.balance
+        state['balance'] = balance or 0
+        return state
+
+    @staticmethod
+    def get_balance_at(tenant, user, at):
+        """
+        获取用户在指定时间的积分余额
+
+        Args:
+            tenant: 租户对象
+            user: 用户对象
+            at: 时间点
+
+        Returns:
+            int: 该时间点最后一笔交易后的余额
+        """
+        return PointsSnapshotService._get_state(tenant, user, at)['balance']
+
+    @staticmethod
+    def get_period_summary(tenant, user, start, end):
+        """
+        获取用户在时间区间(start, end]内的积分汇总
+
+        Args:
+            tenant: 租户对象
+            user: 用户对象
+            start: 开始时间
+            end: 结束时间
+
+        Returns:
+            dict: 期初余额、期末余额、收入、支出和交易笔数
+
+        Raises:
+            ValueError: 时间区间无效
+        """
+        if start > end:
+            raise ValueError("开始时间不能晚于结束时间")
+
+        opening = PointsSnapshotService._get_state(tenant, user, start)
+        closing = PointsSnapshotService._get_state(tenant, user, end)
+        return {
+            'start': start,
+            'end': end,
+            'opening_balance': opening['balance'],
+            'closing_balance': closing['balance'],
+            'credits': closing['credits'] - opening['credits'],
+            'debits': closing['debits'] - opening['debits'],
+            'transaction_count': closing['count'] - opening['count'],
+        }
@@ -0,0 +1,201 @@
+"""
+订阅自动续订服务
+实现即将到期订阅的批量续订
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.billing_service.models import Subscription, SubscriptionPlan, Order
+from apps.billing_service.services.payment_service import PaymentService
+from apps.billing_service.utils.payment_utils import generate_order_number
+
+logger = logging.getLogger('billing_service')
+
+
+class SubscriptionRenewalService:
+    """
+    订阅自动续订服务类
+
+    每批锁定一组当前周期即将结束的自动续订订阅，在一个事务内批量创建续订订单，
+    并用一条UPDATE记录已发起续订的周期；已发起续订的周期不会被再次选中，
+    每个周期只续订一次，中断后重新执行只处理尚未提交的批次；
+    订阅在当前周期结束前保持原状态，续订订单支付成功后才进入新周期，
+    未支付的订阅在当前周期结束后由过期处理标记为已过期
+    """
+
+    # 订单编号冲突时单批的最大重试次数
+    MAX_BATCH_RETRIES = 3
+
+    @staticmethod
+    def renew_due_subscriptions(now=None, window=None, batch_size=None):
+        """
+        批量续订当前周期即将结束的订阅
+
+        续订订单支付成功后由支付信号推进订阅的计费周期；每批提交后异步发起续订订单的支付
+
+        Args:
+            now: 当前时间
+            window: 续订窗口（秒），当前周期在该时间内结束的订阅会被续订
+            batch_size: 每批处理的订阅数量
+
+        Returns:
+            dict: 续订结果，包含续订数量和批次数
+        """
+        now = now or timezone.now()
+        window = window or getattr(settings, 'SUBSCRIPTION_RENEWAL_WINDOW', 3600)
+        batch_size = batch_size or getattr(settings, 'SUBSCRIPTION_RENEWAL_BATCH_SIZE', 500)
+        plan_names = {}
+        renewed = 0
+        batches = 0
+        retries = 0
+
+        while True:
+            try:
+                with transaction.atomic():
+                    count = SubscriptionRenewalService._renew_batch(
+                        now + timedelta(seconds=window), batch_size, plan_names
+                    )
+            except IntegrityError as e:
+                # 订单编号冲突时整批回滚，重新生成订单编号后重试
+                retries += 1
+                if retries > SubscriptionRenewalService.MAX_BATCH_RETRIES:
+                    logger.error(f"批量续订订阅失败: {str(e)}", exc_info=True)
+                    raise
+                logger.warning(f"续订订单写入冲突，重试本批: {str(e)}")
+                continue
+
+            if not count:
+                break
+            renewed += count
+            batches += 1
+            retries = 0
+            if count < batch_size:
+                break
+
+        if renewed:
+            logger.info(f"批量续订订阅: count={renewed}, batches={batches}")
+        return {'renewed': renewed, 'batches': batches}
+
+    @staticmethod
+    def _renew_batch(due_before, batch_size, plan_names):
+        """
+        在当前事务内续订一批订阅
+
+        Args:
+            due_before: 当前周期在该时间之前结束的订阅需要续订
+            batch_size: 批次大小
+            plan_names: 订阅计划名称缓存，原地更新
+
+        Returns:
+            int: 续订的订阅数量
+        """
+        due = Subscription.objects.filter(
+            auto_renew=True,
+            status__in=[Subscription.STATUS_ACTIVE, Subscription.STATUS_PAST_DUE],
+            current_period_end__lte=due_before
+        ).filter(
+            Q(renewal_requested_for__isnull=True) | ~Q(renewal_requested_for=F('current_period_end'))
+        ).order_by('current_period_end')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        else:
+            due = due.select_for_update()
+        subscriptions = list(due.values(
+            'id', 'tenant_id', 'user_id', 'plan_id', 'billing_cycle',
+            'price', 'currency', 'current_period_end', 'metadata'
+        )[:batch_size])
+        if not subscriptions:
+            return 0
+
+        missing_plans = {subscription['plan_id'] for subscription in subscriptions} - set(plan_names)
+        if missing_plans:
+            plan_names.update(SubscriptionPlan.objects.filter(id__in=missing_plans).values_list('id', 'name'))
+
+        now = timezone.now()
+        cycle_names = dict(Subscription.BILLING_CYCLE_CHOICES)
+        orders = []
+        for subscription in subscriptions:
+            period_start = subscription['current_period_end']
+
+            title = f"{plan_names.get(subscription['plan_id'], '')} {cycle_names.get(subscription['billing_cycle'])}续订"
+            callback_data = {
+                'subscription_id': str(subscription['id']),
+                'renewal_period_start': period_start.isoformat(),
+            }
+            payment_method = (subscription['metadata'] or {}).get('payment_method')
+            if payment_method:
+                callback_data['payment_method'] = payment_method
+
+            # bulk_create不调用save，订单编号和过期时间需要显式设置
+            orders.append(Order(
+                tenant_id=subscription['tenant_id'],
+                user_id=subscription['user_id'],
+                order_number=generate_order_number(),
+                order_type=Order.TYPE_SUBSCRIPTION,
+                amount=subscription['price'],
+                currency=subscription['currency'],
+                title=title,
+                description=title,
+                callback_data=callback_data,
+                created_by_id=subscription['user_id'],
+                expires_at=now + timedelta(hours=24)
+            ))
+        Order.objects.bulk_create(orders)
+
+        # 订阅状态和计费周期保持不变，用户在已支付的周期内保留权益
+        Subscription.objects.filter(id__in=[subscription['id'] for subscription in subscriptions]).update(
+            renewal_requested_for=F('current_period_end'),
+            updated_at=now
+        )
+
+        order_ids = [str(order.id) for order in orders]
+        transaction.on_commit(lambda: SubscriptionRenewalService._enqueue_payments(order_ids))
+        return len(subscriptions)
+
+    @staticmethod
+    def _enqueue_payments(order_ids):
+        """异步发起续订订单的支付"""
+        from apps.billing_service.tasks import attempt_renewal_payments
+
+        try:
+            attempt_renewal_payments.delay(order_ids)
+        except Exception as e:
+            logger.error(f"提交续订支付任务失败: {str(e)}", exc_info=True)
+
+    @staticmethod
+    def attempt_payments(order_ids):
+        """
+        为续订订单发起支付
+
+        支付方式取自订阅元数据payment_method，未设置时使用SUBSCRIPTION_RENEWAL_PAYMENT_METHOD；
+        单个订单失败不影响其他订单
+
+        Args:
+            order_ids: 订单ID列表
+
+        Returns:
+            dict: 发起结果，包含成功和失败数量
+        """
+        default_method = getattr(settings, 'SUBSCRIPTION_RENEWAL_PAYMENT_METHOD', 'alipay')
+        succeeded = 0
+        failed = 0
+
+        orders = Order.objects.filter(
+            id__in=order_ids,
+            status=Order.STATUS_PENDING
+        ).select_related('tenant', 'user')
+        for order in orders:
+            try:
+                PaymentService.create_payment(order, order.callback_data.get('payment_method') or default_method)
+                succeeded += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"发起续订支付失败: order_id={order.id}, {str(e)}")
+
+        logger.info(f"发起续订支付: succeeded={succeeded}, failed={failed}")
+        return {'succeeded': succeeded, 'failed': failed}
@@ -3,9 +3,12 @@
 实现订阅相关的业务逻辑
 """
 
+import time
 import logging
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection, transaction
 
 from apps.billing_service.models import Subscription, SubscriptionPlan, Order
 from apps.billing_service.services.payment_service import PaymentService
@@ -275,39 +278,115 @@ class SubscriptionService:
             logger.error(f"更换订阅计划失败: {str(e)}", exc_info=True)
             raise
     
+    # 到期后需要标记为已过期的订阅状态
+    EXPIRABLE_STATUSES = [
+        Subscription.STATUS_ACTIVE,
+        Subscription.STATUS_TRIAL,
+        Subscription.STATUS_PAST_DUE,
+        Subscription.STATUS_UNPAID
+    ]
+    
+    # 最近一次过期处理的统计信息缓存键
+    EXPIRY_STATS_CACHE_KEY = 'billing_service:subscription_expiry:last_run'
+    
     @staticmethod
-    def check_expired_subscriptions():
+    def expire_subscriptions(now=None, batch_size=None):
         """
-        检查过期的订阅
+        批量将到期的订阅标记为已过期
         
-        将过期但状态不是已过期的订阅标记为已过期
+        每批锁定一组到期订阅，用一条UPDATE切换状态，不逐条save，也不触发pre_save信号；
+        每批提交后发送一次subscriptions_expired信号，由接收方批量处理缓存失效和通知；
+        支持SKIP LOCKED的数据库上多个worker可以并发执行
+        
+        Args:
+            now: 当前时间
+            batch_size: 每批处理的订阅数量
+            
+        Returns:
+            dict: 处理统计，包含过期数量、批次数和耗时（毫秒）
         """
+        from apps.billing_service.signals import subscriptions_expired
+        
+        batch_size = batch_size or getattr(settings, 'SUBSCRIPTION_EXPIRY_BATCH_SIZE', 500)
+        now = now or timezone.now()
+        started = time.monotonic()
+        expired = 0
+        batches = 0
+        
         try:
-            # 查找已过期但状态不是已过期的订阅
-            now = timezone.now()
-            expired_subscriptions = Subscription.objects.filter(
-                end_date__lt=now,
-                status__in=[
-                    Subscription.STATUS_ACTIVE, 
-                    Subscription.STATUS_TRIAL, 
-                    Subscription.STATUS_PAST_DUE
-                ]
-            )
-            
-            count = 0
-            for subscription in expired_subscriptions:
-                subscription.status = Subscription.STATUS_EXPIRED
-                subscription.save()
-                count += 1
-                
-            if count > 0:
-                logger.info(f"标记过期订阅: count={count}")
-                
-            return count
-            
+            while True:
+                with transaction.atomic():
+                    due = Subscription.objects.filter(
+                        end_date__lt=now,
+                        status__in=SubscriptionService.EXPIRABLE_STATUSES
+                    ).order_by('end_date')
+                    if connection.features.has_select_for_update_skip_locked:
+                        due = due.select_for_update(skip_locked=True)
+                    else:
+                        due = due.select_for_update()
+                    subscriptions = list(due.values('id', 'tenant_id', 'user_id', 'plan_id')[:batch_size])
+                    if not subscriptions:
+                        break
+                        
+                    Subscription.objects.filter(
+                        id__in=[subscription['id'] for subscription in subscriptions],
+                        end_date__lt=now,
+                        status__in=SubscriptionService.EXPIRABLE_STATUSES
+                    ).update(status=Subscription.STATUS_EXPIRED, updated_at=timezone.now())
+                    
+                # 事务提交后再通知接收方，接收方出错不影响已提交的批次
+                for handler, response in subscriptions_expired.send_robust(
+                    sender=Subscription,
+                    subscriptions=subscriptions,
+                    expired_at=now
+                ):
+                    if isinstance(response, Exception):
+                        logger.error(f"处理订阅过期事件失败: {handler.__name__}, {str(response)}")
+                        
+                expired += len(subscriptions)
+                batches += 1
+                if len(subscriptions) < batch_size:
+                    break
+                    
         except Exception as e:
-            logger.error(f"检查过期订阅失败: {str(e)}", exc_info=True)
+            logger.error(f"批量标记过期订阅失败: {str(e)}", exc_info=True)
             raise
+            
+        stats = {
+            'expired': expired,
+            'batches': batches,
+            'duration_ms': int((time.monotonic() - started) * 1000),
+            'finished_at': timezone.now().isoformat(),
+        }
+        cache.set(SubscriptionService.EXPIRY_STATS_CACHE_KEY, stats, None)
+        
+        if expired:
+            logger.info(
+                f"标记过期订阅: count={expired}, batches={batches}, duration_ms={stats['duration_ms']}"
+            )
+        return stats
+    
+    @staticmethod
+    def get_expiry_stats():
+        """
+        获取最近一次过期处理的统计信息
+        
+        Returns:
+            dict: 处理统计，尚未执行过时为None
+        """
+        return cache.get(SubscriptionService.EXPIRY_STATS_CACHE_KEY)
+    
+    @staticmethod
+    def check_expired_subscriptions():
+        """
+        检查过期的订阅
+        
+        将过期但状态不是已过期的订阅标记为已过期
+        
+        Returns:
+            int: 标记为已过期的订阅数量
+        """
+        return SubscriptionService.expire_subscriptions()['expired']
     
     @staticmethod
     def get_user_subscriptions(user, active_only=False):
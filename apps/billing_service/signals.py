@@ -3,14 +3,23 @@
 """
 
 import logging
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from apps.billing_service.models import Order, Payment, Subscription
+from apps.billing_service.models import Order, Payment, PaymentGatewayConfig, Subscription, SubscriptionPlan
 
 logger = logging.getLogger('billing_service')
 
+# 一批订阅被标记为已过期后发送，参数:
+#   subscriptions: 订阅列表，每项包含id、tenant_id、user_id、plan_id
+#   expired_at: 过期处理时间
+subscriptions_expired = Signal()
+
 
 @receiver(post_save, sender=Payment)
 def handle_payment_success(sender, instance, created, **kwargs):
@@ -31,9 +40,15 @@ def handle_payment_success(sender, instance, created, **kwargs):
                 subscription_id = instance.order.callback_data.get('subscription_id')
                 if subscription_id:
                     subscription = Subscription.objects.get(id=subscription_id)
+                    renewal_period_start = instance.order.callback_data.get('renewal_period_start')
+                    
+                    # 如果是自动续订订单，支付成功后进入新周期
+                    if renewal_period_start:
+                        if subscription.apply_renewal(parse_datetime(renewal_period_start)):
+                            logger.info(f"续订订阅: subscription_id={subscription.id}")
                     
                     # 如果是新订阅的首次支付
-                    if subscription.status == Subscription.STATUS_UNPAID:
+                    elif subscription.status == Subscription.STATUS_UNPAID:
                         subscription.status = Subscription.STATUS_ACTIVE
                         subscription.save()
                         logger.info(f"激活订阅: subscription_id={subscription.id}")
@@ -126,4 +141,76 @@ def handle_order_status_change(sender, instance, created, **kwargs):
         logger.info(f"新订单创建: order_id={instance.id}, order_number={instance.order_number}, type={instance.order_type}")
         return
         
-    # 订单状态变更的处理逻辑可以在这里添加 
\ No newline at end of file
+    # 订单状态变更的处理逻辑可以在这里添加 
+
+
+@receiver(subscriptions_expired)
+def notify_subscriptions_expired(sender, subscriptions, expired_at, **kwargs):
+    """
+    通知订阅已过期的用户
+    
+    按租户分组，每个租户批量创建一次通知；租户未配置对应的通知类型或模板时跳过
+    """
+    from apps.notification_service.models import NotificationType
+    from apps.notification_service.services import NotificationService
+    
+    notification_type_code = getattr(settings, 'SUBSCRIPTION_EXPIRED_NOTIFICATION_TYPE', 'billing.subscription_expired')
+    
+    user_ids = defaultdict(set)
+    for subscription in subscriptions:
+        user_ids[subscription['tenant_id']].add(subscription['user_id'])
+        
+    for tenant_id, tenant_user_ids in user_ids.items():
+        try:
+            NotificationService.create_notifications_bulk(
+                tenant_id=tenant_id,
+                user_ids=tenant_user_ids,
+                notification_type_code=notification_type_code,
+                data={'expired_at': expired_at.isoformat()}
+            )
+        except (NotificationType.DoesNotExist, ValueError) as e:
+            logger.debug(f"跳过订阅过期通知: tenant_id={tenant_id}, {str(e)}")
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidate_subscription_entitlements(sender, instance, **kwargs):
+    """
+    订阅变更后清除用户的权益缓存
+    """
+    from apps.billing_service.services.entitlement_service import EntitlementService
+    
+    pairs = [(instance.tenant_id, instance.user_id)]
+    transaction.on_commit(lambda: EntitlementService.invalidate_users(pairs))
+
+
+@receiver([post_save, post_delete], sender=SubscriptionPlan)
+def invalidate_plan_entitlements(sender, instance, **kwargs):
+    """
+    订阅计划变更后使租户的所有权益缓存失效
+    """
+    from apps.billing_service.services.entitlement_service import EntitlementService
+    
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: EntitlementService.invalidate_tenant(tenant_id))
+
+
+@receiver(subscriptions_expired)
+def invalidate_expired_entitlements(sender, subscriptions, **kwargs):
+    """
+    订阅批量过期后清除相关用户的权益缓存
+    """
+    from apps.billing_service.services.entitlement_service import EntitlementService
+    
+    EntitlementService.invalidate_users(
+        (subscription['tenant_id'], subscription['user_id']) for subscription in subscriptions
+    )
+
+
+@receiver(post_delete, sender=PaymentGatewayConfig)
+def remove_payment_gateway_client(sender, instance, **kwargs):
+    """
+    支付网关配置删除后移除已缓存的支付客户端
+    """
+    from apps.billing_service.utils.payment_utils import AlipayClientRegistry
+    
+    AlipayClientRegistry.invalidate(instance.id)
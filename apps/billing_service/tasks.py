@@ -0,0 +1,87 @@
+"""
+账单服务异步任务
+"""
+
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def release_expired_points_holds():
+    """
+    释放过期的积分预留
+
+    由Celery Beat定期触发，可由多个worker并发执行
+    """
+    from apps.billing_service.services.points_hold_service import PointsHoldService
+
+    PointsHoldService.release_expired_holds()
+
+
+@shared_task(ignore_result=True)
+def apply_usage_events():
+    """
+    按账户汇总结算待处理的用量事件
+
+    由Celery Beat每个结算窗口触发一次，可由多个worker并发执行
+    """
+    from apps.billing_service.services.metering_service import MeteringService
+
+    MeteringService.apply_pending_usage()
+
+
+@shared_task(ignore_result=True)
+def expire_points_lots():
+    """
+    过期到期的积分批次
+
+    由Celery Beat每天凌晨触发
+    """
+    from apps.billing_service.services.points_expiration_service import PointsExpirationService
+
+    PointsExpirationService.expire_points()
+
+
+@shared_task(ignore_result=True)
+def create_points_snapshots():
+    """
+    为有新交易的账户生成积分余额快照
+
+    由Celery Beat每天触发
+    """
+    from apps.billing_service.services.points_snapshot_service import PointsSnapshotService
+
+    PointsSnapshotService.create_snapshots()
+
+
+@shared_task(ignore_result=True)
+def expire_subscriptions():
+    """
+    批量将到期的订阅标记为已过期
+
+    由Celery Beat定期触发，可由多个worker并发执行
+    """
+    from apps.billing_service.services.subscription_service import SubscriptionService
+
+    SubscriptionService.expire_subscriptions()
+
+
+@shared_task(ignore_result=True)
+def renew_subscriptions():
+    """
+    批量续订当前周期即将结束的订阅
+
+    由Celery Beat定期触发，可由多个worker并发执行
+    """
+    from apps.billing_service.services.subscription_renewal_service import SubscriptionRenewalService
+
+    SubscriptionRenewalService.renew_due_subscriptions()
+
+
+@shared_task(ignore_result=True)
+def attempt_renewal_payments(order_ids):
+    """
+    为一批续订订单发起支付
+    """
+    from apps.billing_service.services.subscription_renewal_service import SubscriptionRenewalService
+
+    SubscriptionRenewalService.attempt_payments(order_ids)
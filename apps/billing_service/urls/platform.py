@@ -11,7 +11,8 @@ from apps.billing_service.views.platform import (
     SubscriptionViewSet, 
     SubscriptionPlanViewSet, 
     PointsViewSet, 
-    InvoiceViewSet
+    InvoiceViewSet,
+    EntitlementVerifyView
 )
 
 # 创建路由器
@@ -29,6 +30,9 @@ urlpatterns = [
     path('payments/alipay-notify/', PaymentViewSet.as_view({'post': 'alipay_notify'}), name='alipay-notify'),
     path('payments/wechat-notify/', PaymentViewSet.as_view({'post': 'wechat_notify'}), name='wechat-notify'),
     
+    # 订阅权益校验
+    path('entitlements/verify/', EntitlementVerifyView.as_view(), name='entitlement-verify'),
+    
     # 注册路由器URL
     path('', include(router.urls)),
 ]
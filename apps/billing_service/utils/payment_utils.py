@@ -6,6 +6,7 @@ import json
 import rsa
 import uuid
 import logging
+import threading
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
@@ -74,78 +75,150 @@ def format_public_key(public_key):
     return formatted_key
 
 
-def get_alipay_client():
+def read_key(key):
     """
-    获取支付宝客户端实例
+    读取密钥内容，支持直接配置密钥内容或密钥文件路径
     """
+    if key.startswith('-----BEGIN'):
+        return key
     try:
-        # 确保设置中存在ALIPAY_CONFIG配置
-        if not hasattr(settings, 'ALIPAY_CONFIG'):
-            logger.error("未找到ALIPAY_CONFIG设置")
-            raise ValueError("未找到ALIPAY_CONFIG设置")
-            
+        with open(key, encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        logger.error(f"读取密钥文件失败: {str(e)}")
+        raise
+
+
+class AlipayClientRegistry:
+    """
+    支付宝客户端注册表
+    
+    每个支付网关配置只构建一次客户端并在进程内复用，密钥文件读取、PEM格式化和校验只在构建时执行一次；
+    客户端按配置的更新时间标识版本，配置通过save修改后下次获取时自动重建；
+    未指定网关配置时使用settings.ALIPAY_CONFIG，网关配置的config中同名参数优先
+    """
+    
+    # 未指定网关配置时的注册表键
+    SETTINGS_KEY = 'settings'
+    
+    _clients = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _resolve(gateway_config):
+        """
+        获取网关配置对应的注册表键、版本和合并后的配置参数
+        
+        Returns:
+            tuple: (注册表键, 版本, 配置参数)
+        """
+        base_config = getattr(settings, 'ALIPAY_CONFIG', None)
+        if gateway_config is None:
+            if base_config is None:
+                logger.error("未找到ALIPAY_CONFIG设置")
+                raise ValueError("未找到ALIPAY_CONFIG设置")
+            return AlipayClientRegistry.SETTINGS_KEY, None, base_config
+        
+        config = dict(base_config or {})
+        config.update(gateway_config.config or {})
+        return str(gateway_config.id), gateway_config.updated_at, config
+    
+    @staticmethod
+    def _build(config):
+        """
+        根据配置参数构建支付宝客户端
+        
+        Raises:
+            ValueError: 配置参数缺失或密钥无效
+        """
+        app_private_key = config.get('APP_PRIVATE_KEY')
+        alipay_public_key = config.get('ALIPAY_PUBLIC_KEY')
+        if not config.get('APP_ID') or not app_private_key or not alipay_public_key:
+            raise ValueError("支付宝配置缺少APP_ID、APP_PRIVATE_KEY或ALIPAY_PUBLIC_KEY")
+        
         alipay_client_config = AlipayClientConfig()
-        alipay_client_config.server_url = settings.ALIPAY_CONFIG.get('GATEWAY', 'https://openapi.alipay.com/gateway.do')
-        alipay_client_config.app_id = settings.ALIPAY_CONFIG.get('APP_ID')
+        alipay_client_config.server_url = config.get('GATEWAY', 'https://openapi.alipay.com/gateway.do')
+        alipay_client_config.app_id = config.get('APP_ID')
         alipay_client_config.format = 'json'
         alipay_client_config.charset = 'utf-8'
         alipay_client_config.sign_type = 'RSA2'
         
-        # 处理私钥 - 支持文件路径或直接设置私钥内容
-        app_private_key = settings.ALIPAY_CONFIG.get('APP_PRIVATE_KEY')
-        if app_private_key.startswith('-----BEGIN'):
-            # 直接使用配置的私钥内容
-            formatted_private_key = format_private_key(app_private_key)
-        else:
-            # 从文件读取私钥
-            try:
-                with open(app_private_key, encoding='utf-8') as f:
-                    private_key = f.read()
-                    logger.debug(f"原始私钥长度: {len(private_key)}")
-                    formatted_private_key = format_private_key(private_key)
-            except Exception as e:
-                logger.error(f"读取私钥文件失败: {str(e)}")
-                raise
-                
+        # 构建时校验私钥，避免每次签名时才发现密钥无效
+        formatted_private_key = format_private_key(read_key(app_private_key))
+        if not test_private_key(formatted_private_key):
+            raise ValueError("支付宝应用私钥无效")
         alipay_client_config.app_private_key = formatted_private_key
+        alipay_client_config.alipay_public_key = format_public_key(read_key(alipay_public_key))
         
-        # 处理公钥 - 支持文件路径或直接设置公钥内容
-        alipay_public_key = settings.ALIPAY_CONFIG.get('ALIPAY_PUBLIC_KEY')
-        if alipay_public_key.startswith('-----BEGIN'):
-            # 直接使用配置的公钥内容
-            formatted_public_key = format_public_key(alipay_public_key)
-        else:
-            # 从文件读取公钥
-            try:
-                with open(alipay_public_key, encoding='utf-8') as f:
-                    public_key = f.read()
-                    formatted_public_key = format_public_key(public_key)
-            except Exception as e:
-                logger.error(f"读取公钥文件失败: {str(e)}")
-                raise
-                
-        alipay_client_config.alipay_public_key = formatted_public_key
-
-        logger.info("支付宝客户端配置完成")
+        return DefaultAlipayClient(alipay_client_config=alipay_client_config)
+    
+    @classmethod
+    def get_client(cls, gateway_config=None):
+        """
+        获取支付宝客户端，不存在或配置已变更时重新构建
+        
+        Args:
+            gateway_config: 支付网关配置对象，为空时使用settings.ALIPAY_CONFIG
+            
+        Returns:
+            DefaultAlipayClient: 支付宝客户端
+        """
+        key, version, config = cls._resolve(gateway_config)
+        entry = cls._clients.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+        
+        with cls._lock:
+            entry = cls._clients.get(key)
+            if entry and entry[0] == version:
+                return entry[1]
+            client = cls._build(config)
+            cls._clients[key] = (version, client)
         
-        client = DefaultAlipayClient(alipay_client_config=alipay_client_config)
+        logger.info(f"支付宝客户端配置完成: gateway={key}")
         return client
+    
+    @classmethod
+    def invalidate(cls, gateway_config_id=None):
+        """
+        移除已缓存的客户端
+        
+        Args:
+            gateway_config_id: 支付网关配置ID，为空时移除全部客户端
+        """
+        with cls._lock:
+            if gateway_config_id is None:
+                cls._clients.clear()
+            else:
+                cls._clients.pop(str(gateway_config_id), None)
+
+
+def get_alipay_client(gateway_config=None):
+    """
+    获取支付宝客户端实例
+    
+    :param gateway_config: 支付网关配置对象，为空时使用settings.ALIPAY_CONFIG
+    :return: 支付宝客户端
+    """
+    try:
+        return AlipayClientRegistry.get_client(gateway_config)
     except Exception as e:
         logger.error(f"初始化支付宝客户端失败: {str(e)}", exc_info=True)
         raise
 
 
-def create_alipay_trade_page_pay(order, return_url, notify_url):
+def create_alipay_trade_page_pay(order, return_url, notify_url, gateway_config=None):
     """
     创建支付宝支付请求
     
     :param order: Order对象
     :param return_url: 支付成功后跳转的URL
     :param notify_url: 支付结果异步通知URL
+    :param gateway_config: 支付网关配置对象，为空时使用settings.ALIPAY_CONFIG
     :return: 支付链接
     """
     try:
-        client = get_alipay_client()
+        client = get_alipay_client(gateway_config)
         
         model = AlipayTradePagePayModel()
         model.out_trade_no = str(order.order_number)
@@ -190,15 +263,16 @@ def create_alipay_trade_page_pay(order, return_url, notify_url):
         raise
 
 
-def query_trade_status(order_number):
+def query_trade_status(order_number, gateway_config=None):
     """
     查询订单支付状态，返回解析后的JSON对象
     
     :param order_number: 订单编号
+    :param gateway_config: 支付网关配置对象，为空时使用settings.ALIPAY_CONFIG
     :return: 查询结果的字典
     """
     try:
-        client = get_alipay_client()
+        client = get_alipay_client(gateway_config)
         
         model = AlipayTradeQueryModel()
         model.out_trade_no = order_number
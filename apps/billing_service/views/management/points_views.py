@@ -11,7 +11,11 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework.permissions import IsAdminUser
 
 from apps.billing_service.models import UserPoints, PointsTransaction
-from apps.billing_service.serializers import UserPointsSerializer, PointsTransactionSerializer
+from apps.billing_service.serializers import (
+    UserPointsSerializer,
+    PointsTransactionSerializer,
+    PointsBulkGrantSerializer
+)
 from apps.billing_service.services.points_service import PointsService
 from apps.auth_service.models import User
 from core.mixins import ResponseMixin
@@ -121,6 +125,37 @@ class PointsManagementViewSet(ResponseMixin, viewsets.ModelViewSet):
             logger.error(f"调整积分失败: {str(e)}", exc_info=True)
             return self.get_error_response(_("调整积分失败: ") + str(e))
     
+    @action(detail=False, methods=['post'])
+    def bulk_grant(self, request):
+        """
+        批量发放积分（活动、奖励等）
+        """
+        serializer = PointsBulkGrantSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.get_error_response(serializer.errors)
+            
+        data = serializer.validated_data
+        
+        try:
+            result = PointsService.bulk_add_points(
+                tenant=self.request.tenant,
+                grants=[(grant['user_id'], grant['points']) for grant in data['grants']],
+                reason=data['reason'],
+                source=data.get('source') or 'admin_grant',
+                created_by=request.user
+            )
+            
+            return self.get_success_response(
+                result,
+                _("批量发放积分完成: {users} 个用户, 共 {points} 积分").format(**result)
+            )
+            
+        except ValueError as e:
+            return self.get_error_response(str(e))
+        except Exception as e:
+            logger.error(f"批量发放积分失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("批量发放积分失败: ") + str(e))
+    
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
         """
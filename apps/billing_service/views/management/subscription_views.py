@@ -236,11 +236,13 @@ class SubscriptionManagementViewSet(ResponseMixin, viewsets.ModelViewSet):
         """
         try:
             # 检查过期的订阅
-            count = SubscriptionService.check_expired_subscriptions()
+            stats = SubscriptionService.expire_subscriptions()
             
             return self.get_success_response({
-                'count': count
-            }, _("成功处理 {0} 个过期订阅").format(count))
+                'count': stats['expired'],
+                'batches': stats['batches'],
+                'duration_ms': stats['duration_ms']
+            }, _("成功处理 {0} 个过期订阅").format(stats['expired']))
             
         except Exception as e:
             logger.error(f"检查过期订阅失败: {str(e)}", exc_info=True)
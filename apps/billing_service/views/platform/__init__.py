@@ -7,6 +7,7 @@ from apps.billing_service.views.platform.payment_views import PaymentViewSet
 from apps.billing_service.views.platform.subscription_views import SubscriptionViewSet, SubscriptionPlanViewSet
 from apps.billing_service.views.platform.points_views import PointsViewSet
 from apps.billing_service.views.platform.invoice_views import InvoiceViewSet
+from apps.billing_service.views.platform.entitlement_views import EntitlementVerifyView
 
 __all__ = [
     'OrderViewSet',
@@ -15,4 +16,5 @@ __all__ = [
     'SubscriptionPlanViewSet',
     'PointsViewSet',
     'InvoiceViewSet',
+    'EntitlementVerifyView',
 ]
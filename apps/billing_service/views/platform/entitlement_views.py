@@ -0,0 +1,76 @@
+"""
+权益校验平台API视图
+"""
+
+import logging
+from rest_framework import status
+from rest_framework.views import APIView
+from django.utils.translation import gettext_lazy as _
+
+from apps.billing_service.serializers import EntitlementCheckSerializer, EntitlementVerifySerializer
+from apps.billing_service.services.entitlement_service import EntitlementService
+from core.mixins import ResponseMixin
+from core.permissions.api_key_permissions import IsSystemApiKey
+
+logger = logging.getLogger('billing_service')
+
+
+class EntitlementVerifyView(ResponseMixin, APIView):
+    """
+    权益校验视图
+    
+    供微服务校验用户或租户的订阅权益，仅限系统级API密钥调用；
+    权益缓存命中时校验不访问数据库
+    """
+    permission_classes = [IsSystemApiKey]
+    
+    def post(self, request):
+        """
+        校验权益
+        
+        请求体格式：
+        {
+            "checks": [
+                {
+                    "tenant_id": "租户ID(可选，默认为API密钥所属租户)",
+                    "user_id": "用户ID(可选，为空时校验租户级权益)",
+                    "feature": "功能名称(可选，为空时返回完整权益)",
+                    "minimum": "数值权益需要达到的最小值(可选)"
+                }
+            ]
+        }
+        
+        也可以直接提交单个校验项，此时返回单个结果
+        """
+        single = 'checks' not in request.data
+        if single:
+            serializer = EntitlementCheckSerializer(data=request.data)
+        else:
+            serializer = EntitlementVerifySerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.get_error_response(str(serializer.errors))
+        checks = [serializer.validated_data] if single else serializer.validated_data['checks']
+        
+        # 绑定租户的API密钥只能校验本租户的权益
+        key_tenant_id = request.api_key.tenant_id
+        for check in checks:
+            tenant_id = check.get('tenant_id') or key_tenant_id
+            if not tenant_id:
+                return self.get_error_response(_("缺少租户ID"))
+            if key_tenant_id and str(tenant_id) != str(key_tenant_id):
+                return self.get_error_response(
+                    _("无权校验其他租户的权益"),
+                    status_code=status.HTTP_403_FORBIDDEN
+                )
+            check['tenant_id'] = tenant_id
+        
+        try:
+            results = EntitlementService.verify(checks)
+            return self.get_success_response(results[0] if single else results, _("权益校验完成"))
+            
+        except Exception as e:
+            logger.error(f"权益校验失败: {str(e)}", exc_info=True)
+            return self.get_error_response(
+                _("权益校验失败: ") + str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -7,13 +7,22 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.translation import gettext_lazy as _
 from rest_framework.permissions import IsAuthenticated
 
 from apps.billing_service.models import UserPoints, PointsTransaction
-from apps.billing_service.serializers import UserPointsSerializer, PointsTransactionSerializer
+from apps.billing_service.serializers import (
+    UserPointsSerializer, PointsTransactionSerializer, PointsHoldSerializer,
+    UsageEventBatchSerializer
+)
 from apps.billing_service.services.points_service import PointsService
+from apps.billing_service.services.points_hold_service import PointsHoldService
+from apps.billing_service.services.metering_service import MeteringService
+from apps.billing_service.services.points_snapshot_service import PointsSnapshotService
 from core.mixins import ResponseMixin
+from core.permissions.api_key_permissions import IsSystemApiKey
 
 logger = logging.getLogger('billing_service')
 
@@ -68,6 +77,34 @@ class PointsViewSet(ResponseMixin, viewsets.ModelViewSet):
             # 获取查询参数
             transaction_type = request.query_params.get('transaction_type')
             
+            # 分页模式：传入cursor或paging=cursor时使用游标分页
+            cursor = request.query_params.get('cursor')
+            if cursor is not None or request.query_params.get('paging') == 'cursor':
+                try:
+                    page_size = min(int(request.query_params.get('page_size', 20)), 100)
+                except ValueError:
+                    page_size = 20
+                    
+                try:
+                    transactions, next_cursor, prev_cursor = PointsService.get_user_points_transactions_by_cursor(
+                        tenant=request.tenant,
+                        user=request.user,
+                        transaction_type=transaction_type,
+                        cursor=cursor,
+                        page_size=page_size
+                    )
+                except ValueError as e:
+                    return self.get_error_response(str(e))
+                    
+                return self.get_success_response({
+                    'results': PointsTransactionSerializer(transactions, many=True).data,
+                    'pagination': {
+                        'page_size': page_size,
+                        'next_cursor': next_cursor,
+                        'prev_cursor': prev_cursor
+                    }
+                })
+            
             # 获取交易记录
             transactions = PointsService.get_user_points_transactions(
                 tenant=request.tenant,
@@ -88,6 +125,46 @@ class PointsViewSet(ResponseMixin, viewsets.ModelViewSet):
             logger.error(f"获取用户积分交易记录失败: {str(e)}", exc_info=True)
             return self.get_error_response(_("获取积分交易记录失败: ") + str(e))
     
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        获取用户在时间区间内的积分汇总
+        """
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        if not start or not end:
+            return self.get_error_response(_("请指定开始时间和结束时间"))
+            
+        # 格式正确但日期不存在（如2月30日）时parse_datetime抛出ValueError
+        try:
+            start = parse_datetime(start)
+            end = parse_datetime(end)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return self.get_error_response(_("时间格式无效"))
+            
+        # 未指定时区的时间按当前时区处理，与created_at比较前需转换为aware时间
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+            
+        try:
+            summary = PointsSnapshotService.get_period_summary(
+                tenant=request.tenant,
+                user=request.user,
+                start=start,
+                end=end
+            )
+            return self.get_success_response(summary)
+            
+        except ValueError as e:
+            return self.get_error_response(str(e))
+        except Exception as e:
+            logger.error(f"获取积分汇总失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("获取积分汇总失败: ") + str(e))
+    
     @action(detail=False, methods=['post'])
     def purchase(self, request):
         """
@@ -167,4 +244,136 @@ class PointsViewSet(ResponseMixin, viewsets.ModelViewSet):
             return self.get_error_response(str(e))
         except Exception as e:
             logger.error(f"使用积分失败: {str(e)}", exc_info=True)
-            return self.get_error_response(_("使用积分失败: ") + str(e)) 
\ No newline at end of file
+            return self.get_error_response(_("使用积分失败: ") + str(e))
+    
+    @staticmethod
+    def _parse_int(value, name):
+        """
+        解析整数参数
+        
+        Raises:
+            ValueError: 参数不是整数
+        """
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"参数 {name} 必须为整数")
+    
+    @action(detail=False, methods=['post'])
+    def reserve(self, request):
+        """
+        预留积分
+        
+        按量计费的任务开始前调用，预留成功后返回预留ID，任务结束后调用commit或release结算
+        """
+        if not request.data.get('points'):
+            return self.get_error_response(_("请指定积分数量"))
+            
+        try:
+            ttl = request.data.get('ttl')
+            hold, balance = PointsHoldService.reserve(
+                tenant=request.tenant,
+                user=request.user,
+                points=self._parse_int(request.data.get('points'), 'points'),
+                ttl=self._parse_int(ttl, 'ttl') if ttl else None,
+                source=request.data.get('source', 'metered_usage'),
+                description=request.data.get('description'),
+                metadata=request.data.get('metadata')
+            )
+            
+            return self.get_success_response({
+                'hold': PointsHoldSerializer(hold).data,
+                'balance': balance
+            }, _("积分预留成功"), status_code=status.HTTP_201_CREATED)
+            
+        except ValueError as e:
+            return self.get_error_response(str(e))
+        except Exception as e:
+            logger.error(f"预留积分失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("预留积分失败: ") + str(e))
+    
+    @action(detail=False, methods=['post'])
+    def commit(self, request):
+        """
+        按实际用量结算积分预留
+        """
+        hold_id = request.data.get('hold_id')
+        if not hold_id:
+            return self.get_error_response(_("请指定预留ID"))
+        if request.data.get('points') is None:
+            return self.get_error_response(_("请指定实际消耗的积分数量"))
+            
+        try:
+            hold, points_transaction, balance = PointsHoldService.commit(
+                hold_id=hold_id,
+                actual_points=self._parse_int(request.data.get('points'), 'points'),
+                tenant=request.tenant,
+                user=request.user,
+                created_by=request.user
+            )
+            
+            return self.get_success_response({
+                'hold': PointsHoldSerializer(hold).data,
+                'transaction': PointsTransactionSerializer(points_transaction).data if points_transaction else None,
+                'balance': balance
+            }, _("积分结算成功"))
+            
+        except ValueError as e:
+            return self.get_error_response(str(e))
+        except Exception as e:
+            logger.error(f"结算积分预留失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("结算积分预留失败: ") + str(e))
+    
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """
+        释放积分预留，预留的积分全部退回
+        """
+        hold_id = request.data.get('hold_id')
+        if not hold_id:
+            return self.get_error_response(_("请指定预留ID"))
+            
+        try:
+            hold, balance = PointsHoldService.release(
+                hold_id=hold_id,
+                tenant=request.tenant,
+                user=request.user
+            )
+            
+            return self.get_success_response({
+                'hold': PointsHoldSerializer(hold).data,
+                'balance': balance
+            }, _("积分预留已释放"))
+            
+        except ValueError as e:
+            return self.get_error_response(str(e))
+        except Exception as e:
+            logger.error(f"释放积分预留失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("释放积分预留失败: ") + str(e))
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsSystemApiKey])
+    def usage(self, request):
+        """
+        批量提交用量事件
+        
+        仅限系统级API密钥调用，事件按幂等键去重，积分在下一个结算窗口按账户汇总扣除
+        """
+        serializer = UsageEventBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.get_error_response(str(serializer.errors))
+            
+        try:
+            result = MeteringService.ingest(
+                tenant=request.api_key.tenant,
+                events=serializer.validated_data['events']
+            )
+            
+            return self.get_success_response(
+                result,
+                _("用量事件已接收"),
+                status_code=status.HTTP_202_ACCEPTED
+            )
+            
+        except Exception as e:
+            logger.error(f"接收用量事件失败: {str(e)}", exc_info=True)
+            return self.get_error_response(_("接收用量事件失败: ") + str(e))
@@ -20,3 +20,6 @@ class LoggerServiceConfig(AppConfig):
             import apps.logger_service.signals
         except ImportError:
             pass
+            
+        # 注册系统检查
+        import apps.logger_service.checks
@@ -0,0 +1,55 @@
+"""
+日志服务系统检查
+"""
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# 系统检查复用的MongoDB客户端
+_client = None
+
+
+def _get_client():
+    """
+    获取系统检查使用的MongoDB客户端
+    
+    使用较短的服务器选择超时，MongoDB不可用时不会明显拖慢管理命令
+    """
+    global _client
+    if _client is None:
+        from apps.logger_service.services.logger_service import LoggerService
+        
+        _client = LoggerService._get_mongo_client(
+            server_selection_timeout=getattr(settings, 'LOG_INDEX_CHECK_TIMEOUT', 500)
+        )
+    return _client
+
+
+@register('logger_service')
+def check_log_indexes(app_configs=None, **kwargs):
+    """
+    检查日志查询所需的MongoDB索引是否已创建
+    
+    MongoDB不在Django数据库配置中，不使用database标签，随runserver、migrate、check等命令的系统检查执行；
+    可通过LOG_INDEX_CHECK_ENABLED关闭
+    """
+    if not getattr(settings, 'LOG_INDEX_CHECK_ENABLED', True):
+        return []
+        
+    from apps.logger_service.services import LogIndexService
+    
+    missing = LogIndexService.get_missing_indexes(_get_client())
+    if missing is None:
+        return [Warning(
+            '无法连接MongoDB，跳过日志索引检查',
+            id='logger_service.W001',
+        )]
+        
+    return [
+        Warning(
+            f"MongoDB集合 {collection_name} 缺少索引: {', '.join(index_names)}",
+            hint='执行 python manage.py ensure_log_indexes 创建日志索引',
+            id='logger_service.W002',
+        )
+        for collection_name, index_names in missing.items()
+    ]
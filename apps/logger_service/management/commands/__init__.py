@@ -0,0 +1,3 @@
+"""
+日志服务管理命令
+"""
@@ -0,0 +1,95 @@
+"""
+日志索引管理命令
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from pymongo.errors import PyMongoError
+
+from apps.logger_service.services import LogIndexService
+
+
+class Command(BaseCommand):
+    """
+    创建和检查日志查询所需的MongoDB索引
+    
+    用法:
+        python manage.py ensure_log_indexes            # 创建缺失的索引
+        python manage.py ensure_log_indexes --check    # 仅检查，缺失索引时返回非零退出码
+        python manage.py ensure_log_indexes --explain  # 创建索引后分析各查询形态的执行计划
+    """
+    help = '创建和检查日志查询所需的MongoDB索引'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='仅检查索引是否存在，不创建索引'
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='使用explain()分析列表接口各查询条件组合的执行计划'
+        )
+        parser.add_argument(
+            '--slow-ms',
+            type=int,
+            default=100,
+            help='慢查询阈值(毫秒)，默认100'
+        )
+    
+    def handle(self, *args, **options):
+        if options['check']:
+            missing = LogIndexService.get_missing_indexes()
+            if missing is None:
+                raise CommandError('无法连接MongoDB')
+            if missing:
+                for collection_name, index_names in missing.items():
+                    self.stdout.write(self.style.WARNING(
+                        f"{collection_name} 缺少索引: {', '.join(index_names)}"
+                    ))
+                raise CommandError('日志索引不完整，请执行 python manage.py ensure_log_indexes')
+            self.stdout.write(self.style.SUCCESS('日志索引完整'))
+        else:
+            try:
+                created = LogIndexService.ensure_indexes()
+            except PyMongoError as e:
+                raise CommandError(f'日志索引创建失败: {str(e)}')
+            if not created:
+                raise CommandError('无法连接MongoDB')
+            for collection_name, index_names in created.items():
+                self.stdout.write(self.style.SUCCESS(
+                    f"{collection_name} 索引已就绪: {', '.join(index_names)}"
+                ))
+                
+        if options['explain']:
+            self._report_query_shapes(options['slow_ms'])
+    
+    def _report_query_shapes(self, slow_ms):
+        """
+        输出查询形态分析结果
+        """
+        reports = LogIndexService.explain_query_shapes(slow_ms=slow_ms)
+        problems = 0
+        
+        for report in reports:
+            if 'error' in report:
+                problems += 1
+                self.stdout.write(self.style.ERROR(f"[ERROR] {report['shape']}: {report['error']}"))
+                continue
+                
+            line = (
+                f"{report['shape']}: {'/'.join(report['stages'])} "
+                f"index={','.join(report['indexes']) or '-'} "
+                f"docs={report['docs_examined']} keys={report['keys_examined']} "
+                f"returned={report['returned']} {report['elapsed_ms']}ms"
+            )
+            if not report['index_backed']:
+                problems += 1
+                self.stdout.write(self.style.ERROR(f"[COLLSCAN] {line}"))
+            elif report['slow'] or report['in_memory_sort']:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f"[SLOW] {line}"))
+            else:
+                self.stdout.write(f"[OK] {line}")
+                
+        self.stdout.write(f"共分析{len(reports)}种查询形态，{problems}种需要关注")
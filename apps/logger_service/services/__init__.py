@@ -5,9 +5,13 @@
 from .logger_service import LoggerService
 from .log_category_service import LogCategoryService
 from .log_retention_policy_service import LogRetentionPolicyService
+from .log_ingest_service import LogIngestService
+from .log_index_service import LogIndexService
 
 __all__ = [
     'LoggerService',
     'LogCategoryService',
     'LogRetentionPolicyService',
+    'LogIngestService',
+    'LogIndexService',
 ]
@@ -3,11 +3,16 @@
 """
 
 import logging
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from apps.logger_service.models import LogCategory
 
 logger = logging.getLogger('sciTigerCore')
 
+# 分类代码映射缓存键
+CATEGORY_MAP_CACHE_KEY = 'logger_service:category_map'
+
 
 class LogCategoryService:
     """
@@ -77,6 +82,36 @@ class LogCategoryService:
         except LogCategory.DoesNotExist:
             return None
     
+    @staticmethod
+    def get_category_map():
+        """
+        获取分类代码到分类信息的映射
+        
+        结果缓存在Django缓存中，分类变更时由信号处理器清除
+        
+        Returns:
+            dict: {分类代码: {'id': 分类ID, 'name': 分类名称, 'code': 分类代码}}
+        """
+        category_map = cache.get(CATEGORY_MAP_CACHE_KEY)
+        if category_map is None:
+            category_map = {
+                code: {'id': str(category_id), 'name': name, 'code': code}
+                for category_id, name, code in LogCategory.objects.values_list('id', 'name', 'code')
+            }
+            cache.set(
+                CATEGORY_MAP_CACHE_KEY,
+                category_map,
+                getattr(settings, 'LOG_CATEGORY_MAP_CACHE_TIMEOUT', 300)
+            )
+        return category_map
+    
+    @staticmethod
+    def invalidate_category_map():
+        """
+        清除分类代码映射缓存
+        """
+        cache.delete(CATEGORY_MAP_CACHE_KEY)
+    
     @staticmethod
     def create_category(name, code, description=None, is_system=False, is_active=True):
         """
@@ -0,0 +1,271 @@
+"""
+日志索引管理服务
+"""
+
+import itertools
+import logging
+import datetime
+from django.utils import timezone
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+from apps.logger_service.services.logger_service import LoggerService
+
+logger = logging.getLogger('sciTigerCore')
+
+
+class LogIndexService:
+    """
+    日志索引管理服务类
+    
+    声明日志查询所需的MongoDB索引，负责创建、检查索引，
+    并通过explain()采样验证各类查询条件组合是否命中索引
+    """
+    
+    # 日志集合索引
+    # 列表/导出/游标分页均按(timestamp, id)排序，复合索引以二者结尾以避免内存排序
+    LOG_INDEXES = [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+        IndexModel(
+            [('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='timestamp_id'
+        ),
+        IndexModel(
+            [('tenant_id', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='tenant_timestamp_id'
+        ),
+        IndexModel(
+            [('tenant_id', ASCENDING), ('category_id', ASCENDING),
+             ('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='tenant_category_timestamp_id'
+        ),
+        IndexModel(
+            [('tenant_id', ASCENDING), ('level', ASCENDING),
+             ('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='tenant_level_timestamp_id'
+        ),
+        IndexModel(
+            [('tenant_id', ASCENDING), ('source', ASCENDING),
+             ('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='tenant_source_timestamp_id'
+        ),
+        IndexModel(
+            [('user_id', ASCENDING), ('timestamp', DESCENDING), ('id', DESCENDING)],
+            name='user_timestamp_id'
+        ),
+        # 保留策略按分类删除历史日志
+        IndexModel(
+            [('category_id', ASCENDING), ('timestamp', ASCENDING)],
+            name='category_timestamp'
+        ),
+        # $text搜索必须依赖文本索引，每个集合只能有一个
+        IndexModel(
+            [('message', TEXT), ('source', TEXT)],
+            name='message_source_text',
+            weights={'message': 10, 'source': 1},
+            default_language='none'
+        ),
+    ]
+    
+    # 统计汇总集合索引
+    STATS_INDEXES = [
+        IndexModel([('tenant_id', ASCENDING), ('hour', ASCENDING)], name='tenant_hour'),
+        IndexModel([('hour', ASCENDING)], name='hour'),
+    ]
+    
+    # 列表接口支持的可选过滤字段
+    FILTER_FIELDS = ('category_id', 'level', 'source', 'user_id')
+    
+    @staticmethod
+    def _get_collections(client=None):
+        """
+        获取日志集合和统计汇总集合
+        
+        Args:
+            client: MongoDB客户端，为空时新建连接
+            
+        Returns:
+            tuple: (日志集合, 统计汇总集合)，连接失败时均为None
+        """
+        collection = LoggerService._get_logs_collection(client)
+        if collection is None:
+            return None, None
+        return collection, LoggerService._get_stats_collection(collection)
+    
+    @staticmethod
+    def get_missing_indexes(client=None):
+        """
+        获取尚未创建的索引
+        
+        Args:
+            client: MongoDB客户端，为空时新建连接
+            
+        Returns:
+            dict: {集合名称: [缺失的索引名称]}，无法连接MongoDB时返回None
+        """
+        collection, stats_collection = LogIndexService._get_collections(client)
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return None
+            
+        missing = {}
+        try:
+            for target, indexes in (
+                (collection, LogIndexService.LOG_INDEXES),
+                (stats_collection, LogIndexService.STATS_INDEXES),
+            ):
+                existing = set(target.index_information().keys())
+                names = [index.document['name'] for index in indexes
+                         if index.document['name'] not in existing]
+                if names:
+                    missing[target.name] = names
+        except PyMongoError as e:
+            logger.error(f"日志索引检查失败: {str(e)}")
+            return None
+            
+        return missing
+    
+    @staticmethod
+    def ensure_indexes():
+        """
+        创建声明的全部索引
+        
+        已存在的同名同定义索引会被MongoDB忽略，可重复执行
+        
+        Returns:
+            dict: {集合名称: [索引名称]}
+        """
+        collection, stats_collection = LogIndexService._get_collections()
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return {}
+            
+        created = {}
+        for target, indexes in (
+            (collection, LogIndexService.LOG_INDEXES),
+            (stats_collection, LogIndexService.STATS_INDEXES),
+        ):
+            created[target.name] = target.create_indexes(indexes)
+            logger.info(f"日志索引已就绪: {target.name} {created[target.name]}")
+            
+        return created
+    
+    @staticmethod
+    def _summarize_plan(plan):
+        """
+        汇总执行计划中的阶段和使用的索引
+        
+        Args:
+            plan: winningPlan执行计划
+            
+        Returns:
+            tuple: (阶段列表, 索引名称列表)
+        """
+        stages = []
+        index_names = []
+        pending = [plan]
+        while pending:
+            node = pending.pop()
+            if not isinstance(node, dict):
+                continue
+            # MongoDB 7.0+ 的SBE计划位于queryPlan节点下
+            if 'queryPlan' in node:
+                pending.append(node['queryPlan'])
+                continue
+            if 'stage' in node:
+                stages.append(node['stage'])
+            if 'indexName' in node:
+                index_names.append(node['indexName'])
+            if 'inputStage' in node:
+                pending.append(node['inputStage'])
+            pending.extend(node.get('inputStages', []))
+        return stages, index_names
+    
+    @staticmethod
+    def _iter_query_shapes(sample):
+        """
+        枚举列表接口支持的查询条件组合
+        
+        Args:
+            sample: 采样日志，用于填充查询条件的值
+            
+        Yields:
+            tuple: (查询形态名称, 查询参数)
+        """
+        now = timezone.now()
+        filter_fields = LogIndexService.FILTER_FIELDS
+        for with_tenant, with_time, with_text in itertools.product((True, False), repeat=3):
+            for size in range(len(filter_fields) + 1):
+                for fields in itertools.combinations(filter_fields, size):
+                    params = {field: sample.get(field) or 'sample' for field in fields}
+                    shape = list(fields)
+                    if with_tenant:
+                        params['tenant_id'] = sample.get('tenant_id') or 'sample'
+                        shape.insert(0, 'tenant_id')
+                    if with_time:
+                        params['start_time'] = now - datetime.timedelta(days=7)
+                        params['end_time'] = now
+                        shape.append('time_range')
+                    if with_text:
+                        params['search_text'] = 'error'
+                        shape.append('search_text')
+                    yield '+'.join(shape) or 'all', params
+    
+    @staticmethod
+    def explain_query_shapes(slow_ms=100, page_size=20):
+        """
+        对列表接口的各类查询条件组合执行explain()
+        
+        使用最近一条日志的字段值作为采样条件，按列表接口的排序方式执行查询计划分析，
+        报告未命中索引或执行耗时超过阈值的查询形态
+        
+        Args:
+            slow_ms: 慢查询阈值(毫秒)
+            page_size: 模拟的每页大小
+            
+        Returns:
+            list: 每种查询形态的分析结果
+        """
+        collection = LoggerService._get_logs_collection()
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return []
+            
+        try:
+            sample = collection.find_one({}, sort=[('timestamp', DESCENDING)]) or {}
+        except PyMongoError as e:
+            logger.error(f"日志采样失败: {str(e)}")
+            return []
+            
+        reports = []
+        for shape, params in LogIndexService._iter_query_shapes(sample):
+            query = LoggerService._build_log_query(**params)
+            report = {'shape': shape}
+            try:
+                explain = collection.find(query) \
+                    .sort([('timestamp', DESCENDING), ('id', DESCENDING)]) \
+                    .limit(page_size) \
+                    .explain()
+            except PyMongoError as e:
+                report.update({'error': str(e), 'index_backed': False, 'slow': False})
+                reports.append(report)
+                continue
+                
+            stages, index_names = LogIndexService._summarize_plan(
+                explain.get('queryPlanner', {}).get('winningPlan', {})
+            )
+            execution = explain.get('executionStats', {})
+            elapsed_ms = execution.get('executionTimeMillis', 0)
+            report.update({
+                'stages': stages,
+                'indexes': index_names,
+                'index_backed': 'COLLSCAN' not in stages,
+                'in_memory_sort': 'SORT' in stages,
+                'docs_examined': execution.get('totalDocsExamined'),
+                'keys_examined': execution.get('totalKeysExamined'),
+                'returned': execution.get('nReturned'),
+                'elapsed_ms': elapsed_ms,
+                'slow': elapsed_ms >= slow_ms,
+            })
+            reports.append(report)
+            
+        return reports
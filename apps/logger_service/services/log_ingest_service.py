@@ -0,0 +1,227 @@
+"""
+日志批量接入服务
+"""
+
+import gzip
+import json
+import uuid
+import logging
+import ipaddress
+from django.conf import settings
+from django.utils import timezone
+from apps.logger_service.models import LogEntry
+from apps.logger_service.services.logger_service import LoggerService
+from apps.logger_service.services.log_category_service import LogCategoryService
+
+logger = logging.getLogger('sciTigerCore')
+
+
+class LogIngestService:
+    """
+    日志批量接入服务类
+    
+    逐行解析NDJSON日志流，使用轻量校验代替DRF序列化器，
+    按固定大小分块写入MongoDB，并返回逐行错误报告
+    """
+    
+    LEVELS = frozenset(level for level, _ in LogEntry.LEVEL_CHOICES)
+    
+    # 可选字符串字段及其最大长度，None表示不限制
+    STRING_FIELDS = {
+        'source': 100,
+        'user_agent': None,
+        'request_id': 100,
+    }
+    
+    @staticmethod
+    def _iter_lines(stream, max_line_bytes):
+        """
+        逐行读取数据流
+        
+        超过长度限制的行会被整体跳过，返回None作为占位
+        
+        Args:
+            stream: 二进制数据流
+            max_line_bytes: 单行最大字节数
+            
+        Yields:
+            bytes: 行内容，超长行为None
+        """
+        while True:
+            line = stream.readline(max_line_bytes + 1)
+            if not line:
+                return
+            if len(line) > max_line_bytes and not line.endswith(b'\n'):
+                # 丢弃超长行的剩余部分
+                while line and not line.endswith(b'\n'):
+                    line = stream.readline(max_line_bytes + 1)
+                yield None
+                continue
+            yield line
+    
+    @staticmethod
+    def validate_entry(data, category_map):
+        """
+        校验单条日志数据并构建日志文档
+        
+        Args:
+            data: 解析后的日志数据
+            category_map: 分类代码映射
+            
+        Returns:
+            tuple: (日志文档, 错误信息)，校验失败时日志文档为None
+        """
+        if not isinstance(data, dict):
+            return None, "日志必须是JSON对象"
+            
+        message = data.get('message')
+        if not isinstance(message, str) or not message:
+            return None, "message字段必填且必须是非空字符串"
+            
+        level = data.get('level', LogEntry.LEVEL_INFO)
+        if level not in LogIngestService.LEVELS:
+            return None, f"无效的日志级别: {level}"
+            
+        entry = {
+            'id': str(uuid.uuid4()),
+            'message': message,
+            'level': level,
+        }
+        
+        for field, max_length in LogIngestService.STRING_FIELDS.items():
+            value = data.get(field)
+            if value is not None:
+                if not isinstance(value, str):
+                    return None, f"{field}字段必须是字符串"
+                if max_length and len(value) > max_length:
+                    return None, f"{field}字段长度不能超过{max_length}"
+            entry[field] = value
+            
+        ip_address = data.get('ip_address')
+        if ip_address is not None:
+            try:
+                ipaddress.ip_address(ip_address)
+            except ValueError:
+                return None, f"无效的IP地址: {ip_address}"
+        entry['ip_address'] = ip_address
+        
+        metadata = data.get('metadata')
+        if metadata is not None and not isinstance(metadata, dict):
+            return None, "metadata字段必须是JSON对象"
+        entry['metadata'] = metadata or {}
+        
+        timestamp = data.get('timestamp')
+        if timestamp is not None:
+            # 格式正确但日期不存在（如2月30日）时同样视为无效
+            parsed = LoggerService._parse_timestamp(timestamp) if isinstance(timestamp, str) else None
+            if parsed is None:
+                return None, f"无效的时间戳: {timestamp}"
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            entry['timestamp'] = parsed
+            
+        category_code = data.get('category_code')
+        if category_code:
+            category = category_map.get(category_code)
+            if category is None:
+                return None, f"分类代码 '{category_code}' 不存在"
+            entry['category_id'] = category['id']
+            entry['category_name'] = category['name']
+            entry['category_code'] = category['code']
+            
+        return entry, None
+    
+    @staticmethod
+    def ingest_ndjson(stream, tenant=None, user=None, compressed=False):
+        """
+        接入NDJSON格式的日志流
+        
+        Args:
+            stream: 二进制数据流
+            tenant: 所属租户
+            user: 提交日志的用户
+            compressed: 数据流是否为gzip压缩
+            
+        Returns:
+            dict: 接入结果，包含成功数量、失败数量和逐行错误
+        """
+        chunk_size = getattr(settings, 'LOG_INGEST_CHUNK_SIZE', 1000)
+        max_errors = getattr(settings, 'LOG_INGEST_MAX_ERRORS', 1000)
+        max_line_bytes = getattr(settings, 'LOG_INGEST_MAX_LINE_BYTES', 65536)
+        
+        if compressed:
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+            
+        # 请求级公共字段只计算一次
+        common = {}
+        if tenant:
+            common['tenant_id'] = str(tenant.id)
+            common['tenant_name'] = tenant.name
+        if user:
+            common['user_id'] = str(user.id)
+            common['username'] = user.username
+            
+        category_map = LogCategoryService.get_category_map()
+        
+        result = {'accepted': 0, 'rejected': 0, 'errors': []}
+        
+        def add_error(line_number, error):
+            result['rejected'] += 1
+            if len(result['errors']) < max_errors:
+                result['errors'].append({'line': line_number, 'error': error})
+                
+        def flush(chunk, line_numbers):
+            inserted = LoggerService.insert_logs(chunk)
+            result['accepted'] += inserted
+            if inserted < len(chunk):
+                failed = len(chunk) - inserted
+                result['rejected'] += failed
+                if len(result['errors']) < max_errors:
+                    result['errors'].append({
+                        'line': f"{line_numbers[0]}-{line_numbers[-1]}",
+                        'error': f"{failed}条日志写入失败"
+                    })
+                    
+        chunk = []
+        chunk_line_numbers = []
+        line_number = 0
+        try:
+            for line_number, raw_line in enumerate(
+                LogIngestService._iter_lines(stream, max_line_bytes), start=1
+            ):
+                if raw_line is None:
+                    add_error(line_number, f"行长度超过{max_line_bytes}字节")
+                    continue
+                if not raw_line.strip():
+                    continue
+                    
+                try:
+                    data = json.loads(raw_line)
+                except ValueError as e:
+                    add_error(line_number, f"JSON解析失败: {str(e)}")
+                    continue
+                    
+                entry, error = LogIngestService.validate_entry(data, category_map)
+                if error:
+                    add_error(line_number, error)
+                    continue
+                    
+                entry.update(common)
+                entry.setdefault('timestamp', timezone.now())
+                chunk.append(entry)
+                chunk_line_numbers.append(line_number)
+                
+                if len(chunk) >= chunk_size:
+                    flush(chunk, chunk_line_numbers)
+                    chunk = []
+                    chunk_line_numbers = []
+        except (OSError, EOFError) as e:
+            # gzip数据损坏或截断，已解析的部分仍然写入
+            logger.warning(f"日志流读取中断: {str(e)}")
+            add_error(line_number + 1, f"数据流读取失败: {str(e)}")
+            
+        if chunk:
+            flush(chunk, chunk_line_numbers)
+            
+        logger.debug(f"日志批量接入完成: 成功{result['accepted']}条，失败{result['rejected']}条")
+        return result
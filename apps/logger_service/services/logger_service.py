@@ -2,13 +2,22 @@
 日志服务
 """
 
+import io
+import csv
+import json
 import uuid
+import zlib
+import base64
+import hashlib
 import logging
 import datetime
 from django.conf import settings
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from django.core.cache import cache
+from collections import Counter
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from apps.logger_service.models import LogCategory
 
 logger = logging.getLogger('sciTigerCore')
@@ -21,11 +30,32 @@ class LoggerService:
     提供日志记录和查询功能，与MongoDB交互
     """
     
+    # 计数模式
+    COUNT_NONE = 'none'
+    COUNT_ESTIMATE = 'estimate'
+    COUNT_EXACT = 'exact'
+    COUNT_MODES = (COUNT_NONE, COUNT_ESTIMATE, COUNT_EXACT)
+    
+    # 导出格式
+    EXPORT_NDJSON = 'ndjson'
+    EXPORT_CSV = 'csv'
+    EXPORT_FORMATS = (EXPORT_NDJSON, EXPORT_CSV)
+    
+    # 导出字段，与LogEntrySerializer保持一致
+    EXPORT_FIELDS = (
+        'id', 'tenant_id', 'tenant_name', 'category_id', 'category_name', 'category_code',
+        'level', 'message', 'source', 'user_id', 'username', 'ip_address', 'user_agent',
+        'request_id', 'metadata', 'timestamp',
+    )
+    
     @staticmethod
-    def _get_mongo_client():
+    def _get_mongo_client(server_selection_timeout=5000):
         """
         获取MongoDB客户端连接
         
+        Args:
+            server_selection_timeout: 服务器选择超时(毫秒)
+            
         Returns:
             MongoClient: MongoDB客户端
         """
@@ -33,20 +63,23 @@ class LoggerService:
             # 检查MongoDB配置
             mongodb_uri = getattr(settings, 'MONGODB_URI', 'mongodb://localhost:27017/')
             logger.debug(f"连接MongoDB: {mongodb_uri}")
-            return MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+            return MongoClient(mongodb_uri, serverSelectionTimeoutMS=server_selection_timeout)
         except Exception as e:
             logger.error(f"MongoDB连接失败: {str(e)}")
             return None
     
     @staticmethod
-    def _get_logs_collection():
+    def _get_logs_collection(client=None):
         """
         获取日志集合
         
+        Args:
+            client: MongoDB客户端，为空时新建连接
+            
         Returns:
             Collection: MongoDB集合对象
         """
-        client = LoggerService._get_mongo_client()
+        client = client or LoggerService._get_mongo_client()
         if not client:
             logger.error("无法获取MongoDB客户端连接")
             return None
@@ -63,6 +96,200 @@ class LoggerService:
             logger.error(f"MongoDB集合获取失败: {str(e)}")
             return None
     
+    @staticmethod
+    def _get_stats_collection(logs_collection):
+        """
+        获取日志统计汇总集合
+        
+        汇总集合与日志集合位于同一数据库
+        
+        Args:
+            logs_collection: 日志集合对象
+            
+        Returns:
+            Collection: MongoDB集合对象
+        """
+        collection_name = getattr(settings, 'MONGODB_STATS_COLLECTION', 'log_stats_hourly')
+        return logs_collection.database[collection_name]
+    
+    @staticmethod
+    def _parse_timestamp(value):
+        """
+        解析日志时间戳
+        
+        Args:
+            value: datetime对象或ISO 8601格式字符串
+            
+        Returns:
+            datetime: 解析后的时间，无法解析时返回None
+        """
+        if isinstance(value, datetime.datetime):
+            return value
+        if isinstance(value, str):
+            try:
+                return parse_datetime(value)
+            except ValueError:
+                return None
+        return None
+    
+    @staticmethod
+    def _get_stats_bucket(log_data):
+        """
+        获取日志所属的统计桶
+        
+        Args:
+            log_data: 日志数据
+            
+        Returns:
+            tuple: (租户ID, 小时, 级别, 分类ID, 分类名称)
+        """
+        timestamp = LoggerService._parse_timestamp(log_data.get('timestamp')) or timezone.now()
+        if timezone.is_aware(timestamp):
+            timestamp = timezone.make_naive(timestamp, datetime.timezone.utc)
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        
+        return (
+            log_data.get('tenant_id'),
+            hour,
+            log_data.get('level'),
+            log_data.get('category_id'),
+            log_data.get('category_name'),
+        )
+    
+    @staticmethod
+    def _get_stats_bucket_id(tenant_id, hour, level, category_id):
+        """获取统计桶的文档ID"""
+        return f"{tenant_id or ''}|{hour.isoformat()}|{level or ''}|{category_id or ''}"
+    
+    @staticmethod
+    def _build_stats_operation(tenant_id, hour, level, category_id, category_name,
+                               count, replace=False):
+        """
+        构建统计桶的upsert操作
+        
+        Args:
+            tenant_id: 租户ID
+            hour: 小时(UTC)
+            level: 日志级别
+            category_id: 分类ID
+            category_name: 分类名称
+            count: 日志数量
+            replace: 是否覆盖计数，默认累加
+            
+        Returns:
+            UpdateOne: 批量写入操作
+        """
+        return UpdateOne(
+            {'_id': LoggerService._get_stats_bucket_id(tenant_id, hour, level, category_id)},
+            {
+                '$set' if replace else '$inc': {'count': count},
+                '$setOnInsert': {
+                    'tenant_id': tenant_id,
+                    'hour': hour,
+                    'level': level,
+                    'category_id': category_id,
+                    'category_name': category_name,
+                }
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    def _update_log_stats(logs_collection, logs_data):
+        """
+        增量更新日志统计汇总
+        
+        按租户/小时/级别/分类聚合后，每个统计桶执行一次$inc upsert，
+        与日志写入同批完成
+        
+        Args:
+            logs_collection: 日志集合对象
+            logs_data: 已写入的日志数据列表
+        """
+        buckets = Counter(LoggerService._get_stats_bucket(log_data) for log_data in logs_data)
+        if not buckets:
+            return
+            
+        operations = [
+            LoggerService._build_stats_operation(*bucket, count=count)
+            for bucket, count in buckets.items()
+        ]
+            
+        try:
+            stats_collection = LoggerService._get_stats_collection(logs_collection)
+            stats_collection.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.error(f"日志统计汇总更新失败: {str(e)}")
+    
+    @staticmethod
+    def _aggregate_log_stats(logs_collection, match):
+        """
+        按统计桶聚合原始日志
+        
+        Args:
+            logs_collection: 日志集合对象
+            match: 日志查询条件
+            
+        Returns:
+            iterator: (统计桶, 日志数量)，统计桶格式与_get_stats_bucket一致
+        """
+        pipeline = [
+            {'$match': match},
+            {'$group': {
+                '_id': {
+                    'tenant_id': '$tenant_id',
+                    'year': {'$year': '$timestamp'},
+                    'month': {'$month': '$timestamp'},
+                    'day': {'$dayOfMonth': '$timestamp'},
+                    'hour': {'$hour': '$timestamp'},
+                    'level': '$level',
+                    'category_id': '$category_id',
+                    'category_name': '$category_name'
+                },
+                'count': {'$sum': 1}
+            }}
+        ]
+        for item in logs_collection.aggregate(pipeline, allowDiskUse=True):
+            key = item['_id']
+            yield (
+                key.get('tenant_id'),
+                datetime.datetime(key['year'], key['month'], key['day'], key['hour']),
+                key.get('level'),
+                key.get('category_id'),
+                key.get('category_name'),
+            ), item['count']
+    
+    @staticmethod
+    def _subtract_log_stats(logs_collection, buckets):
+        """
+        从统计汇总中扣减已删除日志的数量，并清除计数归零的统计桶
+        
+        Args:
+            logs_collection: 日志集合对象
+            buckets: (统计桶, 日志数量)列表
+        """
+        if not buckets:
+            return
+            
+        counts = [
+            (LoggerService._get_stats_bucket_id(tenant_id, hour, level, category_id), count)
+            for (tenant_id, hour, level, category_id, _), count in buckets
+        ]
+        try:
+            stats_collection = LoggerService._get_stats_collection(logs_collection)
+            for start in range(0, len(counts), 1000):
+                chunk = counts[start:start + 1000]
+                stats_collection.bulk_write([
+                    UpdateOne({'_id': bucket_id}, {'$inc': {'count': -count}})
+                    for bucket_id, count in chunk
+                ], ordered=False)
+                stats_collection.delete_many({
+                    '_id': {'$in': [bucket_id for bucket_id, _ in chunk]},
+                    'count': {'$lte': 0}
+                })
+        except PyMongoError as e:
+            logger.error(f"日志统计汇总扣减失败: {str(e)}")
+    
     @staticmethod
     def log(log_data):
         """
@@ -74,19 +301,19 @@ class LoggerService:
         Returns:
             dict: 创建的日志数据
         """
-        # 添加时间戳
-        if 'timestamp' not in log_data or not log_data['timestamp']:
-            log_data['timestamp'] = timezone.now()
+        # 添加时间戳，字符串时间戳转换为datetime后存储，与统计桶保持一致
+        log_data['timestamp'] = LoggerService._parse_timestamp(log_data.get('timestamp')) or timezone.now()
             
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
             return log_data
             
         try:
             # 插入日志
             collection.insert_one(log_data)
+            LoggerService._update_log_stats(collection, [log_data])
             logger.debug(f"日志记录成功: {log_data['id']}")
             return log_data
         except PyMongoError as e:
@@ -144,28 +371,51 @@ class LoggerService:
                 
             processed_logs.append(entry_data)
         
+        LoggerService.insert_logs(processed_logs)
+        return processed_logs
+    
+    @staticmethod
+    def insert_logs(entries):
+        """
+        批量写入已构建好的日志文档
+        
+        使用无序insert_many，单条失败不影响其余日志写入，并同步更新统计汇总
+        
+        Args:
+            entries: 日志文档列表
+            
+        Returns:
+            int: 成功写入的日志数量
+        """
+        if not entries:
+            return 0
+            
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
-            return processed_logs
+            return 0
             
         try:
-            # 批量插入日志
-            if processed_logs:
-                collection.insert_many(processed_logs)
-                logger.debug(f"批量日志记录成功: {len(processed_logs)}条")
-            return processed_logs
+            collection.insert_many(entries, ordered=False)
+            inserted = entries
+        except BulkWriteError as e:
+            failed_indexes = {error['index'] for error in e.details.get('writeErrors', [])}
+            inserted = [entry for index, entry in enumerate(entries) if index not in failed_indexes]
+            logger.error(f"批量日志记录部分失败: {len(failed_indexes)}条")
         except PyMongoError as e:
             logger.error(f"批量日志记录失败: {str(e)}")
-            return processed_logs
+            return 0
+            
+        LoggerService._update_log_stats(collection, inserted)
+        logger.debug(f"批量日志记录成功: {len(inserted)}条")
+        return len(inserted)
     
     @staticmethod
-    def get_logs(tenant_id=None, category_id=None, user_id=None, level=None, 
-                start_time=None, end_time=None, source=None, search_text=None,
-                page=1, page_size=20, sort_field='timestamp', sort_order=-1):
+    def _build_log_query(tenant_id=None, category_id=None, user_id=None, level=None,
+                         start_time=None, end_time=None, source=None, search_text=None):
         """
-        获取日志列表
+        构建日志查询条件
         
         Args:
             tenant_id: 租户ID
@@ -176,15 +426,10 @@ class LoggerService:
             end_time: 结束时间
             source: 来源
             search_text: 搜索文本
-            page: 页码
-            page_size: 每页大小
-            sort_field: 排序字段
-            sort_order: 排序顺序(1: 升序, -1: 降序)
             
         Returns:
-            tuple: (日志列表, 总数)
+            dict: MongoDB查询条件
         """
-        # 构建查询条件
         query = {}
         
         if tenant_id:
@@ -216,15 +461,144 @@ class LoggerService:
         if search_text:
             query['$text'] = {'$search': search_text}
             
+        return query
+    
+    @staticmethod
+    def _count_logs(collection, query, count_mode):
+        """
+        按计数模式统计日志数量
+        
+        estimate模式下，无过滤条件时使用集合元数据估算，
+        有过滤条件时按上限计数并缓存结果，避免每页都完整扫描匹配集
+        
+        Args:
+            collection: MongoDB集合对象
+            query: 查询条件
+            count_mode: 计数模式(none/estimate/exact)
+            
+        Returns:
+            int: 日志数量，count_mode为none时返回None
+        """
+        if count_mode == LoggerService.COUNT_NONE:
+            return None
+            
+        if count_mode == LoggerService.COUNT_EXACT:
+            return collection.count_documents(query)
+            
+        if not query:
+            return collection.estimated_document_count()
+            
+        query_digest = hashlib.md5(
+            json.dumps(query, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        cache_key = f"logger_service:log_count:{query_digest}"
+        
+        total = cache.get(cache_key)
+        if total is None:
+            limit = getattr(settings, 'LOG_COUNT_ESTIMATE_LIMIT', 10000)
+            total = collection.count_documents(query, limit=limit)
+            cache.set(cache_key, total, getattr(settings, 'LOG_COUNT_CACHE_TIMEOUT', 60))
+            
+        return total
+    
+    @staticmethod
+    def encode_cursor(log, direction='next'):
+        """
+        根据日志生成不透明游标
+        
+        Args:
+            log: 日志数据
+            direction: 翻页方向(next/prev)
+            
+        Returns:
+            str: 游标字符串
+        """
+        timestamp = log.get('timestamp')
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = timestamp.isoformat()
+            
+        payload = json.dumps({
+            'ts': timestamp,
+            'id': log.get('id'),
+            'd': direction
+        }, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        解析游标
+        
+        Args:
+            cursor: 游标字符串
+            
+        Returns:
+            tuple: (时间戳, 日志ID, 翻页方向)
+            
+        Raises:
+            ValueError: 游标格式无效
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            timestamp = datetime.datetime.fromisoformat(payload['ts'])
+            log_id = payload['id']
+            direction = payload.get('d', 'next')
+        except (ValueError, TypeError, KeyError, UnicodeError) as e:
+            raise ValueError(f"无效的游标: {cursor}") from e
+            
+        if direction not in ('next', 'prev'):
+            raise ValueError(f"无效的游标方向: {direction}")
+            
+        return timestamp, log_id, direction
+    
+    @staticmethod
+    def get_logs(tenant_id=None, category_id=None, user_id=None, level=None, 
+                start_time=None, end_time=None, source=None, search_text=None,
+                page=1, page_size=20, sort_field='timestamp', sort_order=-1,
+                count_mode=COUNT_EXACT):
+        """
+        获取日志列表
+        
+        Args:
+            tenant_id: 租户ID
+            category_id: 分类ID
+            user_id: 用户ID
+            level: 日志级别
+            start_time: 开始时间
+            end_time: 结束时间
+            source: 来源
+            search_text: 搜索文本
+            page: 页码
+            page_size: 每页大小
+            sort_field: 排序字段
+            sort_order: 排序顺序(1: 升序, -1: 降序)
+            count_mode: 计数模式(none/estimate/exact)
+            
+        Returns:
+            tuple: (日志列表, 总数)
+        """
+        # 构建查询条件
+        query = LoggerService._build_log_query(
+            tenant_id=tenant_id,
+            category_id=category_id,
+            user_id=user_id,
+            level=level,
+            start_time=start_time,
+            end_time=end_time,
+            source=source,
+            search_text=search_text
+        )
+            
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
             return [], 0
             
         try:
             # 计算总数
-            total = collection.count_documents(query)
+            total = LoggerService._count_logs(collection, query, count_mode)
             
             # 分页查询
             skip = (page - 1) * page_size
@@ -243,6 +617,216 @@ class LoggerService:
             logger.error(f"日志查询失败: {str(e)}")
             return [], 0
     
+    @staticmethod
+    def get_logs_by_cursor(tenant_id=None, category_id=None, user_id=None, level=None,
+                           start_time=None, end_time=None, source=None, search_text=None,
+                           cursor=None, page_size=20, sort_order=-1, count_mode=COUNT_NONE):
+        """
+        基于游标获取日志列表
+        
+        按(timestamp, id)进行键集分页，翻页代价与页码深度无关
+        
+        Args:
+            tenant_id: 租户ID
+            category_id: 分类ID
+            user_id: 用户ID
+            level: 日志级别
+            start_time: 开始时间
+            end_time: 结束时间
+            source: 来源
+            search_text: 搜索文本
+            cursor: 游标，为空时返回第一页
+            page_size: 每页大小
+            sort_order: 排序顺序(1: 升序, -1: 降序)
+            count_mode: 计数模式(none/estimate/exact)
+            
+        Returns:
+            tuple: (日志列表, 下一页游标, 上一页游标, 总数)
+            
+        Raises:
+            ValueError: 游标格式无效
+        """
+        query = LoggerService._build_log_query(
+            tenant_id=tenant_id,
+            category_id=category_id,
+            user_id=user_id,
+            level=level,
+            start_time=start_time,
+            end_time=end_time,
+            source=source,
+            search_text=search_text
+        )
+        
+        # 解析游标，向前翻页时反转排序方向
+        direction = 'next'
+        page_query = dict(query)
+        if cursor:
+            cursor_timestamp, cursor_id, direction = LoggerService.decode_cursor(cursor)
+            effective_order = sort_order if direction == 'next' else -sort_order
+            op = '$lt' if effective_order == -1 else '$gt'
+            page_query['$or'] = [
+                {'timestamp': {op: cursor_timestamp}},
+                {'timestamp': cursor_timestamp, 'id': {op: cursor_id}}
+            ]
+        else:
+            effective_order = sort_order
+            
+        # 获取日志集合
+        collection = LoggerService._get_logs_collection()
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return [], None, None, 0
+            
+        try:
+            total = LoggerService._count_logs(collection, query, count_mode)
+            
+            # 多取一条用于判断是否还有更多数据
+            logs = list(
+                collection.find(page_query)
+                .sort([('timestamp', effective_order), ('id', effective_order)])
+                .limit(page_size + 1)
+            )
+            has_more = len(logs) > page_size
+            logs = logs[:page_size]
+            
+            if direction == 'prev':
+                logs.reverse()
+                
+            next_cursor = None
+            prev_cursor = None
+            if logs:
+                if direction == 'next':
+                    if has_more:
+                        next_cursor = LoggerService.encode_cursor(logs[-1], 'next')
+                    if cursor:
+                        prev_cursor = LoggerService.encode_cursor(logs[0], 'prev')
+                else:
+                    next_cursor = LoggerService.encode_cursor(logs[-1], 'next')
+                    if has_more:
+                        prev_cursor = LoggerService.encode_cursor(logs[0], 'prev')
+                        
+            return logs, next_cursor, prev_cursor, total
+        except PyMongoError as e:
+            logger.error(f"日志查询失败: {str(e)}")
+            return [], None, None, 0
+    
+    @staticmethod
+    def iter_logs(tenant_id=None, category_id=None, user_id=None, level=None,
+                  start_time=None, end_time=None, source=None, search_text=None,
+                  sort_order=-1, batch_size=None):
+        """
+        逐条遍历匹配的日志
+        
+        使用服务端游标分批拉取，内存占用与结果集大小无关
+        
+        Args:
+            tenant_id: 租户ID
+            category_id: 分类ID
+            user_id: 用户ID
+            level: 日志级别
+            start_time: 开始时间
+            end_time: 结束时间
+            source: 来源
+            search_text: 搜索文本
+            sort_order: 排序顺序(1: 升序, -1: 降序)
+            batch_size: 每批从服务端拉取的数量
+            
+        Yields:
+            dict: 日志数据
+        """
+        query = LoggerService._build_log_query(
+            tenant_id=tenant_id,
+            category_id=category_id,
+            user_id=user_id,
+            level=level,
+            start_time=start_time,
+            end_time=end_time,
+            source=source,
+            search_text=search_text
+        )
+        
+        collection = LoggerService._get_logs_collection()
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return
+            
+        if batch_size is None:
+            batch_size = getattr(settings, 'LOG_EXPORT_BATCH_SIZE', 1000)
+            
+        # 导出可能持续较长时间，禁用游标空闲超时并确保在结束或中断时关闭游标
+        cursor = collection.find(
+            query,
+            {'_id': 0},
+            no_cursor_timeout=True,
+            batch_size=batch_size
+        ).sort([('timestamp', sort_order), ('id', sort_order)])
+        try:
+            for log in cursor:
+                yield log
+        except PyMongoError as e:
+            logger.error(f"日志导出查询失败: {str(e)}")
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def stream_logs_export(logs, export_format=EXPORT_NDJSON, compress=False, chunk_size=65536):
+        """
+        将日志编码为导出文件内容流
+        
+        Args:
+            logs: 日志数据迭代器
+            export_format: 导出格式(ndjson/csv)
+            compress: 是否使用gzip压缩
+            chunk_size: 输出块的目标大小(字节)
+            
+        Yields:
+            bytes: 导出内容块
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer = io.StringIO()
+        csv_writer = None
+        
+        if export_format == LoggerService.EXPORT_CSV:
+            csv_writer = csv.writer(buffer)
+            csv_writer.writerow(LoggerService.EXPORT_FIELDS)
+            
+        def flush():
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            if compressor:
+                data = compressor.compress(data)
+            return data
+            
+        for log in logs:
+            row = {}
+            for field in LoggerService.EXPORT_FIELDS:
+                value = log.get(field)
+                if isinstance(value, datetime.datetime):
+                    value = value.isoformat()
+                row[field] = value
+                
+            if csv_writer:
+                csv_writer.writerow([
+                    json.dumps(value, ensure_ascii=False, default=str)
+                    if isinstance(value, (dict, list)) else value
+                    for value in row.values()
+                ])
+            else:
+                buffer.write(json.dumps(row, ensure_ascii=False, default=str))
+                buffer.write('\n')
+                
+            if buffer.tell() >= chunk_size:
+                data = flush()
+                if data:
+                    yield data
+                    
+        data = flush()
+        if compressor:
+            data += compressor.flush()
+        if data:
+            yield data
+    
     @staticmethod
     def get_log_by_id(log_id):
         """
@@ -256,7 +840,7 @@ class LoggerService:
         """
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
             return None
             
@@ -273,6 +857,8 @@ class LoggerService:
         """
         删除日志
         
+        删除前按统计桶聚合待删除的日志，删除后从统计汇总中扣减相应数量
+        
         Args:
             tenant_id: 租户ID
             category_id: 分类ID
@@ -295,14 +881,17 @@ class LoggerService:
             
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
             return 0
             
         try:
+            buckets = list(LoggerService._aggregate_log_stats(collection, query))
+            
             # 删除日志
             result = collection.delete_many(query)
             deleted_count = result.deleted_count
+            LoggerService._subtract_log_stats(collection, buckets)
             logger.info(f"已删除{deleted_count}条日志")
             return deleted_count
         except PyMongoError as e:
@@ -341,11 +930,69 @@ class LoggerService:
             
         return total_deleted
     
+    @staticmethod
+    def rebuild_log_stats(tenant_id=None, days=30):
+        """
+        根据原始日志重建统计汇总
+        
+        用于初始化历史数据或校正汇总
+        
+        Args:
+            tenant_id: 租户ID，为空时重建所有租户
+            days: 重建天数
+            
+        Returns:
+            int: 重建的统计桶数量
+        """
+        start_date = timezone.now() - datetime.timedelta(days=days)
+        start_hour = timezone.make_naive(start_date, datetime.timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        
+        # 获取日志集合
+        collection = LoggerService._get_logs_collection()
+        if collection is None:
+            logger.error("无法获取MongoDB日志集合")
+            return 0
+            
+        try:
+            match = {'timestamp': {'$gte': start_hour}}
+            if tenant_id:
+                match['tenant_id'] = tenant_id
+                
+            stats_collection = LoggerService._get_stats_collection(collection)
+            stats_match = {'hour': {'$gte': start_hour}}
+            if tenant_id:
+                stats_match['tenant_id'] = tenant_id
+            stats_collection.delete_many(stats_match)
+            
+            rebuilt = 0
+            operations = []
+            for bucket, count in LoggerService._aggregate_log_stats(collection, match):
+                operations.append(LoggerService._build_stats_operation(*bucket, count=count, replace=True))
+                if len(operations) >= 1000:
+                    stats_collection.bulk_write(operations, ordered=False)
+                    rebuilt += len(operations)
+                    operations = []
+                    
+            if operations:
+                stats_collection.bulk_write(operations, ordered=False)
+                rebuilt += len(operations)
+                
+            logger.info(f"已重建{rebuilt}个日志统计桶")
+            return rebuilt
+        except PyMongoError as e:
+            logger.error(f"日志统计重建失败: {str(e)}")
+            return 0
+    
     @staticmethod
     def get_log_stats(tenant_id=None, days=7):
         """
         获取日志统计信息
         
+        从按小时预聚合的统计汇总中读取，查询代价与统计桶数量相关，
+        与日志数量无关
+        
         Args:
             tenant_id: 租户ID
             days: 统计天数
@@ -353,73 +1000,55 @@ class LoggerService:
         Returns:
             dict: 统计信息
         """
-        # 计算开始日期
+        # 计算开始时间，按小时对齐到统计桶
         start_date = timezone.now() - datetime.timedelta(days=days)
+        start_hour = timezone.make_naive(start_date, datetime.timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
         
         # 获取日志集合
         collection = LoggerService._get_logs_collection()
-        if not collection:
+        if collection is None:
             logger.error("无法获取MongoDB日志集合")
             return {}
             
         try:
             # 基础查询条件
-            match = {'timestamp': {'$gte': start_date}}
+            match = {'hour': {'$gte': start_hour}}
             if tenant_id:
                 match['tenant_id'] = tenant_id
                 
-            # 按级别统计
-            level_pipeline = [
-                {'$match': match},
-                {'$group': {'_id': '$level', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}}
-            ]
-            
-            level_stats = list(collection.aggregate(level_pipeline))
-            
-            # 按分类统计
-            category_pipeline = [
-                {'$match': match},
-                {'$group': {'_id': '$category_name', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}},
-                {'$limit': 10}
-            ]
-            
-            category_stats = list(collection.aggregate(category_pipeline))
-            
-            # 按日期统计
-            date_pipeline = [
-                {'$match': match},
-                {'$group': {
-                    '_id': {
-                        'year': {'$year': '$timestamp'},
-                        'month': {'$month': '$timestamp'},
-                        'day': {'$dayOfMonth': '$timestamp'}
-                    },
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'_id.year': 1, '_id.month': 1, '_id.day': 1}}
-            ]
+            stats_collection = LoggerService._get_stats_collection(collection)
             
-            date_stats = list(collection.aggregate(date_pipeline))
+            total_count = 0
+            level_stats = Counter()
+            category_stats = Counter()
+            date_stats = Counter()
             
-            # 总数统计
-            total_count = collection.count_documents(match)
+            # 统计桶数量有限，在一次扫描中完成各维度汇总
+            projection = {'hour': 1, 'level': 1, 'category_name': 1, 'count': 1}
+            for bucket in stats_collection.find(match, projection):
+                count = bucket.get('count', 0)
+                hour = bucket['hour']
+                total_count += count
+                level_stats[bucket.get('level')] += count
+                category_stats[bucket.get('category_name') or 'unknown'] += count
+                date_stats[(hour.year, hour.month, hour.day)] += count
             
             # 构建结果
             result = {
                 'total_count': total_count,
-                'level_stats': {item['_id']: item['count'] for item in level_stats},
-                'category_stats': {item['_id'] or 'unknown': item['count'] for item in category_stats},
+                'level_stats': dict(level_stats.most_common()),
+                'category_stats': dict(category_stats.most_common(10)),
                 'date_stats': [
                     {
-                        'date': f"{item['_id']['year']}-{item['_id']['month']}-{item['_id']['day']}",
-                        'count': item['count']
-                    } for item in date_stats
+                        'date': f"{year}-{month}-{day}",
+                        'count': count
+                    } for (year, month, day), count in sorted(date_stats.items())
                 ]
             }
             
             return result
         except PyMongoError as e:
             logger.error(f"日志统计失败: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {}
@@ -6,7 +6,23 @@ import logging
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from .models import LogCategory
+
 logger = logging.getLogger('sciTigerCore')
 
 # 这里可以添加与日志相关的信号处理器
-# 例如，当某些重要模型发生变化时自动记录日志 
\ No newline at end of file
+# 例如，当某些重要模型发生变化时自动记录日志 
+
+
+@receiver(post_save, sender=LogCategory)
+@receiver(post_delete, sender=LogCategory)
+def invalidate_category_map(sender, instance, **kwargs):
+    """
+    日志分类变更时清除分类代码映射缓存
+    
+    Args:
+        sender: 发送信号的模型类
+        instance: 日志分类实例
+    """
+    from .services import LogCategoryService
+    LogCategoryService.invalidate_category_map()
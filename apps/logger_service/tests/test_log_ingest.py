@@ -0,0 +1,45 @@
+"""
+日志批量接入测试
+
+写入MongoDB的部分使用mock替代，校验逐行解析和错误报告
+"""
+
+import io
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.logger_service.services import LoggerService
+from apps.logger_service.services.log_ingest_service import LogIngestService
+
+
+class LogIngestTests(TestCase):
+    """日志批量接入测试"""
+
+    def ingest(self, lines):
+        stream = io.BytesIO(b''.join(json.dumps(line).encode() + b'\n' for line in lines))
+        with mock.patch.object(LoggerService, 'insert_logs', side_effect=len) as insert_logs:
+            result = LogIngestService.ingest_ndjson(stream)
+        return result, [entry for call in insert_logs.call_args_list for entry in call.args[0]]
+
+    def test_invalid_calendar_date_is_reported_per_line(self):
+        """格式正确但日期不存在的时间戳记为该行的错误，其余行正常写入"""
+        result, inserted = self.ingest([
+            {'message': 'first', 'timestamp': '2024-02-28T00:00:00Z'},
+            {'message': 'invalid', 'timestamp': '2024-02-30T00:00:00'},
+            {'message': 'last'},
+        ])
+
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(result['rejected'], 1)
+        self.assertEqual(result['errors'], [{'line': 2, 'error': '无效的时间戳: 2024-02-30T00:00:00'}])
+        self.assertEqual([entry['message'] for entry in inserted], ['first', 'last'])
+
+    def test_unparseable_timestamp_is_reported_per_line(self):
+        """无法解析的时间戳记为该行的错误"""
+        result, inserted = self.ingest([{'message': 'bad', 'timestamp': 'yesterday'}])
+
+        self.assertEqual(result['accepted'], 0)
+        self.assertEqual(result['errors'], [{'line': 1, 'error': '无效的时间戳: yesterday'}])
+        self.assertEqual(inserted, [])
@@ -2,12 +2,14 @@
 日志条目管理视图
 """
 
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 
 from core.mixins import ResponseMixin
-from apps.logger_service.services import LoggerService
+from apps.logger_service.services import LoggerService, LogIngestService
 from apps.logger_service.serializers import (
     LogEntrySerializer,
     LogEntryDetailSerializer,
@@ -65,6 +67,54 @@ class LogEntryViewSet(ResponseMixin, viewsets.GenericViewSet):
         sort_field = request.query_params.get('sort_field', 'timestamp')
         sort_order = -1 if request.query_params.get('sort_order', 'desc').lower() == 'desc' else 1
         
+        # 分页模式：传入cursor或paging=cursor时使用游标分页
+        cursor = request.query_params.get('cursor')
+        use_cursor = cursor is not None or request.query_params.get('paging') == 'cursor'
+        
+        # 计数模式：游标分页默认不计数，页码分页默认精确计数
+        count_mode = request.query_params.get(
+            'count',
+            LoggerService.COUNT_NONE if use_cursor else LoggerService.COUNT_EXACT
+        )
+        if count_mode not in LoggerService.COUNT_MODES:
+            return self.get_error_response(
+                f"无效的计数模式: {count_mode}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if use_cursor:
+            try:
+                logs, next_cursor, prev_cursor, total = LoggerService.get_logs_by_cursor(
+                    tenant_id=tenant_id,
+                    category_id=category_id,
+                    user_id=user_id,
+                    level=level,
+                    start_time=start_time,
+                    end_time=end_time,
+                    source=source,
+                    search_text=search_text,
+                    cursor=cursor,
+                    page_size=page_size,
+                    sort_order=sort_order,
+                    count_mode=count_mode
+                )
+            except ValueError as e:
+                return self.get_error_response(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+                
+            serializer = self.get_serializer(logs, many=True)
+            
+            # 构建游标分页响应
+            return self.get_success_response({
+                'results': serializer.data,
+                'pagination': {
+                    'page_size': page_size,
+                    'next_cursor': next_cursor,
+                    'prev_cursor': prev_cursor,
+                    'total': total,
+                    'count_mode': count_mode
+                }
+            })
+        
         # 查询日志
         logs, total = LoggerService.get_logs(
             tenant_id=tenant_id,
@@ -78,20 +128,25 @@ class LogEntryViewSet(ResponseMixin, viewsets.GenericViewSet):
             page=page,
             page_size=page_size,
             sort_field=sort_field,
-            sort_order=sort_order
+            sort_order=sort_order,
+            count_mode=count_mode
         )
         
         # 序列化结果
         serializer = self.get_serializer(logs, many=True)
         
         # 构建分页响应
+        total_pages = None
+        if total is not None:
+            total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
         return self.get_success_response({
             'results': serializer.data,
             'pagination': {
                 'page': page,
                 'page_size': page_size,
                 'total': total,
-                'total_pages': (total + page_size - 1) // page_size if page_size > 0 else 0
+                'total_pages': total_pages,
+                'count_mode': count_mode
             }
         })
     
@@ -175,6 +230,97 @@ class LogEntryViewSet(ResponseMixin, viewsets.GenericViewSet):
             'deleted_count': deleted_count
         }, message=f"成功删除{deleted_count}条过期日志")
     
+    @action(detail=False, methods=['post'])
+    def rebuild_stats(self, request):
+        """
+        重建日志统计汇总
+        
+        根据原始日志重新计算按小时汇总的统计数据
+        """
+        tenant_id = request.data.get('tenant_id')
+        
+        try:
+            days = int(request.data.get('days', 30))
+            days = min(max(days, 1), 365)  # 限制范围1-365天
+        except (TypeError, ValueError):
+            days = 30
+            
+        rebuilt_count = LoggerService.rebuild_log_stats(tenant_id=tenant_id, days=days)
+        
+        return self.get_success_response({
+            'rebuilt_count': rebuilt_count
+        }, message=f"成功重建{rebuilt_count}个统计桶")
+    
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """
+        高吞吐批量接入日志
+        
+        请求体为NDJSON（每行一条日志），支持gzip压缩，
+        逐行校验并分块写入，返回逐行错误报告
+        """
+        stream = request.stream
+        if stream is None:
+            return self.get_error_response("请求体不能为空", status_code=status.HTTP_400_BAD_REQUEST)
+            
+        content_encoding = request.META.get('HTTP_CONTENT_ENCODING', '').lower()
+        compressed = content_encoding == 'gzip' or request.content_type in ('application/gzip', 'application/x-gzip')
+        
+        tenant = getattr(request, 'tenant', None)
+        user = request.user if request.user.is_authenticated else None
+        
+        result = LogIngestService.ingest_ndjson(stream, tenant=tenant, user=user, compressed=compressed)
+        
+        return self.get_success_response(
+            result,
+            message=f"成功写入{result['accepted']}条日志，失败{result['rejected']}条",
+            status_code=status.HTTP_201_CREATED if result['accepted'] else status.HTTP_200_OK
+        )
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        流式导出日志
+        
+        支持与列表接口相同的过滤条件，按NDJSON或CSV格式逐批输出，可选gzip压缩
+        """
+        export_format = request.query_params.get('export_format', LoggerService.EXPORT_NDJSON)
+        if export_format not in LoggerService.EXPORT_FORMATS:
+            return self.get_error_response(
+                f"不支持的导出格式: {export_format}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+        sort_order = -1 if request.query_params.get('sort_order', 'desc').lower() == 'desc' else 1
+        
+        logs = LoggerService.iter_logs(
+            tenant_id=request.query_params.get('tenant_id'),
+            category_id=request.query_params.get('category_id'),
+            user_id=request.query_params.get('user_id'),
+            level=request.query_params.get('level'),
+            start_time=request.query_params.get('start_time'),
+            end_time=request.query_params.get('end_time'),
+            source=request.query_params.get('source'),
+            search_text=request.query_params.get('search_text'),
+            sort_order=sort_order
+        )
+        
+        filename = f"logs_{timezone.now():%Y%m%d%H%M%S}.{export_format}"
+        if compress:
+            content_type = 'application/gzip'
+            filename += '.gz'
+        elif export_format == LoggerService.EXPORT_CSV:
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content_type = 'application/x-ndjson; charset=utf-8'
+            
+        response = StreamingHttpResponse(
+            LoggerService.stream_logs_export(logs, export_format=export_format, compress=compress),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """
@@ -5,7 +5,8 @@
 from django.contrib import admin
 from apps.notification_service.models import (
     NotificationType, NotificationChannel, NotificationTemplate,
-    Notification, UserNotificationPreference
+    Notification, UserNotificationPreference, UserUnreadCounter,
+    BroadcastNotification, BroadcastReadState, NotificationDailyUsage
 )
 
 
@@ -50,8 +51,43 @@ class NotificationAdmin(admin.ModelAdmin):
 class UserNotificationPreferenceAdmin(admin.ModelAdmin):
     """用户通知偏好设置管理"""
     list_display = ('user', 'notification_type', 'email_enabled', 'sms_enabled', 
-                    'in_app_enabled', 'push_enabled', 'do_not_disturb_enabled')
+                    'in_app_enabled', 'push_enabled', 'webhook_enabled', 'do_not_disturb_enabled')
     list_filter = ('email_enabled', 'sms_enabled', 'in_app_enabled', 'push_enabled', 
-                   'do_not_disturb_enabled', 'notification_type', 'tenant')
+                   'webhook_enabled', 'do_not_disturb_enabled', 'notification_type', 'tenant')
     search_fields = ('user__username', 'notification_type__name')
     ordering = ('user', 'notification_type')
+
+
+@admin.register(UserUnreadCounter)
+class UserUnreadCounterAdmin(admin.ModelAdmin):
+    """用户未读通知计数管理"""
+    list_display = ('user', 'tenant', 'count', 'updated_at')
+    list_filter = ('tenant',)
+    search_fields = ('user__username',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    """广播通知管理"""
+    list_display = ('subject', 'tenant', 'notification_type', 'target_role', 'published_at', 'expires_at')
+    list_filter = ('target_role', 'notification_type', 'tenant')
+    search_fields = ('subject', 'content')
+    ordering = ('-published_at',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(BroadcastReadState)
+class BroadcastReadStateAdmin(admin.ModelAdmin):
+    """广播通知阅读状态管理"""
+    list_display = ('broadcast', 'user', 'read_at')
+    search_fields = ('user__username', 'broadcast__subject')
+    readonly_fields = ('read_at',)
+
+
+@admin.register(NotificationDailyUsage)
+class NotificationDailyUsageAdmin(admin.ModelAdmin):
+    """租户每日通知用量管理"""
+    list_display = ('tenant', 'date', 'count', 'updated_at')
+    list_filter = ('tenant', 'date')
+    readonly_fields = ('updated_at',)
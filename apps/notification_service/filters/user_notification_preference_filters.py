@@ -28,6 +28,7 @@ class UserNotificationPreferenceFilter(django_filters.FilterSet):
     sms_enabled = django_filters.BooleanFilter()
     in_app_enabled = django_filters.BooleanFilter()
     push_enabled = django_filters.BooleanFilter()
+    webhook_enabled = django_filters.BooleanFilter()
     
     # 按免打扰设置过滤
     do_not_disturb_enabled = django_filters.BooleanFilter()
@@ -57,6 +58,7 @@ class UserNotificationPreferenceFilter(django_filters.FilterSet):
             'sms_enabled': ['exact'],
             'in_app_enabled': ['exact'],
             'push_enabled': ['exact'],
+            'webhook_enabled': ['exact'],
             'do_not_disturb_enabled': ['exact'],
             'urgent_bypass_dnd': ['exact'],
             'tenant_id': ['exact'],
@@ -0,0 +1,3 @@
+"""
+通知服务管理命令
+"""
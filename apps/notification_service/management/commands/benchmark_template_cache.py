@@ -0,0 +1,119 @@
+"""
+通知模板编译缓存性能测试命令
+"""
+
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.auth_service.models import User
+from apps.notification_service.models import NotificationChannel, NotificationTemplate, NotificationType
+from apps.notification_service.services import NotificationService
+from apps.notification_service.services.template_cache import template_cache
+from apps.tenant_service.models import Tenant, TenantQuota, TenantUser
+
+
+class Command(BaseCommand):
+    """
+    向临时租户的全部用户扇出通知，对比模板每次编译与使用编译缓存的吞吐量
+
+    每个用户的通知数据不同时逐条调用create_notification，每条通知都需要渲染模板，分别在关闭和开启编译缓存时计时；
+    所有用户共享数据时调用create_notifications_bulk，模板只渲染一次，作为对照
+
+    通知的计划发送时间设置在一天后，不会投递；命令会创建临时租户、用户、通知类型、渠道和模板，结束后删除
+
+    用法:
+        python manage.py benchmark_template_cache                   # 默认向1000个用户扇出
+        python manage.py benchmark_template_cache --users 5000
+    """
+    help = '向临时租户扇出通知，对比模板每次编译与使用编译缓存的吞吐量'
+
+    SUBJECT_TEMPLATE = '{{ title }} - {{ name }}'
+    CONTENT_TEMPLATE = (
+        '{{ name }}，您好：{% for item in items %}{{ forloop.counter }}. {{ item|upper }} {% endfor %}'
+        '{% if vip %}感谢您的支持{% else %}欢迎使用{% endif %}'
+    )
+    HTML_TEMPLATE = (
+        '<h1>{{ title }}</h1><p>{{ name }}，您好：</p>'
+        '<ul>{% for item in items %}<li>{{ item }}</li>{% endfor %}</ul>'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='扇出的用户数量，默认1000'
+        )
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:12]
+        tenant = Tenant.objects.create(
+            name=f'benchmark-{suffix}',
+            slug=f'benchmark-{suffix}',
+            subdomain=f'benchmark-{suffix}',
+            contact_email=f'benchmark-{suffix}@example.com'
+        )
+        # 三轮扇出的通知数量不能超过租户每日配额
+        TenantQuota.objects.update_or_create(
+            tenant=tenant,
+            defaults={'max_notifications_per_day': options['users'] * 3}
+        )
+        users = User.objects.bulk_create([
+            User(username=f'benchmark-{suffix}-{index}', email=f'benchmark-{suffix}-{index}@example.com')
+            for index in range(options['users'])
+        ])
+        TenantUser.objects.bulk_create([TenantUser(tenant=tenant, user=user) for user in users])
+        notification_type = NotificationType.objects.create(
+            code=f'benchmark.{suffix}', name='benchmark', category='system'
+        )
+        channel = NotificationChannel.objects.create(
+            code=f'benchmark-{suffix}', name='benchmark', channel_type='in_app'
+        )
+        NotificationTemplate.objects.create(
+            code=f'benchmark.{suffix}', name='benchmark', notification_type=notification_type, channel=channel,
+            subject_template=self.SUBJECT_TEMPLATE, content_template=self.CONTENT_TEMPLATE,
+            html_template=self.HTML_TEMPLATE
+        )
+        scheduled_at = timezone.now() + timedelta(days=1)
+
+        def fan_out():
+            for user in users:
+                NotificationService.create_notification(
+                    tenant.id, user.id, notification_type.code, channel_code=channel.code,
+                    data={'title': 'benchmark', 'name': user.username, 'items': ['a', 'b', 'c'], 'vip': True},
+                    scheduled_at=scheduled_at
+                )
+
+        def fan_out_bulk():
+            NotificationService.create_notifications_bulk(
+                tenant.id, [user.id for user in users], notification_type.code, channel_code=channel.code,
+                data={'title': 'benchmark', 'name': 'benchmark', 'items': ['a', 'b', 'c'], 'vip': True},
+                scheduled_at=scheduled_at
+            )
+
+        max_size = template_cache._max_size
+        try:
+            # 容量为0时每次渲染都重新编译模板
+            template_cache.clear()
+            template_cache._max_size = 0
+            self._report('逐条创建(每次编译)', fan_out, len(users))
+            template_cache._max_size = max_size
+            self._report('逐条创建(编译缓存)', fan_out, len(users))
+            self._report('批量创建(共享数据)', fan_out_bulk, len(users))
+        finally:
+            template_cache._max_size = max_size
+            template_cache.clear()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+            tenant.delete()
+            channel.delete()
+            notification_type.delete()
+
+    def _report(self, label, func, count):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label}: {count}条, 耗时{elapsed:.2f}秒, {count / elapsed:.1f}条/秒")
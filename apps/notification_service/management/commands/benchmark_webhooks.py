@@ -0,0 +1,102 @@
+"""
+Webhook发送性能测试命令
+"""
+
+import time
+import uuid
+import json
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notification_service.services import WebhookService
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """本地Webhook接收端，按设定的延迟返回成功响应"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.server.latency)
+        body = json.dumps({'received': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    """
+    在本地启动Webhook接收端，对比逐条发送与连接池并行发送的吞吐量
+    
+    用法:
+        python manage.py benchmark_webhooks                        # 默认发送200条，接收端延迟20毫秒
+        python manage.py benchmark_webhooks --count 1000 --latency 50
+    """
+    help = '对比Webhook逐条发送与连接池并行发送的吞吐量'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=200,
+            help='发送的通知数量，默认200'
+        )
+        parser.add_argument(
+            '--latency',
+            type=int,
+            default=20,
+            help='接收端响应延迟(毫秒)，默认20'
+        )
+    
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        server.daemon_threads = True
+        server.latency = options['latency'] / 1000
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        
+        url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+        channel = SimpleNamespace(config={'url': url, 'secret': 'benchmark'})
+        notifications = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                tenant_id=uuid.uuid4(),
+                user_id=uuid.uuid4(),
+                notification_type_id=uuid.uuid4(),
+                subject='benchmark',
+                content='benchmark',
+                data={'index': index},
+                created_at=timezone.now(),
+                recipient_address=None,
+                channel=channel
+            )
+            for index in range(options['count'])
+        ]
+        
+        try:
+            self._report('逐条发送', lambda: [WebhookService.send(n) for n in notifications], len(notifications))
+            self._report('并行发送', lambda: self._send_batch(notifications), len(notifications))
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    @staticmethod
+    def _send_batch(notifications):
+        errors = [error for error in WebhookService.send_batch(notifications).values() if error]
+        if errors:
+            raise RuntimeError(errors[0])
+    
+    def _report(self, label, func, count):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label}: {count}条, 耗时{elapsed:.2f}秒, {count / elapsed:.1f}条/秒")
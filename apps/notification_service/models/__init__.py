@@ -7,6 +7,10 @@ from apps.notification_service.models.notification_channel import NotificationCh
 from apps.notification_service.models.notification_template import NotificationTemplate
 from apps.notification_service.models.notification import Notification
 from apps.notification_service.models.user_notification_preference import UserNotificationPreference
+from apps.notification_service.models.user_unread_counter import UserUnreadCounter
+from apps.notification_service.models.broadcast_notification import BroadcastNotification
+from apps.notification_service.models.broadcast_read_state import BroadcastReadState
+from apps.notification_service.models.notification_daily_usage import NotificationDailyUsage
 
 __all__ = [
     'NotificationType',
@@ -14,4 +18,8 @@ __all__ = [
     'NotificationTemplate',
     'Notification',
     'UserNotificationPreference',
+    'UserUnreadCounter',
+    'BroadcastNotification',
+    'BroadcastReadState',
+    'NotificationDailyUsage',
 ]
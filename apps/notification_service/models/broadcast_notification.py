@@ -0,0 +1,102 @@
+"""
+广播通知模型定义
+"""
+
+import uuid
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class BroadcastNotification(models.Model):
+    """
+    广播通知模型
+    
+    面向整个租户或租户内某一角色的系统内通知，只保存一条记录，
+    用户读取通知时再与个人通知合并
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name=_('ID')
+    )
+    tenant = models.ForeignKey(
+        'tenant_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='broadcast_notifications',
+        verbose_name=_('所属租户')
+    )
+    notification_type = models.ForeignKey(
+        'notification_service.NotificationType',
+        on_delete=models.CASCADE,
+        related_name='broadcasts',
+        verbose_name=_('通知类型')
+    )
+    template = models.ForeignKey(
+        'notification_service.NotificationTemplate',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='broadcasts',
+        verbose_name=_('使用模板')
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name=_('通知主题')
+    )
+    content = models.TextField(
+        verbose_name=_('通知内容')
+    )
+    html_content = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name=_('HTML内容')
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_('通知数据')
+    )
+    target_role = models.CharField(
+        max_length=20,
+        blank=True,
+        null=True,
+        verbose_name=_('目标角色'),
+        help_text=_('为空表示租户内所有用户')
+    )
+    created_by = models.ForeignKey(
+        'auth_service.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='created_broadcasts',
+        verbose_name=_('创建人')
+    )
+    published_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_('发布时间')
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('过期时间')
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('创建时间')
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('更新时间')
+    )
+    
+    class Meta:
+        verbose_name = _('广播通知')
+        verbose_name_plural = _('广播通知')
+        ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['tenant', 'published_at']),
+        ]
+    
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,45 @@
+"""
+广播通知阅读状态模型定义
+"""
+
+import uuid
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class BroadcastReadState(models.Model):
+    """
+    广播通知阅读状态模型
+    
+    只为已读的用户保存记录，没有记录即表示未读
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name=_('ID')
+    )
+    broadcast = models.ForeignKey(
+        'notification_service.BroadcastNotification',
+        on_delete=models.CASCADE,
+        related_name='read_states',
+        verbose_name=_('广播通知')
+    )
+    user = models.ForeignKey(
+        'auth_service.User',
+        on_delete=models.CASCADE,
+        related_name='broadcast_read_states',
+        verbose_name=_('用户')
+    )
+    read_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('阅读时间')
+    )
+    
+    class Meta:
+        verbose_name = _('广播通知阅读状态')
+        verbose_name_plural = _('广播通知阅读状态')
+        unique_together = [['broadcast', 'user']]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.broadcast_id}"
@@ -105,6 +105,11 @@ class Notification(models.Model):
         null=True,
         verbose_name=_('错误信息')
     )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('失败次数'),
+        help_text=_('投递失败的次数，超过最大重试次数后标记为发送失败')
+    )
     external_id = models.CharField(
         max_length=255,
         blank=True,
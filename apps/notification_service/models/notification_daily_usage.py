@@ -0,0 +1,47 @@
+"""
+租户每日通知用量模型定义
+"""
+
+import uuid
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class NotificationDailyUsage(models.Model):
+    """
+    租户每日通知用量模型
+    
+    定期从Redis的每日配额计数器对账写入，计数器丢失时用于恢复当天的用量
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name=_('ID')
+    )
+    tenant = models.ForeignKey(
+        'tenant_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='notification_daily_usages',
+        verbose_name=_('所属租户')
+    )
+    date = models.DateField(
+        verbose_name=_('日期')
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('通知数量')
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('更新时间')
+    )
+    
+    class Meta:
+        verbose_name = _('租户每日通知用量')
+        verbose_name_plural = _('租户每日通知用量')
+        unique_together = [['tenant', 'date']]
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.tenant_id} {self.date} - {self.count}"
@@ -54,6 +54,10 @@ class UserNotificationPreference(models.Model):
         default=False,
         verbose_name=_('启用推送通知')
     )
+    webhook_enabled = models.BooleanField(
+        default=True,
+        verbose_name=_('启用Webhook通知')
+    )
     # 免打扰时段设置
     do_not_disturb_enabled = models.BooleanField(
         default=False,
@@ -95,7 +99,7 @@ class UserNotificationPreference(models.Model):
         检查指定渠道是否启用
         
         参数:
-            channel_type: 渠道类型，如 'email', 'sms', 'in_app', 'push'
+            channel_type: 渠道类型，如 'email', 'sms', 'in_app', 'push', 'webhook'
             
         返回:
             Boolean: 是否启用
@@ -108,6 +112,8 @@ class UserNotificationPreference(models.Model):
             return self.in_app_enabled
         elif channel_type == 'push':
             return self.push_enabled
+        elif channel_type == 'webhook':
+            return self.webhook_enabled
         return False
     
     def is_in_do_not_disturb_period(self, current_time=None):
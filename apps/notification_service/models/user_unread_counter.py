@@ -0,0 +1,49 @@
+"""
+用户未读通知计数模型定义
+"""
+
+import uuid
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class UserUnreadCounter(models.Model):
+    """
+    用户未读通知计数模型
+    
+    持久化保存用户的系统内未读通知数量，作为Redis计数器的后备存储
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name=_('ID')
+    )
+    tenant = models.ForeignKey(
+        'tenant_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='user_unread_counters',
+        verbose_name=_('所属租户')
+    )
+    user = models.ForeignKey(
+        'auth_service.User',
+        on_delete=models.CASCADE,
+        related_name='unread_counters',
+        verbose_name=_('用户')
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('未读数量')
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('更新时间')
+    )
+    
+    class Meta:
+        verbose_name = _('用户未读通知计数')
+        verbose_name_plural = _('用户未读通知计数')
+        unique_together = [['tenant', 'user']]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.count}"
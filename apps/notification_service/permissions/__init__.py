@@ -5,7 +5,7 @@
 from apps.notification_service.permissions.notification_permissions import (
     NotificationTypePermission, NotificationChannelPermission,
     NotificationTemplatePermission, NotificationPermission,
-    UserNotificationPreferencePermission
+    UserNotificationPreferencePermission, BroadcastNotificationPermission
 )
 
 __all__ = [
@@ -14,4 +14,5 @@ __all__ = [
     'NotificationTemplatePermission',
     'NotificationPermission',
     'UserNotificationPreferencePermission',
+    'BroadcastNotificationPermission',
 ]
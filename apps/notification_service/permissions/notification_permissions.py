@@ -93,4 +93,29 @@ class UserNotificationPreferencePermission(permissions.BasePermission):
         
         # 平台API只能访问自己的偏好设置或者租户管理员可以访问租户内所有偏好设置
         return (obj.user == request.user or 
-                (request.user.is_tenant_admin and obj.tenant == request.tenant)) 
\ No newline at end of file
+                (request.user.is_tenant_admin and obj.tenant == request.tenant)) 
+
+class BroadcastNotificationPermission(permissions.BasePermission):
+    """广播通知权限"""
+    
+    # 普通用户可执行的操作
+    READER_ACTIONS = ('list', 'retrieve', 'mark_as_read')
+    
+    def has_permission(self, request, view):
+        """检查请求权限"""
+        if not request.user.is_authenticated:
+            return False
+        
+        if view.action in self.READER_ACTIONS:
+            return True
+        
+        # 发布和删除广播需要租户所有者或管理员角色
+        from apps.tenant_service.models import TenantUser
+        
+        tenant = getattr(request, 'tenant', None)
+        return tenant is not None and TenantUser.objects.filter(
+            tenant=tenant,
+            user=request.user,
+            role__in=[TenantUser.ROLE_OWNER, TenantUser.ROLE_ADMIN],
+            is_active=True
+        ).exists()
@@ -13,12 +13,15 @@ from apps.notification_service.serializers.notification_template_serializers imp
 )
 from apps.notification_service.serializers.notification_serializers import (
     NotificationSerializer, NotificationCreateSerializer, NotificationListSerializer, 
-    NotificationMarkReadSerializer
+    NotificationMarkReadSerializer, NotificationBulkCreateSerializer, NotificationInboxSerializer
 )
 from apps.notification_service.serializers.user_notification_preference_serializers import (
     UserNotificationPreferenceSerializer, UserNotificationPreferenceCreateSerializer,
     UserNotificationPreferenceUpdateSerializer
 )
+from apps.notification_service.serializers.broadcast_notification_serializers import (
+    BroadcastNotificationSerializer, BroadcastNotificationCreateSerializer
+)
 
 __all__ = [
     'NotificationTypeSerializer',
@@ -34,7 +37,11 @@ __all__ = [
     'NotificationCreateSerializer',
     'NotificationListSerializer',
     'NotificationMarkReadSerializer',
+    'NotificationBulkCreateSerializer',
+    'NotificationInboxSerializer',
     'UserNotificationPreferenceSerializer',
     'UserNotificationPreferenceCreateSerializer',
     'UserNotificationPreferenceUpdateSerializer',
+    'BroadcastNotificationSerializer',
+    'BroadcastNotificationCreateSerializer',
 ]
@@ -0,0 +1,61 @@
+"""
+广播通知序列化器
+"""
+
+from rest_framework import serializers
+from apps.notification_service.models import BroadcastNotification
+from apps.tenant_service.models import TenantUser
+
+
+class BroadcastNotificationSerializer(serializers.ModelSerializer):
+    """广播通知序列化器"""
+    
+    notification_type_name = serializers.CharField(source='notification_type.name', read_only=True)
+    is_read = serializers.BooleanField(read_only=True, default=False)
+    
+    class Meta:
+        model = BroadcastNotification
+        fields = [
+            'id', 'tenant', 'notification_type', 'notification_type_name', 'template',
+            'subject', 'content', 'html_content', 'data', 'target_role',
+            'created_by', 'published_at', 'expires_at', 'is_read',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class BroadcastNotificationCreateSerializer(serializers.Serializer):
+    """广播通知创建序列化器"""
+    
+    notification_type_code = serializers.CharField(required=True)
+    data = serializers.JSONField(required=False)
+    target_role = serializers.ChoiceField(
+        choices=TenantUser.ROLE_CHOICES,
+        required=False,
+        allow_null=True
+    )
+    published_at = serializers.DateTimeField(required=False)
+    expires_at = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        """验证参数"""
+        published_at = attrs.get('published_at')
+        expires_at = attrs.get('expires_at')
+        if published_at and expires_at and expires_at <= published_at:
+            raise serializers.ValidationError("过期时间必须晚于发布时间")
+        return attrs
+    
+    def create(self, validated_data):
+        """创建广播通知"""
+        from apps.notification_service.services import BroadcastService
+        
+        request = self.context['request']
+        return BroadcastService.create_broadcast(
+            tenant_id=request.tenant.id,
+            notification_type_code=validated_data['notification_type_code'],
+            data=validated_data.get('data'),
+            target_role=validated_data.get('target_role'),
+            created_by=request.user,
+            published_at=validated_data.get('published_at'),
+            expires_at=validated_data.get('expires_at')
+        )
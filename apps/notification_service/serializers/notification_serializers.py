@@ -3,7 +3,7 @@
 """
 
 from rest_framework import serializers
-from apps.notification_service.models import Notification
+from apps.notification_service.models import Notification, BroadcastNotification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -57,6 +57,33 @@ class NotificationCreateSerializer(serializers.Serializer):
         return notification
 
 
+class NotificationBulkCreateSerializer(serializers.Serializer):
+    """通知批量创建序列化器"""
+    
+    user_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=10000
+    )
+    notification_type_code = serializers.CharField(required=True)
+    channel_code = serializers.CharField(required=False, default='in_app')
+    data = serializers.JSONField(required=False)
+    scheduled_at = serializers.DateTimeField(required=False)
+    
+    def create(self, validated_data):
+        """批量创建通知"""
+        from apps.notification_service.services import NotificationService
+        
+        return NotificationService.create_notifications_bulk(
+            tenant_id=self.context['request'].tenant.id,
+            user_ids=validated_data['user_ids'],
+            notification_type_code=validated_data['notification_type_code'],
+            channel_code=validated_data.get('channel_code', 'in_app'),
+            data=validated_data.get('data'),
+            scheduled_at=validated_data.get('scheduled_at')
+        )
+
+
 class NotificationListSerializer(serializers.ModelSerializer):
     """通知列表序列化器"""
     
@@ -70,6 +97,31 @@ class NotificationListSerializer(serializers.ModelSerializer):
         ]
 
 
+class NotificationInboxSerializer(serializers.Serializer):
+    """通知收件箱序列化器，合并个人通知和广播通知"""
+    
+    id = serializers.UUIDField(read_only=True)
+    subject = serializers.CharField(read_only=True)
+    notification_type_name = serializers.CharField(source='notification_type.name', read_only=True)
+    status = serializers.SerializerMethodField()
+    is_read = serializers.BooleanField(read_only=True)
+    created_at = serializers.SerializerMethodField()
+    kind = serializers.SerializerMethodField()
+    
+    def get_status(self, obj):
+        """广播通知没有发送过程，统一视为已发送"""
+        return 'sent' if isinstance(obj, BroadcastNotification) else obj.status
+    
+    def get_created_at(self, obj):
+        """广播通知使用发布时间"""
+        value = obj.published_at if isinstance(obj, BroadcastNotification) else obj.created_at
+        return serializers.DateTimeField().to_representation(value)
+    
+    def get_kind(self, obj):
+        """记录类型: notification 个人通知, broadcast 广播通知"""
+        return 'broadcast' if isinstance(obj, BroadcastNotification) else 'notification'
+
+
 class NotificationMarkReadSerializer(serializers.Serializer):
     """通知标记已读序列化器"""
     
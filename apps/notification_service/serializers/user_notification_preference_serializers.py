@@ -19,7 +19,7 @@ class UserNotificationPreferenceSerializer(serializers.ModelSerializer):
             'id', 'tenant', 'user', 'user_name', 'notification_type', 
             'notification_type_name', 'notification_type_code',
             'email_enabled', 'sms_enabled', 'in_app_enabled', 'push_enabled',
-            'do_not_disturb_enabled', 'do_not_disturb_start', 'do_not_disturb_end',
+            'webhook_enabled', 'do_not_disturb_enabled', 'do_not_disturb_start', 'do_not_disturb_end',
             'urgent_bypass_dnd', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'tenant', 'user', 'notification_type', 'created_at', 'updated_at']
@@ -34,7 +34,7 @@ class UserNotificationPreferenceCreateSerializer(serializers.ModelSerializer):
         model = UserNotificationPreference
         fields = [
             'user', 'notification_type_code', 'email_enabled', 'sms_enabled',
-            'in_app_enabled', 'push_enabled', 'do_not_disturb_enabled',
+            'in_app_enabled', 'push_enabled', 'webhook_enabled', 'do_not_disturb_enabled',
             'do_not_disturb_start', 'do_not_disturb_end', 'urgent_bypass_dnd'
         ]
     
@@ -70,6 +70,6 @@ class UserNotificationPreferenceUpdateSerializer(serializers.ModelSerializer):
         model = UserNotificationPreference
         fields = [
             'email_enabled', 'sms_enabled', 'in_app_enabled', 'push_enabled',
-            'do_not_disturb_enabled', 'do_not_disturb_start', 'do_not_disturb_end',
+            'webhook_enabled', 'do_not_disturb_enabled', 'do_not_disturb_start', 'do_not_disturb_end',
             'urgent_bypass_dnd'
         ] 
\ No newline at end of file
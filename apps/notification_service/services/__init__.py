@@ -3,7 +3,24 @@
 """
 
 from apps.notification_service.services.notification_service import NotificationService
+from apps.notification_service.services.unread_counter_service import UnreadCounterService
+from apps.notification_service.services.notification_stream_service import NotificationStreamService
+from apps.notification_service.services.broadcast_service import BroadcastService
+from apps.notification_service.services.webhook_service import WebhookService, WebhookError
+from apps.notification_service.services.email_service import EmailService, EmailError
+from apps.notification_service.services.notification_quota_service import (
+    NotificationQuotaService, NotificationQuotaExceeded
+)
 
 __all__ = [
     'NotificationService',
+    'UnreadCounterService',
+    'NotificationStreamService',
+    'BroadcastService',
+    'WebhookService',
+    'WebhookError',
+    'EmailService',
+    'EmailError',
+    'NotificationQuotaService',
+    'NotificationQuotaExceeded',
 ]
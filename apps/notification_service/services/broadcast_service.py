@@ -0,0 +1,303 @@
+"""
+广播通知服务实现
+"""
+
+import time
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from apps.notification_service.models import BroadcastNotification, BroadcastReadState
+
+logger = logging.getLogger(__name__)
+
+
+class MergedNotificationList:
+    """
+    个人通知与广播通知的合并列表
+
+    两者均按时间倒序排列，时间相同时个人通知在前；支持切片，可直接交给分页器使用。
+    适用的广播数量B通常很少，全部加载到内存，个人通知只查询分页窗口前后B条，
+    不需要额外的计数查询即可确定每条记录在合并列表中的位置
+    """
+
+    def __init__(self, notifications, broadcasts):
+        self._notifications = notifications
+        self._broadcasts = sorted(broadcasts, key=lambda b: b.published_at, reverse=True)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._notifications.count() + len(self._broadcasts)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        broadcasts = self._broadcasts
+
+        window_start = max(0, start - len(broadcasts))
+        window = list(self._notifications[window_start:stop])
+        window_full = len(window) == stop - window_start
+
+        ranked = []
+        for position, notification in enumerate(window, start=window_start):
+            newer = sum(1 for b in broadcasts if b.published_at > notification.created_at)
+            ranked.append((position + newer, notification))
+        for position, broadcast in enumerate(broadcasts):
+            newer = sum(1 for n in window if n.created_at >= broadcast.published_at)
+            if newer == len(window) and window_full:
+                # 窗口内的个人通知都更新，广播位于窗口之后
+                continue
+            ranked.append((window_start + newer + position, broadcast))
+
+        ranked.sort(key=lambda item: item[0])
+        return [item for rank, item in ranked if start <= rank < stop]
+
+
+class BroadcastService:
+    """
+    广播通知服务类
+
+    广播通知只写入一条记录，阅读状态按用户稀疏保存，
+    用户读取通知时按租户和角色匹配适用的广播
+    """
+
+    CACHE_KEY_PREFIX = 'notification_service:broadcast'
+
+    @staticmethod
+    def _get_user_role(tenant_id, user_id):
+        """
+        获取用户在租户内的角色
+
+        返回:
+            str: 角色，用户不是租户的有效成员时为None
+        """
+        from apps.tenant_service.models import TenantUser
+
+        return TenantUser.objects.filter(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            is_active=True
+        ).values_list('role', flat=True).first()
+
+    @classmethod
+    def _get_version(cls, tenant_id):
+        """获取租户广播版本号，广播变更后版本号变化使未读数量缓存失效"""
+        key = f"{cls.CACHE_KEY_PREFIX}:version:{tenant_id}"
+        version = cache.get(key)
+        if version is None:
+            version = time.time_ns()
+            cache.add(key, version, None)
+        return version
+
+    @classmethod
+    def bump_version(cls, tenant_id):
+        """
+        更新租户广播版本号
+
+        参数:
+            tenant_id: 租户ID
+        """
+        try:
+            cache.set(f"{cls.CACHE_KEY_PREFIX}:version:{tenant_id}", time.time_ns(), None)
+        except Exception as e:
+            logger.warning(f"更新广播版本号失败: {str(e)}")
+
+    @classmethod
+    def _unread_cache_key(cls, tenant_id, user_id):
+        """生成用户广播未读数量缓存键"""
+        return f"{cls.CACHE_KEY_PREFIX}:unread:{tenant_id}:{cls._get_version(tenant_id)}:{user_id}"
+
+    @classmethod
+    def _invalidate_unread_count(cls, tenant_id, user_id):
+        """清除用户广播未读数量缓存"""
+        try:
+            cache.delete(cls._unread_cache_key(tenant_id, user_id))
+        except Exception as e:
+            logger.warning(f"清除广播未读数量缓存失败: {str(e)}")
+
+    @staticmethod
+    def get_broadcasts(tenant_id):
+        """
+        获取租户的全部广播通知
+
+        参数:
+            tenant_id: 租户ID
+
+        返回:
+            QuerySet: 广播通知查询集
+        """
+        return BroadcastNotification.objects.filter(
+            tenant_id=tenant_id
+        ).select_related('notification_type')
+
+    @classmethod
+    def get_applicable_broadcasts(cls, tenant_id, user_id, now=None):
+        """
+        获取适用于用户的广播通知
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+            now: 当前时间
+
+        返回:
+            QuerySet: 广播通知查询集，附带is_read标记
+        """
+        role = cls._get_user_role(tenant_id, user_id) if tenant_id else None
+        if role is None:
+            return BroadcastNotification.objects.none()
+
+        now = now or timezone.now()
+        return BroadcastNotification.objects.filter(
+            Q(target_role__isnull=True) | Q(target_role='') | Q(target_role=role),
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+            tenant_id=tenant_id,
+            published_at__lte=now
+        ).annotate(
+            is_read=Exists(BroadcastReadState.objects.filter(
+                broadcast_id=OuterRef('pk'),
+                user_id=user_id
+            ))
+        ).select_related('notification_type')
+
+    @classmethod
+    def get_unread_count(cls, tenant_id, user_id):
+        """
+        获取用户未读的广播通知数量
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            int: 未读数量
+        """
+        if not tenant_id:
+            return 0
+
+        key = cls._unread_cache_key(tenant_id, user_id)
+        count = cache.get(key)
+        if count is None:
+            count = cls.get_applicable_broadcasts(tenant_id, user_id).filter(is_read=False).count()
+            # 广播的发布和过期时间到达时版本号不会变化，缓存时间决定未读数量的最大延迟
+            cache.set(key, count, getattr(settings, 'NOTIFICATION_BROADCAST_CACHE_TIMEOUT', 300))
+        return count
+
+    @classmethod
+    def create_broadcast(cls, tenant_id, notification_type_code, data=None, target_role=None,
+                         created_by=None, published_at=None, expires_at=None):
+        """
+        创建广播通知
+
+        参数:
+            tenant_id: 租户ID
+            notification_type_code: 通知类型代码
+            data: 通知数据，用于模板渲染
+            target_role: 目标角色，None表示租户内所有用户
+            created_by: 创建人
+            published_at: 发布时间，None表示立即发布
+            expires_at: 过期时间
+
+        返回:
+            BroadcastNotification: 创建的广播通知
+        """
+        from apps.notification_service.services.notification_service import NotificationService
+
+        notification_type, _, template = NotificationService._resolve_delivery_config(
+            tenant_id, notification_type_code, 'in_app'
+        )
+        subject, content, html_content = NotificationService._render_notification_template(
+            template, data or {}
+        )
+
+        broadcast = BroadcastNotification.objects.create(
+            tenant_id=tenant_id,
+            notification_type=notification_type,
+            template=template,
+            subject=subject,
+            content=content,
+            html_content=html_content,
+            data=data or {},
+            target_role=target_role or None,
+            created_by=created_by,
+            published_at=published_at or timezone.now(),
+            expires_at=expires_at
+        )
+
+        logger.info(f"创建广播通知: {broadcast.id}, 租户 {tenant_id}, 目标角色 {target_role or '全部'}")
+        return broadcast
+
+    @classmethod
+    def mark_as_read(cls, broadcast_id, tenant_id, user_id):
+        """
+        将广播通知标记为已读
+
+        参数:
+            broadcast_id: 广播通知ID
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            bool: 是否成功
+        """
+        if not cls.get_applicable_broadcasts(tenant_id, user_id).filter(id=broadcast_id).exists():
+            logger.error(f"广播通知不存在: {broadcast_id}")
+            return False
+
+        BroadcastReadState.objects.get_or_create(broadcast_id=broadcast_id, user_id=user_id)
+        cls._invalidate_unread_count(tenant_id, user_id)
+        return True
+
+    @classmethod
+    def mark_all_as_read(cls, tenant_id, user_id):
+        """
+        将适用于用户的广播通知全部标记为已读
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            int: 标记的广播数量
+        """
+        unread_ids = list(
+            cls.get_applicable_broadcasts(tenant_id, user_id)
+            .filter(is_read=False)
+            .values_list('id', flat=True)
+        )
+        if unread_ids:
+            BroadcastReadState.objects.bulk_create(
+                [BroadcastReadState(broadcast_id=broadcast_id, user_id=user_id)
+                 for broadcast_id in unread_ids],
+                ignore_conflicts=True
+            )
+        cls._invalidate_unread_count(tenant_id, user_id)
+        return len(unread_ids)
+
+    @classmethod
+    def merge_with_notifications(cls, notifications, tenant_id, user_id, is_read=None):
+        """
+        合并个人通知与适用的广播通知
+
+        参数:
+            notifications: 按创建时间倒序排列的个人通知查询集
+            tenant_id: 租户ID
+            user_id: 用户ID
+            is_read: 按阅读状态过滤广播通知，None表示不过滤
+
+        返回:
+            MergedNotificationList: 合并列表
+        """
+        broadcasts = cls.get_applicable_broadcasts(tenant_id, user_id)
+        if is_read is not None:
+            broadcasts = broadcasts.filter(is_read=is_read)
+        return MergedNotificationList(notifications, broadcasts)
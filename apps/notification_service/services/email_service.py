@@ -0,0 +1,203 @@
+"""
+邮件通知渠道实现
+"""
+
+import logging
+from email.utils import formataddr, make_msgid
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.utils import DNS_NAME
+
+logger = logging.getLogger(__name__)
+
+
+class EmailError(Exception):
+    """邮件发送失败"""
+
+
+class EmailService:
+    """
+    邮件通知服务类
+
+    一批邮件通知按渠道分组，同一渠道的邮件复用SMTP连接发送，
+    每发送NOTIFICATION_EMAIL_BATCH_SIZE封邮件重新建立一次连接
+    """
+
+    # 渠道配置中可覆盖的SMTP连接参数
+    CONNECTION_OPTIONS = ('host', 'port', 'username', 'password', 'use_tls', 'use_ssl', 'timeout')
+
+    @classmethod
+    def get_connection(cls, channel):
+        """
+        获取渠道的邮件连接
+
+        参数:
+            channel: 通知渠道对象
+
+        返回:
+            BaseEmailBackend: 邮件后端连接
+        """
+        config = channel.config or {}
+        options = {key: config[key] for key in cls.CONNECTION_OPTIONS if key in config}
+        options.setdefault('timeout', getattr(settings, 'NOTIFICATION_EMAIL_TIMEOUT', 10))
+        return get_connection(fail_silently=False, **options)
+
+    @staticmethod
+    def _get_recipients(notifications):
+        """
+        获取通知的收件地址，没有接收地址的通知使用用户邮箱
+
+        返回:
+            dict: {通知ID: 收件地址}
+        """
+        from apps.auth_service.models import User
+
+        user_ids = {n.user_id for n in notifications if not n.recipient_address}
+        emails = dict(User.objects.filter(id__in=user_ids).values_list('id', 'email')) if user_ids else {}
+        return {n.id: n.recipient_address or emails.get(n.user_id) for n in notifications}
+
+    @staticmethod
+    def _get_senders(notifications):
+        """
+        获取各租户的发件人
+
+        优先使用租户设置的默认通知邮箱，发件人名称取自扩展设置notification_sender_name，
+        租户未设置时为None，由渠道配置或系统默认发件人兜底
+
+        返回:
+            dict: {租户ID: 发件人}
+        """
+        from apps.tenant_service.models import TenantSettings
+
+        senders = {}
+        rows = TenantSettings.objects.filter(
+            tenant_id__in={n.tenant_id for n in notifications},
+            default_notification_email__isnull=False
+        ).exclude(default_notification_email='').values_list(
+            'tenant_id', 'default_notification_email', 'settings_json'
+        )
+        for tenant_id, email, settings_json in rows:
+            name = (settings_json or {}).get('notification_sender_name')
+            senders[tenant_id] = formataddr((name, email)) if name else email
+        return senders
+
+    @staticmethod
+    def build_message(notification, recipient, from_email):
+        """
+        构建邮件
+
+        邮件ID在发送前生成，发送成功后记录为通知的外部ID
+
+        参数:
+            notification: 通知对象
+            recipient: 收件地址
+            from_email: 发件人
+
+        返回:
+            EmailMultiAlternatives: 邮件对象
+        """
+        message = EmailMultiAlternatives(
+            subject=notification.subject,
+            body=notification.content,
+            from_email=from_email,
+            to=[recipient],
+            headers={'Message-ID': make_msgid(domain=DNS_NAME)}
+        )
+        if notification.html_content:
+            message.attach_alternative(notification.html_content, 'text/html')
+        return message
+
+    @classmethod
+    def send(cls, notification):
+        """
+        发送单封邮件通知
+
+        参数:
+            notification: 通知对象
+
+        异常:
+            EmailError: 发送失败
+        """
+        error = cls.send_batch([notification])[notification.id]
+        if error:
+            raise EmailError(error)
+
+    @classmethod
+    def send_batch(cls, notifications):
+        """
+        批量发送邮件通知
+
+        发送成功的通知对象的external_id会被设置为邮件ID
+
+        参数:
+            notifications: 通知对象列表
+
+        返回:
+            dict: {通知ID: 错误信息}，发送成功的通知错误信息为None
+        """
+        batch_size = getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+        recipients = cls._get_recipients(notifications)
+        senders = cls._get_senders(notifications)
+
+        results = {}
+        by_channel = {}
+        for notification in notifications:
+            if not recipients[notification.id]:
+                results[notification.id] = "未找到收件邮箱"
+            else:
+                by_channel.setdefault(notification.channel_id, []).append(notification)
+
+        for channel_notifications in by_channel.values():
+            channel = channel_notifications[0].channel
+            default_sender = (channel.config or {}).get('from_email') or settings.DEFAULT_FROM_EMAIL
+            pending = [
+                (notification, cls.build_message(
+                    notification,
+                    recipients[notification.id],
+                    senders.get(notification.tenant_id) or default_sender
+                ))
+                for notification in channel_notifications
+            ]
+
+            connection = cls.get_connection(channel)
+            try:
+                for start in range(0, len(pending), batch_size):
+                    cls._send_chunk(connection, pending[start:start + batch_size], results)
+            except Exception as e:
+                # 建立连接失败，未发送的邮件全部记为失败
+                logger.error(f"邮件连接失败: 渠道 {channel.code}, {str(e)}")
+                for notification, _ in pending:
+                    results.setdefault(notification.id, f"邮件连接失败: {str(e)}")
+            finally:
+                connection.close()
+
+        return results
+
+    @staticmethod
+    def _send_chunk(connection, chunk, results):
+        """
+        通过同一连接逐封发送一批邮件
+
+        逐封调用send_messages以得到每封邮件的发送结果，避免批次中途出错时重复发送已投递的邮件；
+        连接已打开时send_messages不会重新建立连接
+
+        参数:
+            connection: 邮件连接
+            chunk: (通知, 邮件)列表
+            results: 发送结果，原地更新
+        """
+        connection.open()
+        for notification, message in chunk:
+            try:
+                if not connection.send_messages([message]):
+                    raise EmailError("邮件未被发送")
+            except Exception as e:
+                results[notification.id] = str(e)
+                # 出错后连接状态未知，重新建立连接
+                connection.close()
+                connection.open()
+            else:
+                notification.external_id = message.extra_headers['Message-ID']
+                results[notification.id] = None
+        # 每批结束后断开连接，避免单个连接发送过多邮件被服务器限制
+        connection.close()
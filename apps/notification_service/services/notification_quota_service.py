@@ -0,0 +1,295 @@
+"""
+租户通知配额服务实现
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from apps.notification_service.models import Notification, NotificationDailyUsage
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQuotaExceeded(Exception):
+    """租户当日通知数量超出配额"""
+
+
+class NotificationQuotaService:
+    """
+    租户通知配额服务类
+
+    按租户和日期维护Redis计数器，创建通知前通过INCRBY原子地占用配额，
+    超出配额的部分立即退回；计数器定期对账写入数据库，Redis数据丢失时从数据库恢复；
+    Redis不可用时改为锁定数据库中的当日用量记录占用配额，配额在故障期间仍然生效
+    """
+
+    CACHE_KEY_PREFIX = 'notification_service:quota'
+
+    # 计数器保留时间，覆盖当天及次日的对账
+    COUNTER_TIMEOUT = 2 * 86400
+
+    @classmethod
+    def _counter_key(cls, tenant_id, day):
+        """生成每日计数器缓存键"""
+        return f"{cls.CACHE_KEY_PREFIX}:usage:{tenant_id}:{day.isoformat()}"
+
+    @classmethod
+    def _limit_key(cls, tenant_id):
+        """生成配额上限缓存键"""
+        return f"{cls.CACHE_KEY_PREFIX}:limit:{tenant_id}"
+
+    @classmethod
+    def get_daily_limit(cls, tenant_id):
+        """
+        获取租户每日通知配额
+
+        参数:
+            tenant_id: 租户ID
+
+        返回:
+            int: 每日最大通知数，租户没有配额记录时为None，表示不限制
+        """
+        from apps.tenant_service.models import TenantQuota
+
+        key = cls._limit_key(tenant_id)
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"读取通知配额缓存失败: {str(e)}")
+            cached = None
+        if cached is not None:
+            # 缓存中用-1表示不限制，避免每次都查询数据库
+            return None if cached < 0 else cached
+
+        limit = TenantQuota.objects.filter(
+            tenant_id=tenant_id
+        ).values_list('max_notifications_per_day', flat=True).first()
+        try:
+            cache.set(
+                key,
+                -1 if limit is None else limit,
+                getattr(settings, 'NOTIFICATION_QUOTA_LIMIT_CACHE_TIMEOUT', 60)
+            )
+        except Exception as e:
+            logger.warning(f"写入通知配额缓存失败: {str(e)}")
+        return limit
+
+    @classmethod
+    def invalidate_limit(cls, tenant_id):
+        """
+        清除租户配额上限缓存
+
+        参数:
+            tenant_id: 租户ID
+        """
+        try:
+            cache.delete(cls._limit_key(tenant_id))
+        except Exception as e:
+            logger.warning(f"清除通知配额缓存失败: {str(e)}")
+
+    @staticmethod
+    def _load_usage(tenant_id, day):
+        """
+        从数据库加载租户当天的通知用量
+
+        优先使用对账写入的用量记录，没有记录时统计当天创建的通知数量
+        """
+        count = NotificationDailyUsage.objects.filter(
+            tenant_id=tenant_id,
+            date=day
+        ).values_list('count', flat=True).first()
+        if count is not None:
+            return count
+
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        return Notification.objects.filter(
+            tenant_id=tenant_id,
+            created_at__gte=day_start,
+            created_at__lt=day_start + timedelta(days=1)
+        ).count()
+
+    @classmethod
+    def _incr(cls, tenant_id, day, amount):
+        """原子地增加计数器，计数器不存在时先从数据库初始化"""
+        key = cls._counter_key(tenant_id, day)
+        try:
+            return cache.incr(key, amount)
+        except ValueError:
+            cache.add(key, cls._load_usage(tenant_id, day), cls.COUNTER_TIMEOUT)
+            return cache.incr(key, amount)
+
+    @classmethod
+    def _acquire_from_db(cls, tenant_id, day, amount, limit):
+        """
+        通过数据库用量记录占用配额，Redis不可用时使用
+
+        行锁保证并发请求不会超额分配
+
+        返回:
+            int: 准入的通知数量
+        """
+        with transaction.atomic():
+            NotificationDailyUsage.objects.get_or_create(
+                tenant_id=tenant_id,
+                date=day,
+                defaults={'count': cls._load_usage(tenant_id, day)}
+            )
+            usage = NotificationDailyUsage.objects.select_for_update().get(tenant_id=tenant_id, date=day)
+            admitted = max(min(amount, limit - usage.count), 0)
+            if admitted:
+                NotificationDailyUsage.objects.filter(pk=usage.pk).update(
+                    count=F('count') + admitted,
+                    updated_at=timezone.now()
+                )
+        return admitted
+
+    @classmethod
+    def acquire(cls, tenant_id, amount=1):
+        """
+        占用租户当日的通知配额
+
+        先按请求数量INCRBY，再将超出配额的部分DECRBY退回，
+        并发请求之间不会超额分配，一次操作即可完成批量请求的部分准入
+
+        参数:
+            tenant_id: 租户ID
+            amount: 请求的通知数量
+
+        返回:
+            int: 准入的通知数量，0到amount之间
+        """
+        if amount <= 0:
+            return 0
+
+        limit = cls.get_daily_limit(tenant_id)
+        if limit is None:
+            return amount
+
+        day = timezone.localdate()
+        try:
+            used = cls._incr(tenant_id, day, amount)
+            excess = min(used - limit, amount)
+            if excess > 0:
+                cache.decr(cls._counter_key(tenant_id, day), excess)
+            admitted = amount - max(excess, 0)
+        except Exception as e:
+            # Redis不可用时改用数据库用量记录，配额仍然生效
+            logger.warning(f"通知配额计数器不可用，使用数据库用量记录: {str(e)}")
+            admitted = cls._acquire_from_db(tenant_id, day, amount, limit)
+
+        if admitted < amount:
+            logger.warning(
+                f"租户 {tenant_id} 当日通知配额不足: 请求 {amount} 条, 准入 {admitted} 条"
+            )
+        return admitted
+
+    @classmethod
+    def release(cls, tenant_id, amount=1):
+        """
+        退回占用但未使用的通知配额
+
+        参数:
+            tenant_id: 租户ID
+            amount: 退回的通知数量
+        """
+        if amount <= 0:
+            return
+
+        if cls.get_daily_limit(tenant_id) is None:
+            return
+
+        day = timezone.localdate()
+        try:
+            cache.decr(cls._counter_key(tenant_id, day), amount)
+        except ValueError:
+            pass
+        except Exception as e:
+            # Redis不可用时退回到数据库用量记录，与acquire的降级路径对应
+            logger.warning(f"退回通知配额失败，使用数据库用量记录: {str(e)}")
+            NotificationDailyUsage.objects.filter(tenant_id=tenant_id, date=day).update(
+                count=Greatest(F('count') - amount, 0),
+                updated_at=timezone.now()
+            )
+
+    @classmethod
+    def get_usage(cls, tenant_id):
+        """
+        获取租户当日已使用的通知数量
+
+        参数:
+            tenant_id: 租户ID
+
+        返回:
+            int: 已使用数量
+        """
+        day = timezone.localdate()
+        count = cache.get(cls._counter_key(tenant_id, day))
+        return cls._load_usage(tenant_id, day) if count is None else count
+
+    @classmethod
+    def reconcile(cls):
+        """
+        将当天和前一天的Redis计数器写入数据库
+
+        数据库中的用量大于计数器时（Redis故障期间改用数据库占用配额），保留较大值并补齐计数器
+
+        返回:
+            int: 写入的用量记录数量
+        """
+        from apps.tenant_service.models import TenantQuota
+
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 1000)
+        today = timezone.localdate()
+        days = [today - timedelta(days=1), today]
+
+        tenant_ids = list(TenantQuota.objects.values_list('tenant_id', flat=True))
+        usages = []
+        for start in range(0, len(tenant_ids), batch_size):
+            keys = {
+                cls._counter_key(tenant_id, day): (tenant_id, day)
+                for tenant_id in tenant_ids[start:start + batch_size]
+                for day in days
+            }
+            counters = cache.get_many(list(keys))
+            if not counters:
+                continue
+            # Redis故障期间的用量记在数据库中，取两者较大值并同步回计数器
+            stored = {
+                (tenant_id, day): count
+                for tenant_id, day, count in NotificationDailyUsage.objects.filter(
+                    tenant_id__in={tenant_id for tenant_id, _ in keys.values()},
+                    date__in=days
+                ).values_list('tenant_id', 'date', 'count')
+            }
+            for key, count in counters.items():
+                tenant_id, day = keys[key]
+                count = max(count, 0)
+                stored_count = stored.get((tenant_id, day), 0)
+                if stored_count > count:
+                    try:
+                        cache.incr(key, stored_count - count)
+                    except ValueError:
+                        pass
+                    count = stored_count
+                usages.append(NotificationDailyUsage(tenant_id=tenant_id, date=day, count=count))
+
+        # MySQL不支持指定冲突列，按唯一键冲突更新(ON DUPLICATE KEY UPDATE)
+        unique_fields = None
+        if connection.features.supports_update_conflicts_with_target:
+            unique_fields = ['tenant', 'date']
+
+        NotificationDailyUsage.objects.bulk_create(
+            usages,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['count', 'updated_at']
+        )
+
+        logger.info(f"通知配额用量对账完成: {len(usages)} 条记录")
+        return len(usages)
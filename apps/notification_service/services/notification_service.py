@@ -2,15 +2,26 @@
 通知服务实现
 """
 
+import random
 import logging
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.template import Template, Context
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
 from apps.notification_service.models import (
     NotificationType, NotificationChannel, NotificationTemplate, 
     Notification, UserNotificationPreference
 )
+from apps.notification_service.services.template_cache import template_cache
+from apps.notification_service.services.unread_counter_service import UnreadCounterService
+from apps.notification_service.services.notification_stream_service import NotificationStreamService
+from apps.notification_service.services.broadcast_service import BroadcastService
+from apps.notification_service.services.webhook_service import WebhookService
+from apps.notification_service.services.email_service import EmailService
+from apps.notification_service.services.notification_quota_service import (
+    NotificationQuotaService, NotificationQuotaExceeded
+)
 
 logger = logging.getLogger(__name__)
 
@@ -176,6 +187,86 @@ class NotificationService:
             
         return queryset
     
+    @staticmethod
+    def _resolve_delivery_config(tenant_id, notification_type_code, channel_code):
+        """
+        解析通知类型、渠道和模板
+        
+        参数:
+            tenant_id: 租户ID
+            notification_type_code: 通知类型代码
+            channel_code: 通知渠道代码
+        
+        返回:
+            tuple: (通知类型, 通知渠道, 通知模板)
+        """
+        # 获取通知类型
+        notification_type = NotificationType.objects.get(code=notification_type_code, is_active=True)
+        
+        # 获取通知渠道
+        channel = NotificationChannel.objects.filter(
+            code=channel_code,
+            is_active=True
+        ).filter(
+            # 优先使用租户特定渠道，如果没有则使用系统渠道
+            models.Q(tenant_id=tenant_id) | models.Q(tenant__isnull=True)
+        ).first()
+        
+        if not channel:
+            raise ValueError(f"找不到有效的通知渠道: {channel_code}")
+        
+        # 获取通知模板
+        template = NotificationTemplate.objects.filter(
+            notification_type=notification_type,
+            channel=channel,
+            is_active=True
+        ).filter(
+            # 优先使用租户特定模板，如果没有则使用系统模板
+            models.Q(tenant_id=tenant_id) | models.Q(tenant__isnull=True)
+        ).first()
+        
+        if not template:
+            raise ValueError(f"找不到有效的通知模板: {notification_type_code} - {channel_code}")
+        
+        return notification_type, channel, template
+    
+    @staticmethod
+    def _should_defer_for_do_not_disturb(user_preference, notification_type, current_time=None):
+        """
+        检查通知是否因免打扰而需要延迟发送
+        
+        参数:
+            user_preference: 用户通知偏好设置
+            notification_type: 通知类型
+            current_time: 当前时间，默认为系统当前时间
+        
+        返回:
+            bool: 是否需要延迟发送
+        """
+        return (user_preference.is_in_do_not_disturb_period(current_time) and 
+                not (notification_type.priority == 'urgent' and user_preference.urgent_bypass_dnd))
+    
+    @staticmethod
+    def _get_do_not_disturb_end(user_preference, now=None):
+        """
+        计算免打扰结束时间
+        
+        参数:
+            user_preference: 用户通知偏好设置
+            now: 当前本地时间，默认为系统当前时间
+        
+        返回:
+            datetime: 免打扰结束时间
+        """
+        now = now or timezone.localtime()
+        end_time = user_preference.do_not_disturb_end
+        return timezone.make_aware(
+            timezone.datetime.combine(
+                now.date() + timezone.timedelta(days=1 if now.time() > end_time else 0),
+                end_time
+            )
+        )
+    
     @classmethod
     def create_notification(cls, tenant_id, user_id, notification_type_code, 
                           channel_code='in_app', data=None, scheduled_at=None):
@@ -192,35 +283,14 @@ class NotificationService:
         
         返回:
             Notification: 创建的通知对象
+        
+        异常:
+            NotificationQuotaExceeded: 租户当日通知数量超出配额
         """
         try:
-            # 获取通知类型
-            notification_type = NotificationType.objects.get(code=notification_type_code, is_active=True)
-            
-            # 获取通知渠道
-            channel = NotificationChannel.objects.filter(
-                code=channel_code,
-                is_active=True
-            ).filter(
-                # 优先使用租户特定渠道，如果没有则使用系统渠道
-                models.Q(tenant_id=tenant_id) | models.Q(tenant__isnull=True)
-            ).first()
-            
-            if not channel:
-                raise ValueError(f"找不到有效的通知渠道: {channel_code}")
-            
-            # 获取通知模板
-            template = NotificationTemplate.objects.filter(
-                notification_type=notification_type,
-                channel=channel,
-                is_active=True
-            ).filter(
-                # 优先使用租户特定模板，如果没有则使用系统模板
-                models.Q(tenant_id=tenant_id) | models.Q(tenant__isnull=True)
-            ).first()
-            
-            if not template:
-                raise ValueError(f"找不到有效的通知模板: {notification_type_code} - {channel_code}")
+            notification_type, channel, template = cls._resolve_delivery_config(
+                tenant_id, notification_type_code, channel_code
+            )
             
             # 检查用户通知偏好设置
             user_preference = UserNotificationPreference.objects.filter(
@@ -243,31 +313,158 @@ class NotificationService:
                 return None
             
             # 检查是否在免打扰时段内
-            if (user_preference.is_in_do_not_disturb_period() and 
-                not (notification_type.priority == 'urgent' and user_preference.urgent_bypass_dnd)):
+            if cls._should_defer_for_do_not_disturb(user_preference, notification_type):
                 logger.info(f"用户 {user_id} 处于免打扰时段，通知已延迟")
                 # 如果在免打扰时段内，设置为延迟发送
                 if not scheduled_at:
-                    # 计算免打扰结束时间
-                    now = timezone.localtime()
-                    end_time = user_preference.do_not_disturb_end
-                    scheduled_at = timezone.make_aware(
-                        timezone.datetime.combine(
-                            now.date() + timezone.timedelta(days=1 if now.time() > end_time else 0),
-                            end_time
-                        )
-                    )
+                    scheduled_at = cls._get_do_not_disturb_end(user_preference)
+            
+            # 占用租户当日通知配额
+            if not NotificationQuotaService.acquire(tenant_id):
+                raise NotificationQuotaExceeded(f"租户 {tenant_id} 当日通知数量已达上限")
+            
+            # 立即发送的通知同样设置计划发送时间，投递消息丢失时由调度器到期后补发
+            immediate = not scheduled_at
             
             # 准备通知数据
             context_data = data or {}
             
-            # 渲染模板
-            subject = cls._render_template(template.subject_template, context_data)
-            content = cls._render_template(template.content_template, context_data)
-            html_content = cls._render_template(template.html_template, context_data) if template.html_template else None
+            try:
+                # 渲染模板
+                subject, content, html_content = cls._render_notification_template(template, context_data)
+                
+                # 创建通知记录
+                notification = Notification.objects.create(
+                    tenant_id=tenant_id,
+                    user_id=user_id,
+                    notification_type=notification_type,
+                    channel=channel,
+                    template=template,
+                    subject=subject,
+                    content=content,
+                    html_content=html_content,
+                    data=data or {},
+                    status='pending',
+                    scheduled_at=scheduled_at or cls.get_enqueue_deadline()
+                )
+            except Exception:
+                NotificationQuotaService.release(tenant_id)
+                raise
+            
+            # 事务提交后再更新未读计数，回滚时计数不会偏高
+            if channel.channel_type == 'in_app':
+                transaction.on_commit(lambda: UnreadCounterService.increment(tenant_id, user_id))
+            
+            # 如果没有设置计划发送时间，则在事务提交后交给对应渠道的投递队列
+            if immediate:
+                transaction.on_commit(
+                    lambda: cls.enqueue_notifications([str(notification.id)], channel.channel_type)
+                )
+            
+            return notification
+            
+        except NotificationQuotaExceeded:
+            logger.warning(f"租户 {tenant_id} 当日通知数量已达上限，通知未创建")
+            raise
+        except Exception as e:
+            logger.error(f"创建通知失败: {str(e)}", exc_info=True)
+            raise
+    
+    @classmethod
+    def create_notifications_bulk(cls, tenant_id, user_ids, notification_type_code,
+                                  channel_code='in_app', data=None, scheduled_at=None):
+        """
+        批量创建通知
+        
+        通知类型、渠道和模板只解析一次，用户偏好设置一次性预加载，
+        通知记录分批插入，发送交给异步任务处理；
+        租户当日配额不足时只为剩余配额内的用户创建通知
+        
+        参数:
+            tenant_id: 租户ID
+            user_ids: 用户ID列表
+            notification_type_code: 通知类型代码
+            channel_code: 通知渠道代码，默认为系统内通知
+            data: 通知数据，用于模板渲染，所有用户共享
+            scheduled_at: 计划发送时间，None表示立即发送
+        
+        返回:
+            dict: 创建结果，包含创建、延迟、跳过以及超出配额的数量
+        """
+        from apps.tenant_service.models import TenantUser
+        
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 1000)
+        
+        notification_type, channel, template = cls._resolve_delivery_config(
+            tenant_id, notification_type_code, channel_code
+        )
+        
+        # 去重并只保留租户内的有效用户
+        requested_ids = {str(user_id) for user_id in user_ids}
+        member_ids = set()
+        requested_list = list(requested_ids)
+        for start in range(0, len(requested_list), batch_size):
+            member_ids.update(
+                str(user_id) for user_id in TenantUser.objects.filter(
+                    tenant_id=tenant_id,
+                    user_id__in=requested_list[start:start + batch_size],
+                    is_active=True
+                ).values_list('user_id', flat=True)
+            )
+        
+        # 预加载用户偏好设置
+        preferences = {}
+        member_list = list(member_ids)
+        for start in range(0, len(member_list), batch_size):
+            for preference in UserNotificationPreference.objects.filter(
+                tenant_id=tenant_id,
+                notification_type=notification_type,
+                user_id__in=member_list[start:start + batch_size]
+            ):
+                preferences[str(preference.user_id)] = preference
+        
+        # 为缺少偏好设置的用户批量创建默认设置
+        missing_preferences = [
+            UserNotificationPreference(
+                tenant_id=tenant_id,
+                user_id=user_id,
+                notification_type=notification_type
+            )
+            for user_id in member_ids if user_id not in preferences
+        ]
+        if missing_preferences:
+            UserNotificationPreference.objects.bulk_create(
+                missing_preferences,
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            for preference in missing_preferences:
+                preferences[str(preference.user_id)] = preference
+        
+        # 所有用户共享同一份数据，模板只需渲染一次
+        context_data = data or {}
+        subject, content, html_content = cls._render_notification_template(template, context_data)
+        
+        now = timezone.localtime()
+        # 立即发送的通知同样设置计划发送时间，投递消息丢失时由调度器到期后补发
+        enqueue_deadline = cls.get_enqueue_deadline()
+        notifications = []
+        immediate = []
+        skipped = len(requested_ids) - len(member_ids)
+        for user_id in member_ids:
+            user_preference = preferences[user_id]
+            
+            if not user_preference.is_channel_enabled(channel.channel_type):
+                skipped += 1
+                continue
             
-            # 创建通知记录
-            notification = Notification.objects.create(
+            user_scheduled_at = scheduled_at
+            if not user_scheduled_at and cls._should_defer_for_do_not_disturb(
+                user_preference, notification_type, now
+            ):
+                user_scheduled_at = cls._get_do_not_disturb_end(user_preference, now)
+            
+            notifications.append(Notification(
                 tenant_id=tenant_id,
                 user_id=user_id,
                 notification_type=notification_type,
@@ -278,23 +475,267 @@ class NotificationService:
                 html_content=html_content,
                 data=data or {},
                 status='pending',
-                scheduled_at=scheduled_at
+                scheduled_at=user_scheduled_at or enqueue_deadline
+            ))
+            immediate.append(not user_scheduled_at)
+        
+        # 一次占用整批的配额，超出部分不创建
+        admitted = NotificationQuotaService.acquire(tenant_id, len(notifications))
+        over_quota = len(notifications) - admitted
+        notifications = notifications[:admitted]
+        
+        immediate_ids = []
+        try:
+            with transaction.atomic():
+                for start in range(0, len(notifications), batch_size):
+                    Notification.objects.bulk_create(notifications[start:start + batch_size])
+                
+                immediate_ids = [
+                    str(n.id) for n, is_immediate in zip(notifications, immediate) if is_immediate
+                ]
+                if immediate_ids:
+                    transaction.on_commit(
+                        lambda: cls.enqueue_notifications(immediate_ids, channel.channel_type)
+                    )
+        except Exception:
+            NotificationQuotaService.release(tenant_id, admitted)
+            raise
+        
+        if channel.channel_type == 'in_app':
+            user_ids = [n.user_id for n in notifications]
+            transaction.on_commit(lambda: UnreadCounterService.increment_many(tenant_id, user_ids))
+        
+        logger.info(
+            f"批量创建通知: 类型 {notification_type_code}, 渠道 {channel_code}, "
+            f"创建 {len(notifications)} 条, 跳过 {skipped} 个用户, 超出配额 {over_quota} 个用户"
+        )
+        
+        return {
+            'created': len(notifications),
+            'queued': len(immediate_ids),
+            'scheduled': len(notifications) - len(immediate_ids),
+            'skipped': skipped,
+            'over_quota': over_quota,
+        }
+    
+    @staticmethod
+    def get_delivery_queue(channel_type):
+        """
+        获取渠道对应的投递队列
+        
+        参数:
+            channel_type: 渠道类型
+        
+        返回:
+            str: 队列名称
+        """
+        queues = getattr(settings, 'NOTIFICATION_CHANNEL_QUEUES', {})
+        return queues.get(channel_type, f"notifications.{channel_type}")
+    
+    @staticmethod
+    def get_retry_delay(attempt):
+        """
+        计算重试延迟，按指数退避并附加随机抖动
+        
+        参数:
+            attempt: 已失败的投递次数，从0开始
+        
+        返回:
+            int: 延迟秒数
+        """
+        backoff = getattr(settings, 'NOTIFICATION_RETRY_BACKOFF', 30)
+        backoff_max = getattr(settings, 'NOTIFICATION_RETRY_BACKOFF_MAX', 3600)
+        delay = min(backoff * (2 ** attempt), backoff_max)
+        return delay + random.randint(0, max(delay // 10, 1))
+    
+    @staticmethod
+    def get_enqueue_deadline():
+        """
+        获取立即发送的通知的计划发送时间
+        
+        立即发送的通知创建后直接交给投递队列，计划发送时间只用于兜底：
+        投递消息丢失时，调度器在该时间后领取仍处于待发送状态的通知
+        
+        返回:
+            datetime: 计划发送时间
+        """
+        return timezone.now() + timezone.timedelta(
+            seconds=getattr(settings, 'NOTIFICATION_ENQUEUE_GRACE', 60)
+        )
+    
+    @classmethod
+    def enqueue_notifications(cls, notification_ids, channel_type, claimed_at=None):
+        """
+        将通知交给对应渠道的投递队列
+        
+        参数:
+            notification_ids: 通知ID列表
+            channel_type: 渠道类型
+            claimed_at: 调度器领取通知的时间，为空表示通知尚未被领取
+        """
+        from apps.notification_service.tasks import send_notifications
+        
+        batch_size = getattr(settings, 'NOTIFICATION_SEND_BATCH_SIZE', 100)
+        queue = cls.get_delivery_queue(channel_type)
+        for start in range(0, len(notification_ids), batch_size):
+            send_notifications.apply_async(
+                kwargs={
+                    'notification_ids': notification_ids[start:start + batch_size],
+                    'channel_type': channel_type,
+                    'claimed_at': claimed_at.isoformat() if claimed_at else None,
+                },
+                queue=queue
             )
+    
+    @staticmethod
+    def claim_due_notifications(batch_size=None, now=None):
+        """
+        领取一批到期的计划通知
+        
+        使用 SELECT ... FOR UPDATE SKIP LOCKED 锁定到期的待发送通知，并通过一次UPDATE
+        标记为发送中，多个调度进程并发执行时各自领取不同的通知；
+        不支持 SKIP LOCKED 的数据库退化为阻塞行锁；
+        领取的通知更新时间设置为now，投递任务据此确认通知仍属于本次领取
+        
+        参数:
+            batch_size: 每批领取的数量
+            now: 当前时间，同时作为领取时间
+        
+        返回:
+            dict: {渠道类型: [通知ID]}
+        """
+        batch_size = batch_size or getattr(settings, 'NOTIFICATION_DISPATCH_BATCH_SIZE', 500)
+        now = now or timezone.now()
+        
+        with transaction.atomic():
+            queryset = Notification.objects.filter(
+                status='pending',
+                scheduled_at__lte=now
+            ).order_by('scheduled_at')
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            elif connection.features.has_select_for_update:
+                queryset = queryset.select_for_update()
             
-            # 如果没有设置计划发送时间，则立即发送
-            if not scheduled_at:
-                cls.send_notification(notification)
-            
-            return notification
-            
-        except Exception as e:
-            logger.error(f"创建通知失败: {str(e)}", exc_info=True)
-            raise
+            claimed_ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not claimed_ids:
+                return {}
+            Notification.objects.filter(id__in=claimed_ids, status='pending').update(
+                status='sending',
+                updated_at=now
+            )
+        
+        batches = {}
+        for notification_id, channel_type in Notification.objects.filter(
+            id__in=claimed_ids
+        ).values_list('id', 'channel__channel_type'):
+            batches.setdefault(channel_type, []).append(str(notification_id))
+        return batches
+    
+    @staticmethod
+    def reset_stale_notifications(timeout=None, now=None):
+        """
+        将发送超时的通知恢复为待发送
+        
+        调度器领取后投递消息丢失，或worker在发送过程中退出时，通知会一直停留在发送中状态；
+        超过NOTIFICATION_SENDING_TIMEOUT仍未完成的通知恢复为待发送并立即到期，由调度器重新投递
+        
+        参数:
+            timeout: 发送超时时间(秒)
+            now: 当前时间
+        
+        返回:
+            int: 恢复的通知数量
+        """
+        timeout = timeout or getattr(settings, 'NOTIFICATION_SENDING_TIMEOUT', 600)
+        now = now or timezone.now()
+        
+        reset = Notification.objects.filter(
+            status='sending',
+            updated_at__lt=now - timezone.timedelta(seconds=timeout)
+        ).update(status='pending', scheduled_at=now, updated_at=now)
+        
+        if reset:
+            logger.warning(f"恢复发送超时的通知: {reset} 条")
+        return reset
     
     @classmethod
-    def send_notification(cls, notification):
+    def dispatch_scheduled_notifications(cls, max_batches=None):
+        """
+        将到期的计划通知交给投递队列
+        
+        调度前先恢复发送超时的通知，使其随本次调度重新投递
+        
+        参数:
+            max_batches: 单次调度最多领取的批次数
+        
+        返回:
+            int: 调度的通知数量
+        """
+        max_batches = max_batches or getattr(settings, 'NOTIFICATION_DISPATCH_MAX_BATCHES', 20)
+        
+        cls.reset_stale_notifications()
+        
+        dispatched = 0
+        for _ in range(max_batches):
+            claimed_at = timezone.now()
+            batches = cls.claim_due_notifications(now=claimed_at)
+            if not batches:
+                break
+            for channel_type, notification_ids in batches.items():
+                cls.enqueue_notifications(notification_ids, channel_type, claimed_at=claimed_at)
+                dispatched += len(notification_ids)
+        
+        if dispatched:
+            logger.info(f"调度计划通知: {dispatched} 条")
+        return dispatched
+    
+    @staticmethod
+    def _claim_notifications(notification_ids, claimed_at=None):
+        """
+        将待发送的通知标记为发送中
+        
+        行锁保证同一通知被重复投递时只有一个worker能领取；
+        已被调度器领取的通知只有更新时间仍等于领取时间时才能领取，
+        重复投递的消息或超时恢复后重新调度的旧消息不会再次发送
+        
+        参数:
+            notification_ids: 通知ID列表
+            claimed_at: 调度器领取通知的时间，为空表示领取待发送的通知
+        
+        返回:
+            list: 领取成功的通知对象
         """
-        发送通知
+        if claimed_at:
+            if isinstance(claimed_at, str):
+                claimed_at = parse_datetime(claimed_at)
+            queryset = Notification.objects.filter(
+                id__in=notification_ids,
+                status='sending',
+                updated_at=claimed_at
+            )
+        else:
+            queryset = Notification.objects.filter(id__in=notification_ids, status='pending')
+        
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            elif connection.features.has_select_for_update:
+                queryset = queryset.select_for_update()
+            claimed_ids = list(queryset.values_list('id', flat=True))
+            if not claimed_ids:
+                return []
+            Notification.objects.filter(id__in=claimed_ids).update(
+                status='sending',
+                updated_at=timezone.now()
+            )
+        
+        return list(Notification.objects.filter(id__in=claimed_ids).select_related('channel'))
+    
+    @classmethod
+    def _dispatch_to_channel(cls, notification):
+        """
+        根据渠道类型调用不同的发送方法
         
         参数:
             notification: 通知对象
@@ -302,51 +743,137 @@ class NotificationService:
         返回:
             bool: 是否发送成功
         """
-        try:
-            # 更新通知状态为发送中
-            notification.status = 'sending'
-            notification.save(update_fields=['status', 'updated_at'])
-            
-            # 根据渠道类型调用不同的发送方法
-            channel_type = notification.channel.channel_type
-            
-            if channel_type == 'email':
-                success = cls._send_email_notification(notification)
-            elif channel_type == 'sms':
-                success = cls._send_sms_notification(notification)
-            elif channel_type == 'in_app':
-                success = cls._send_in_app_notification(notification)
-            elif channel_type == 'push':
-                success = cls._send_push_notification(notification)
-            elif channel_type == 'webhook':
-                success = cls._send_webhook_notification(notification)
+        channel_type = notification.channel.channel_type
+        
+        if channel_type == 'email':
+            return cls._send_email_notification(notification)
+        elif channel_type == 'sms':
+            return cls._send_sms_notification(notification)
+        elif channel_type == 'in_app':
+            return cls._send_in_app_notification(notification)
+        elif channel_type == 'push':
+            return cls._send_push_notification(notification)
+        elif channel_type == 'webhook':
+            return cls._send_webhook_notification(notification)
+        else:
+            raise ValueError(f"不支持的通知渠道类型: {channel_type}")
+    
+    @classmethod
+    def deliver_notifications(cls, notification_ids, final=False, claimed_at=None):
+        """
+        批量投递通知
+        
+        领取待发送的通知并调用渠道发送，邮件通知复用SMTP连接批量发送，
+        Webhook通知通过线程池并行发送，其他渠道逐条发送，发送结果按状态合并为批量UPDATE写回；
+        失败次数记录在通知上，未超过最大重试次数的通知恢复为待发送，
+        并按指数退避推迟计划发送时间，由调度器到期后重新投递
+        
+        参数:
+            notification_ids: 通知ID列表
+            final: 是否不再重试，是则失败的通知直接标记为发送失败
+            claimed_at: 调度器领取通知的时间，为空表示通知尚未被领取
+        
+        返回:
+            dict: 投递结果，包含成功数量、最终失败的通知ID（及按投递次数分组的ID）和等待重试的通知ID
+        """
+        notifications = cls._claim_notifications(notification_ids, claimed_at=claimed_at)
+        
+        results = {}
+        for channel_type, service in (('email', EmailService), ('webhook', WebhookService)):
+            batch = [n for n in notifications if n.channel.channel_type == channel_type]
+            if batch:
+                results.update(service.send_batch(batch))
+        
+        sent_ids = []
+        failed = {}
+        for notification in notifications:
+            if notification.id in results:
+                error = results[notification.id]
             else:
-                raise ValueError(f"不支持的通知渠道类型: {channel_type}")
+                try:
+                    error = None if cls._dispatch_to_channel(notification) else "发送失败"
+                except Exception as e:
+                    logger.error(f"发送通知失败: {notification.id}, {str(e)}", exc_info=True)
+                    error = str(e)
             
-            # 更新通知状态
-            if success:
-                notification.status = 'sent'
-                notification.sent_at = timezone.now()
+            if error is None:
+                sent_ids.append(notification.id)
             else:
-                notification.status = 'failed'
-                notification.error_message = "发送失败"
-            
-            notification.save(update_fields=['status', 'sent_at', 'error_message', 'updated_at'])
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"发送通知失败: {str(e)}", exc_info=True)
-            notification.status = 'failed'
-            notification.error_message = str(e)
-            notification.save(update_fields=['status', 'error_message', 'updated_at'])
-            return False
+                failed.setdefault((error, notification.attempts), []).append(notification.id)
+        
+        now = timezone.now()
+        # 渠道返回了外部ID的通知逐行写入外部ID，合并为一条批量UPDATE
+        sent = set(sent_ids)
+        with_external_id = [n for n in notifications if n.id in sent and n.external_id]
+        for notification in with_external_id:
+            notification.status = 'sent'
+            notification.sent_at = now
+            notification.error_message = None
+            notification.updated_at = now
+        if with_external_id:
+            Notification.objects.bulk_update(
+                with_external_id,
+                ['status', 'sent_at', 'error_message', 'updated_at', 'external_id']
+            )
+            sent -= {n.id for n in with_external_id}
+        if sent:
+            Notification.objects.filter(id__in=sent).update(
+                status='sent',
+                sent_at=now,
+                error_message=None,
+                updated_at=now
+            )
+        max_retries = getattr(settings, 'NOTIFICATION_MAX_RETRIES', 5)
+        failed_ids = []
+        failed_by_attempts = {}
+        retry_ids = []
+        for (error, attempts), ids in failed.items():
+            if final or attempts >= max_retries:
+                Notification.objects.filter(id__in=ids).update(
+                    status='failed',
+                    error_message=error,
+                    attempts=attempts + 1,
+                    updated_at=now
+                )
+                failed_ids.extend(ids)
+                failed_by_attempts.setdefault(attempts + 1, []).extend(str(i) for i in ids)
+            else:
+                Notification.objects.filter(id__in=ids).update(
+                    status='pending',
+                    error_message=error,
+                    attempts=attempts + 1,
+                    scheduled_at=now + timezone.timedelta(seconds=cls.get_retry_delay(attempts)),
+                    updated_at=now
+                )
+                retry_ids.extend(ids)
+        
+        return {
+            'sent': len(sent_ids),
+            'failed_ids': [str(notification_id) for notification_id in failed_ids],
+            'failed_by_attempts': failed_by_attempts,
+            'retry_ids': [str(notification_id) for notification_id in retry_ids],
+        }
+    
+    @classmethod
+    def send_notification(cls, notification):
+        """
+        立即发送通知
+        
+        参数:
+            notification: 通知对象
+        
+        返回:
+            bool: 是否发送成功
+        """
+        result = cls.deliver_notifications([notification.id], final=True)
+        notification.refresh_from_db(fields=['status', 'sent_at', 'error_message', 'attempts', 'updated_at'])
+        return result['sent'] == 1
     
     @staticmethod
     def _send_email_notification(notification):
         """发送邮件通知"""
-        # TODO: 实现邮件发送逻辑
         logger.info(f"发送邮件通知: {notification.id}")
+        EmailService.send(notification)
         return True
     
     @staticmethod
@@ -359,7 +886,8 @@ class NotificationService:
     @staticmethod
     def _send_in_app_notification(notification):
         """发送系统内通知"""
-        # 系统内通知不需要额外处理，已经保存到数据库
+        # 通知已经保存到数据库，推送给在线的客户端
+        NotificationStreamService.publish_notification(notification)
         logger.info(f"发送系统内通知: {notification.id}")
         return True
     
@@ -373,18 +901,19 @@ class NotificationService:
     @staticmethod
     def _send_webhook_notification(notification):
         """发送Webhook通知"""
-        # TODO: 实现Webhook通知逻辑
         logger.info(f"发送Webhook通知: {notification.id}")
+        WebhookService.send(notification)
         return True
     
     @staticmethod
-    def _render_template(template_string, context_data):
+    def _render_template(template_string, context_data, cache_key=None):
         """
         渲染模板
         
         参数:
             template_string: 模板字符串
             context_data: 上下文数据
+            cache_key: 编译缓存键 (模板ID, 模板字段, 更新时间)，为空时不使用缓存
         
         返回:
             str: 渲染后的内容
@@ -392,10 +921,37 @@ class NotificationService:
         if not template_string:
             return ""
         
-        template = Template(template_string)
+        if cache_key:
+            template = template_cache.get(*cache_key, template_string)
+        else:
+            template = Template(template_string)
         context = Context(context_data)
         return template.render(context)
     
+    @classmethod
+    def _render_notification_template(cls, template, context_data):
+        """
+        使用编译缓存渲染通知模板
+        
+        参数:
+            template: 通知模板
+            context_data: 上下文数据
+        
+        返回:
+            tuple: (主题, 内容, HTML内容)
+        """
+        def render(field):
+            return cls._render_template(
+                getattr(template, field),
+                context_data,
+                cache_key=(template.id, field, template.updated_at)
+            )
+        
+        subject = render('subject_template')
+        content = render('content_template')
+        html_content = render('html_template') if template.html_template else None
+        return subject, content, html_content
+    
     @staticmethod
     def mark_notification_as_read(notification_id):
         """
@@ -408,8 +964,12 @@ class NotificationService:
             bool: 是否成功
         """
         try:
-            notification = Notification.objects.get(id=notification_id)
-            notification.mark_as_read()
+            notification = Notification.objects.select_related('channel').get(id=notification_id)
+            if not notification.is_read:
+                notification.mark_as_read()
+                if notification.channel.channel_type == 'in_app':
+                    UnreadCounterService.decrement(notification.tenant_id, notification.user_id)
+                    NotificationStreamService.publish_unread_count(notification.tenant_id, notification.user_id)
             return True
         except Notification.DoesNotExist:
             logger.error(f"通知不存在: {notification_id}")
@@ -430,8 +990,12 @@ class NotificationService:
             bool: 是否成功
         """
         try:
-            notification = Notification.objects.get(id=notification_id)
-            notification.mark_as_unread()
+            notification = Notification.objects.select_related('channel').get(id=notification_id)
+            if notification.is_read:
+                notification.mark_as_unread()
+                if notification.channel.channel_type == 'in_app':
+                    UnreadCounterService.increment(notification.tenant_id, notification.user_id)
+                    NotificationStreamService.publish_unread_count(notification.tenant_id, notification.user_id)
             return True
         except Notification.DoesNotExist:
             logger.error(f"通知不存在: {notification_id}")
@@ -443,7 +1007,7 @@ class NotificationService:
     @staticmethod
     def mark_all_notifications_as_read(tenant_id, user_id):
         """
-        将用户的所有通知标记为已读
+        将用户的所有通知标记为已读，包括适用的广播通知
         
         参数:
             tenant_id: 租户ID
@@ -467,6 +1031,10 @@ class NotificationService:
                 updated_at=now
             )
             
+            UnreadCounterService.reset(tenant_id, user_id)
+            count += BroadcastService.mark_all_as_read(tenant_id, user_id)
+            NotificationStreamService.publish_unread_count(tenant_id, user_id)
+            
             return count
         except Exception as e:
             logger.error(f"批量标记通知为已读失败: {str(e)}", exc_info=True)
@@ -0,0 +1,276 @@
+"""
+通知实时推送服务实现
+"""
+
+import re
+import json
+import asyncio
+import logging
+import threading
+import itertools
+import weakref
+from collections import deque
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _MemoryBroker:
+    """
+    进程内事件代理
+
+    仅适用于单节点开发环境，发布者与订阅者必须在同一进程内
+    """
+
+    def __init__(self, max_len):
+        self._max_len = max_len
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._events = {}
+        self._waiters = {}
+
+    @staticmethod
+    def _parse_id(event_id):
+        try:
+            return int(event_id)
+        except (TypeError, ValueError):
+            return None
+
+    def publish(self, key, event, data):
+        with self._lock:
+            event_id = str(next(self._sequence))
+            events = self._events.setdefault(key, deque(maxlen=self._max_len))
+            events.append((event_id, event, data))
+            waiters = list(self._waiters.get(key, ()))
+
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+        return event_id
+
+    async def resolve_id(self, key, last_event_id):
+        if self._parse_id(last_event_id) is not None:
+            return last_event_id
+        with self._lock:
+            events = self._events.get(key)
+            return events[-1][0] if events else '0'
+
+    def _read(self, key, last_event_id):
+        last = self._parse_id(last_event_id)
+        with self._lock:
+            return [item for item in self._events.get(key, ()) if int(item[0]) > last]
+
+    async def read(self, key, last_event_id, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        # 先注册等待者再读取，避免错过两步之间发布的事件
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+        try:
+            events = self._read(key, last_event_id)
+            if events:
+                return events
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            return self._read(key, last_event_id)
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+
+class _RedisBroker:
+    """
+    Redis Stream事件代理
+
+    每个用户一个Stream，按长度截断并设置过期时间，
+    消息ID即SSE事件ID，断线重连时从Last-Event-ID继续读取
+    """
+
+    ID_PATTERN = re.compile(r'^\d+-\d+$')
+
+    def __init__(self, url, max_len, ttl):
+        self._url = url
+        self._max_len = max_len
+        self._ttl = ttl
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self._url)
+        return self._client
+
+    def _get_async_client(self):
+        # 异步客户端的连接绑定事件循环，每个循环单独创建
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            import redis.asyncio
+            client = redis.asyncio.Redis.from_url(self._url)
+            self._async_clients[loop] = client
+        return client
+
+    def publish(self, key, event, data):
+        pipeline = self.client.pipeline()
+        pipeline.xadd(
+            key,
+            {'event': event, 'data': data},
+            maxlen=self._max_len,
+            approximate=True
+        )
+        pipeline.expire(key, self._ttl)
+        event_id, _ = pipeline.execute()
+        return event_id.decode()
+
+    async def resolve_id(self, key, last_event_id):
+        if last_event_id and self.ID_PATTERN.match(last_event_id):
+            return last_event_id
+        latest = await self._get_async_client().xrevrange(key, count=1)
+        return latest[0][0].decode() if latest else '0-0'
+
+    async def read(self, key, last_event_id, timeout):
+        response = await self._get_async_client().xread(
+            {key: last_event_id},
+            count=100,
+            block=int(timeout * 1000)
+        )
+        events = []
+        for _, messages in response or ():
+            for message_id, fields in messages:
+                events.append((
+                    message_id.decode(),
+                    fields[b'event'].decode(),
+                    fields[b'data'].decode()
+                ))
+        return events
+
+
+class NotificationStreamService:
+    """
+    通知实时推送服务类
+
+    同步代码发布用户事件，SSE连接按用户订阅并支持从Last-Event-ID续传；
+    生产环境通过Redis Stream跨进程分发，单节点开发环境可使用进程内代理
+    """
+
+    STREAM_KEY_PREFIX = 'notification_service:stream'
+
+    _broker = None
+    _broker_lock = threading.Lock()
+
+    @classmethod
+    def get_broker(cls):
+        """获取事件代理"""
+        if cls._broker is None:
+            with cls._broker_lock:
+                if cls._broker is None:
+                    max_len = getattr(settings, 'NOTIFICATION_STREAM_MAX_LENGTH', 100)
+                    if getattr(settings, 'NOTIFICATION_STREAM_BACKEND', 'redis') == 'memory':
+                        cls._broker = _MemoryBroker(max_len)
+                    else:
+                        cls._broker = _RedisBroker(
+                            getattr(settings, 'NOTIFICATION_STREAM_REDIS_URL', settings.REDIS_URL),
+                            max_len,
+                            getattr(settings, 'NOTIFICATION_STREAM_TTL', 86400)
+                        )
+        return cls._broker
+
+    @classmethod
+    def _stream_key(cls, tenant_id, user_id):
+        """生成用户事件流的键"""
+        return f"{cls.STREAM_KEY_PREFIX}:{tenant_id}:{user_id}"
+
+    @classmethod
+    def publish(cls, tenant_id, user_id, event, payload):
+        """
+        发布用户事件
+
+        推送失败不影响通知本身的状态，只记录日志
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+            event: 事件类型
+            payload: 事件数据
+
+        返回:
+            str: 事件ID，发布失败时为None
+        """
+        try:
+            return cls.get_broker().publish(
+                cls._stream_key(tenant_id, user_id),
+                event,
+                json.dumps(payload, ensure_ascii=False, default=str)
+            )
+        except Exception as e:
+            logger.warning(f"发布通知事件失败: {str(e)}")
+            return None
+
+    @classmethod
+    def publish_notification(cls, notification):
+        """
+        发布新通知事件，附带当前未读数量
+
+        参数:
+            notification: 通知对象
+        """
+        from apps.notification_service.services.unread_counter_service import UnreadCounterService
+
+        cls.publish(notification.tenant_id, notification.user_id, 'notification', {
+            'id': notification.id,
+            'notification_type_id': notification.notification_type_id,
+            'subject': notification.subject,
+            'content': notification.content,
+            'data': notification.data,
+            'created_at': notification.created_at,
+            'unread_count': UnreadCounterService.get_total_unread_count(
+                notification.tenant_id, notification.user_id
+            ),
+        })
+
+    @classmethod
+    def publish_unread_count(cls, tenant_id, user_id):
+        """
+        发布未读数量变化事件
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+        """
+        from apps.notification_service.services.unread_counter_service import UnreadCounterService
+
+        cls.publish(tenant_id, user_id, 'unread_count', {
+            'unread_count': UnreadCounterService.get_total_unread_count(tenant_id, user_id),
+        })
+
+    @classmethod
+    async def subscribe(cls, tenant_id, user_id, last_event_id=None):
+        """
+        订阅用户事件
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+            last_event_id: 最后收到的事件ID，为空时只接收新事件
+
+        生成:
+            tuple: (事件ID, 事件类型, 事件数据)，心跳间隔内没有事件时生成None
+        """
+        broker = cls.get_broker()
+        key = cls._stream_key(tenant_id, user_id)
+        heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+
+        last_event_id = await broker.resolve_id(key, last_event_id)
+        while True:
+            events = await broker.read(key, last_event_id, heartbeat)
+            if not events:
+                yield None
+                continue
+            for event in events:
+                last_event_id = event[0]
+                yield event
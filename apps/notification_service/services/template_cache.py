@@ -0,0 +1,85 @@
+"""
+通知模板编译缓存
+"""
+
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.template import Template
+
+
+class TemplateCache:
+    """
+    已编译模板的LRU缓存
+
+    缓存键包含模板ID、模板字段和模板更新时间，模板修改后旧的编译结果自然失效，
+    模板保存或删除时由信号处理器主动清除以释放内存
+    """
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        """缓存容量"""
+        if self._max_size is None:
+            return getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_SIZE', 512)
+        return self._max_size
+
+    def get(self, template_id, field, updated_at, template_string):
+        """
+        获取已编译模板，未命中时编译并缓存
+
+        参数:
+            template_id: 通知模板ID
+            field: 模板字段，如 subject_template
+            updated_at: 模板更新时间
+            template_string: 模板字符串
+
+        返回:
+            Template: 已编译的模板
+        """
+        key = (str(template_id), field, updated_at)
+
+        with self._lock:
+            compiled = self._templates.get(key)
+            if compiled is not None:
+                self._templates.move_to_end(key)
+                return compiled
+
+        # 编译在锁外进行，并发未命中时最多重复编译一次
+        compiled = Template(template_string)
+
+        with self._lock:
+            self._templates[key] = compiled
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+
+        return compiled
+
+    def invalidate(self, template_id):
+        """
+        清除指定模板的全部编译结果
+
+        参数:
+            template_id: 通知模板ID
+        """
+        template_id = str(template_id)
+        with self._lock:
+            for key in [key for key in self._templates if key[0] == template_id]:
+                del self._templates[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._templates.clear()
+
+    def __len__(self):
+        return len(self._templates)
+
+
+# 进程内共享的模板缓存
+template_cache = TemplateCache()
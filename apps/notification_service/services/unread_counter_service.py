@@ -0,0 +1,245 @@
+"""
+未读通知计数服务实现
+"""
+
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from apps.notification_service.models import Notification, UserUnreadCounter
+from apps.notification_service.services.broadcast_service import BroadcastService
+
+logger = logging.getLogger(__name__)
+
+
+class UnreadCounterService:
+    """
+    未读通知计数服务类
+
+    按(租户, 用户)维护系统内通知的未读数量，Redis计数器用于读取，
+    数据库计数表作为后备存储，定期对账修正两者与通知记录之间的偏差
+    """
+
+    CACHE_KEY_PREFIX = 'notification_service:unread'
+
+    @classmethod
+    def _cache_key(cls, tenant_id, user_id):
+        """生成计数器缓存键"""
+        return f"{cls.CACHE_KEY_PREFIX}:{tenant_id}:{user_id}"
+
+    @staticmethod
+    def _count_unread(tenant_id, user_id):
+        """
+        从通知记录统计未读数量
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            int: 未读数量
+        """
+        return Notification.objects.filter(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            is_read=False,
+            channel__channel_type='in_app'
+        ).count()
+
+    @classmethod
+    def get_unread_count(cls, tenant_id, user_id):
+        """
+        获取用户未读通知数量
+
+        优先读取Redis计数器，未命中时读取计数表，计数表中没有记录时从通知记录统计并初始化
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            int: 未读数量
+        """
+        if not tenant_id:
+            return 0
+
+        key = cls._cache_key(tenant_id, user_id)
+        try:
+            count = cache.get(key)
+        except Exception as e:
+            logger.warning(f"读取未读计数缓存失败: {str(e)}")
+            count = None
+        if count is not None:
+            return max(int(count), 0)
+
+        count = UserUnreadCounter.objects.filter(
+            tenant_id=tenant_id,
+            user_id=user_id
+        ).values_list('count', flat=True).first()
+        if count is None:
+            counter, _ = UserUnreadCounter.objects.get_or_create(
+                tenant_id=tenant_id,
+                user_id=user_id,
+                defaults={'count': cls._count_unread(tenant_id, user_id)}
+            )
+            count = counter.count
+
+        try:
+            # 使用add避免覆盖并发写入的计数
+            cache.add(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 86400))
+        except Exception as e:
+            logger.warning(f"写入未读计数缓存失败: {str(e)}")
+
+        return count
+
+    @classmethod
+    def get_total_unread_count(cls, tenant_id, user_id):
+        """
+        获取用户未读通知数量，包含个人通知和适用的广播通知
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+
+        返回:
+            int: 未读数量
+        """
+        return cls.get_unread_count(tenant_id, user_id) + BroadcastService.get_unread_count(tenant_id, user_id)
+
+    @classmethod
+    def adjust(cls, tenant_id, user_id, delta):
+        """
+        调整用户未读通知数量
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+            delta: 变化量，正数为增加，负数为减少
+        """
+        if not delta:
+            return
+
+        UserUnreadCounter.objects.filter(
+            tenant_id=tenant_id,
+            user_id=user_id
+        ).update(count=Greatest(F('count') + delta, 0))
+
+        try:
+            cache.incr(cls._cache_key(tenant_id, user_id), delta)
+        except ValueError:
+            # 缓存中没有计数器，下次读取时从计数表加载
+            pass
+        except Exception as e:
+            logger.warning(f"更新未读计数缓存失败: {str(e)}")
+
+    @classmethod
+    def increment(cls, tenant_id, user_id, amount=1):
+        """增加用户未读通知数量"""
+        cls.adjust(tenant_id, user_id, amount)
+
+    @classmethod
+    def decrement(cls, tenant_id, user_id, amount=1):
+        """减少用户未读通知数量"""
+        cls.adjust(tenant_id, user_id, -amount)
+
+    @classmethod
+    def increment_many(cls, tenant_id, user_ids):
+        """
+        为多个用户各增加一条未读通知
+
+        计数表通过批量UPDATE更新，Redis计数器直接清除，下次读取时从计数表加载
+
+        参数:
+            tenant_id: 租户ID
+            user_ids: 用户ID列表
+        """
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 1000)
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            UserUnreadCounter.objects.filter(
+                tenant_id=tenant_id,
+                user_id__in=batch
+            ).update(count=F('count') + 1)
+            try:
+                cache.delete_many([cls._cache_key(tenant_id, user_id) for user_id in batch])
+            except Exception as e:
+                logger.warning(f"清除未读计数缓存失败: {str(e)}")
+
+    @classmethod
+    def reset(cls, tenant_id, user_id):
+        """
+        将用户未读通知数量清零
+
+        参数:
+            tenant_id: 租户ID
+            user_id: 用户ID
+        """
+        UserUnreadCounter.objects.filter(
+            tenant_id=tenant_id,
+            user_id=user_id
+        ).update(count=0)
+
+        try:
+            cache.set(
+                cls._cache_key(tenant_id, user_id),
+                0,
+                getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 86400)
+            )
+        except Exception as e:
+            logger.warning(f"重置未读计数缓存失败: {str(e)}")
+
+    @classmethod
+    def reconcile(cls, tenant_id=None):
+        """
+        按通知记录重新计算未读数量，修正计数器偏差
+
+        参数:
+            tenant_id: 租户ID，为空时对账所有租户
+
+        返回:
+            int: 对账的计数器数量
+        """
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 1000)
+
+        unread = Notification.objects.filter(is_read=False, channel__channel_type='in_app')
+        counters = UserUnreadCounter.objects.all()
+        if tenant_id:
+            unread = unread.filter(tenant_id=tenant_id)
+            counters = counters.filter(tenant_id=tenant_id)
+
+        unread_counts = [
+            UserUnreadCounter(tenant_id=row['tenant_id'], user_id=row['user_id'], count=row['count'])
+            for row in unread.values('tenant_id', 'user_id').annotate(count=Count('id')).order_by()
+        ]
+
+        # MySQL不支持指定冲突列，按唯一键冲突更新(ON DUPLICATE KEY UPDATE)
+        unique_fields = None
+        if connection.features.supports_update_conflicts_with_target:
+            unique_fields = ['tenant', 'user']
+
+        with transaction.atomic():
+            counters.update(count=0)
+            UserUnreadCounter.objects.bulk_create(
+                unread_counts,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=['count', 'updated_at']
+            )
+
+        reconciled = 0
+        keys = []
+        for counter_tenant_id, user_id in counters.values_list('tenant_id', 'user_id').iterator():
+            keys.append(cls._cache_key(counter_tenant_id, user_id))
+            reconciled += 1
+            if len(keys) >= batch_size:
+                cache.delete_many(keys)
+                keys = []
+        if keys:
+            cache.delete_many(keys)
+
+        logger.info(f"未读通知计数对账完成: {reconciled} 个计数器")
+        return reconciled
@@ -0,0 +1,281 @@
+"""
+Webhook通知渠道实现
+"""
+
+import hmac
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookError(Exception):
+    """Webhook发送失败"""
+
+
+class CircuitBreaker:
+    """
+    端点熔断器
+
+    连续失败达到阈值后熔断，熔断期间直接拒绝请求；
+    熔断时间结束后放行一次试探请求，成功则恢复，失败则继续熔断
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """检查是否允许发送请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class WebhookService:
+    """
+    Webhook通知服务类
+
+    所有线程共享一个HTTP会话，连接池按主机保持长连接，每个主机的连接数与并发上限一致；
+    按目标主机限制并发数，按端点熔断，失败请求带随机抖动重试，
+    批量通知通过线程池并行发送
+    """
+
+    # 可重试的HTTP状态码
+    RETRY_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+    _lock = threading.Lock()
+    _session = None
+    _executor = None
+    _host_semaphores = {}
+    _breakers = {}
+
+    @staticmethod
+    def _setting(name, default):
+        return getattr(settings, name, default)
+
+    @classmethod
+    def _get_session(cls):
+        """获取共享的HTTP会话"""
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    adapter = HTTPAdapter(
+                        pool_connections=cls._setting('NOTIFICATION_WEBHOOK_POOL_HOSTS', 64),
+                        pool_maxsize=cls._setting('NOTIFICATION_WEBHOOK_MAX_PER_HOST', 8)
+                    )
+                    session = requests.Session()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = 'sciTigerCore-Webhook/1.0'
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def _get_executor(cls):
+        """获取批量发送使用的线程池"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls._setting('NOTIFICATION_WEBHOOK_WORKERS', 32),
+                        thread_name_prefix='webhook'
+                    )
+        return cls._executor
+
+    @classmethod
+    def _get_host_semaphore(cls, host):
+        """获取目标主机的并发信号量"""
+        with cls._lock:
+            semaphore = cls._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(
+                    cls._setting('NOTIFICATION_WEBHOOK_MAX_PER_HOST', 8)
+                )
+                cls._host_semaphores[host] = semaphore
+            return semaphore
+
+    @classmethod
+    def get_breaker(cls, url):
+        """获取端点熔断器"""
+        with cls._lock:
+            breaker = cls._breakers.get(url)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    cls._setting('NOTIFICATION_WEBHOOK_BREAKER_THRESHOLD', 5),
+                    cls._setting('NOTIFICATION_WEBHOOK_BREAKER_RESET', 60)
+                )
+                cls._breakers[url] = breaker
+            return breaker
+
+    @staticmethod
+    def sign(secret, timestamp, body):
+        """
+        计算请求签名
+
+        参数:
+            secret: 签名密钥
+            timestamp: 时间戳
+            body: 请求体
+
+        返回:
+            str: HMAC-SHA256签名
+        """
+        message = f"{timestamp}.".encode() + body
+        return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def build_payload(notification):
+        """
+        构建通知的请求体
+
+        参数:
+            notification: 通知对象
+
+        返回:
+            dict: 请求数据
+        """
+        return {
+            'id': str(notification.id),
+            'tenant_id': str(notification.tenant_id),
+            'user_id': str(notification.user_id),
+            'notification_type_id': str(notification.notification_type_id),
+            'subject': notification.subject,
+            'content': notification.content,
+            'data': notification.data,
+            'created_at': notification.created_at.isoformat() if notification.created_at else None,
+        }
+
+    @classmethod
+    def send(cls, notification):
+        """
+        发送Webhook通知
+
+        目标地址优先使用通知的接收地址，其次使用渠道配置的url
+
+        参数:
+            notification: 通知对象
+
+        异常:
+            WebhookError: 发送失败
+        """
+        config = notification.channel.config or {}
+        url = notification.recipient_address or config.get('url')
+        if not url:
+            raise WebhookError("未配置Webhook地址")
+
+        body = json.dumps(cls.build_payload(notification), ensure_ascii=False, default=str).encode()
+        headers = {'Content-Type': 'application/json', 'X-Webhook-Id': str(notification.id)}
+        headers.update(config.get('headers') or {})
+
+        breaker = cls.get_breaker(url)
+        if not breaker.allow():
+            raise WebhookError(f"Webhook端点已熔断: {url}")
+
+        # 任何异常都记为失败，试探请求结束后熔断器不会停留在半开状态
+        succeeded = False
+        try:
+            cls._post_with_retry(url, body, headers, config.get('secret'))
+            succeeded = True
+        finally:
+            if succeeded:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+    @classmethod
+    def _post_with_retry(cls, url, body, headers, secret):
+        """
+        发送请求，网络错误和可重试的状态码按随机抖动的指数退避重试
+
+        异常:
+            WebhookError: 重试耗尽或遇到不可重试的错误
+        """
+        import requests
+
+        timeout = (
+            cls._setting('NOTIFICATION_WEBHOOK_CONNECT_TIMEOUT', 3),
+            cls._setting('NOTIFICATION_WEBHOOK_TIMEOUT', 5)
+        )
+        retries = cls._setting('NOTIFICATION_WEBHOOK_RETRIES', 2)
+        backoff = cls._setting('NOTIFICATION_WEBHOOK_RETRY_BACKOFF', 0.5)
+        semaphore = cls._get_host_semaphore(urlsplit(url).netloc)
+        session = cls._get_session()
+
+        for attempt in range(retries + 1):
+            if secret:
+                # 每次重试重新签名，避免接收方按时间戳拒绝重放
+                timestamp = str(int(time.time()))
+                headers['X-Webhook-Timestamp'] = timestamp
+                headers['X-Webhook-Signature'] = f"sha256={cls.sign(secret, timestamp, body)}"
+
+            try:
+                with semaphore:
+                    response = session.post(url, data=body, headers=headers, timeout=timeout)
+                if response.status_code < 300:
+                    return
+                error = f"Webhook响应状态码 {response.status_code}"
+                if response.status_code not in cls.RETRY_STATUS_CODES:
+                    raise WebhookError(error)
+            except requests.RequestException as e:
+                error = f"Webhook请求失败: {str(e)}"
+
+            if attempt < retries:
+                time.sleep(random.uniform(0, backoff * (2 ** attempt)))
+
+        raise WebhookError(error)
+
+    @classmethod
+    def send_batch(cls, notifications):
+        """
+        并行发送一批Webhook通知
+
+        参数:
+            notifications: 通知对象列表
+
+        返回:
+            dict: {通知ID: 错误信息}，发送成功的通知错误信息为None
+        """
+        def send_one(notification):
+            try:
+                cls.send(notification)
+                return None
+            except WebhookError as e:
+                return str(e)
+            except Exception as e:
+                logger.error(f"发送Webhook通知失败: {notification.id}, {str(e)}", exc_info=True)
+                return str(e)
+
+        results = cls._get_executor().map(send_one, notifications)
+        return {notification.id: error for notification, error in zip(notifications, results)}
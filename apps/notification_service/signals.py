@@ -2,5 +2,50 @@
 通知中心服务信号处理
 """
 
-from django.db.models.signals import post_save
-from django.dispatch import receiver 
\ No newline at end of file
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.tenant_service.models import TenantQuota
+
+from .models import NotificationTemplate, BroadcastNotification
+
+
+@receiver(post_save, sender=NotificationTemplate)
+@receiver(post_delete, sender=NotificationTemplate)
+def invalidate_template_cache(sender, instance, **kwargs):
+    """
+    通知模板变更时清除已编译的模板缓存
+    
+    参数:
+        sender: 发送信号的模型类
+        instance: 通知模板实例
+    """
+    from .services.template_cache import template_cache
+    template_cache.invalidate(instance.id)
+
+
+@receiver(post_save, sender=BroadcastNotification)
+@receiver(post_delete, sender=BroadcastNotification)
+def invalidate_broadcast_unread_counts(sender, instance, **kwargs):
+    """
+    广播通知变更时使租户内用户的广播未读数量缓存失效
+    
+    参数:
+        sender: 发送信号的模型类
+        instance: 广播通知实例
+    """
+    from .services.broadcast_service import BroadcastService
+    BroadcastService.bump_version(instance.tenant_id)
+
+
+@receiver(post_save, sender=TenantQuota)
+def invalidate_notification_quota(sender, instance, **kwargs):
+    """
+    租户配额变更时清除缓存的每日通知配额
+    
+    参数:
+        sender: 发送信号的模型类
+        instance: 租户配额实例
+    """
+    from .services.notification_quota_service import NotificationQuotaService
+    NotificationQuotaService.invalidate_limit(instance.tenant_id)
@@ -0,0 +1,92 @@
+"""
+通知中心服务异步任务
+"""
+
+import logging
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def send_notifications(notification_ids, channel_type, claimed_at=None):
+    """
+    批量投递通知
+
+    由各渠道的投递队列消费，失败的通知记录失败次数并按指数退避推迟计划发送时间，
+    由计划通知调度器到期后重新投递；超过最大重试次数后标记为发送失败并转入死信队列
+
+    参数:
+        notification_ids: 通知ID列表
+        channel_type: 渠道类型
+        claimed_at: 调度器领取通知的时间(ISO格式)，为空表示通知尚未被领取
+    """
+    from apps.notification_service.services import NotificationService
+
+    result = NotificationService.deliver_notifications(notification_ids, claimed_at=claimed_at)
+
+    if result['retry_ids']:
+        logger.warning(
+            f"{channel_type} 渠道 {len(result['retry_ids'])} 条通知发送失败，已推迟计划发送时间等待重试"
+        )
+
+    for attempts, failed_ids in result['failed_by_attempts'].items():
+        dead_letter_notifications.apply_async(
+            args=[failed_ids, channel_type, attempts],
+            queue=getattr(settings, 'NOTIFICATION_DEAD_LETTER_QUEUE', 'notifications.dead_letter')
+        )
+
+
+@shared_task(ignore_result=True)
+def dead_letter_notifications(notification_ids, channel_type, attempts):
+    """
+    记录重试耗尽的通知
+
+    死信队列中的消息保留了通知ID，处理渠道故障后可重新投递
+
+    参数:
+        notification_ids: 通知ID列表
+        channel_type: 渠道类型
+        attempts: 已投递次数
+    """
+    logger.error(
+        f"{channel_type} 渠道 {len(notification_ids)} 条通知在 {attempts} 次投递后仍然失败: "
+        f"{', '.join(notification_ids)}"
+    )
+
+
+@shared_task(ignore_result=True)
+def dispatch_scheduled_notifications():
+    """
+    调度到期的计划通知
+
+    由Celery Beat定期触发，可由多个worker并发执行
+    """
+    from apps.notification_service.services import NotificationService
+
+    NotificationService.dispatch_scheduled_notifications()
+
+
+@shared_task(ignore_result=True)
+def reconcile_unread_counters():
+    """
+    对账未读通知计数
+
+    由Celery Beat定期触发
+    """
+    from apps.notification_service.services import UnreadCounterService
+
+    UnreadCounterService.reconcile()
+
+
+@shared_task(ignore_result=True)
+def reconcile_notification_quotas():
+    """
+    将租户每日通知配额计数器写入数据库
+
+    由Celery Beat定期触发
+    """
+    from apps.notification_service.services import NotificationQuotaService
+
+    NotificationQuotaService.reconcile()
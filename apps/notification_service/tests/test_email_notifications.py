@@ -0,0 +1,100 @@
+"""
+邮件通知批量发送测试
+
+使用记录连接和邮件的测试后端，校验SMTP连接复用、失败邮件不会导致已发送邮件重发以及外部ID的写回
+"""
+
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+
+from apps.auth_service.models import User
+from apps.notification_service.models import Notification, NotificationChannel, NotificationType
+from apps.notification_service.services import NotificationService
+from apps.notification_service.services.email_service import EmailService
+from apps.tenant_service.models import Tenant
+
+
+class RecordingBackend(BaseEmailBackend):
+    """记录建立连接的次数和发送的邮件，收件人为fail@example.com的邮件发送失败"""
+
+    opened = 0
+    sent = []
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        RecordingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if 'fail@example.com' in message.to:
+                raise OSError('收件人被拒绝')
+            RecordingBackend.sent.append(message)
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='apps.notification_service.tests.test_email_notifications.RecordingBackend',
+    NOTIFICATION_EMAIL_BATCH_SIZE=2
+)
+class EmailNotificationTests(TestCase):
+    """邮件通知测试"""
+
+    def setUp(self):
+        RecordingBackend.opened = 0
+        RecordingBackend.sent = []
+        self.tenant = Tenant.objects.create(name='T', slug='t', subdomain='t', contact_email='t@example.com')
+        self.user = User.objects.create(email='u@example.com', username='u')
+        self.notification_type = NotificationType.objects.create(
+            code='order.paid', name='订单支付', category='system'
+        )
+        self.channel = NotificationChannel.objects.create(code='email', name='邮件', channel_type='email')
+
+    def create_notifications(self, recipients):
+        return [
+            Notification.objects.create(
+                tenant=self.tenant, user=self.user, notification_type=self.notification_type,
+                channel=self.channel, subject='s', content='c', recipient_address=recipient,
+                status='pending'
+            )
+            for recipient in recipients
+        ]
+
+    def test_connection_reused_per_chunk(self):
+        notifications = self.create_notifications([f'r{index}@example.com' for index in range(5)])
+
+        result = NotificationService.deliver_notifications([n.id for n in notifications])
+
+        self.assertEqual(result['sent'], 5)
+        # 每NOTIFICATION_EMAIL_BATCH_SIZE封邮件建立一次连接
+        self.assertEqual(RecordingBackend.opened, 3)
+        message_ids = {message.to[0]: message.extra_headers['Message-ID'] for message in RecordingBackend.sent}
+        for notification in notifications:
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, 'sent')
+            self.assertEqual(notification.external_id, message_ids[notification.recipient_address])
+
+    def test_failed_message_does_not_resend_earlier_ones(self):
+        notifications = self.create_notifications(['a@example.com', 'fail@example.com', 'b@example.com'])
+
+        with self.settings(NOTIFICATION_EMAIL_BATCH_SIZE=10):
+            results = EmailService.send_batch(notifications)
+
+        self.assertIsNone(results[notifications[0].id])
+        self.assertEqual(results[notifications[1].id], '收件人被拒绝')
+        self.assertIsNone(results[notifications[2].id])
+        self.assertEqual([message.to[0] for message in RecordingBackend.sent], ['a@example.com', 'b@example.com'])
+        # 失败后重新建立连接继续发送剩余邮件
+        self.assertEqual(RecordingBackend.opened, 2)
+        self.assertIsNotNone(notifications[0].external_id)
+        self.assertIsNone(notifications[1].external_id)
+        self.assertIsNotNone(notifications[2].external_id)
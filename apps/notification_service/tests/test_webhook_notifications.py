@@ -0,0 +1,120 @@
+"""
+Webhook通知端到端测试
+
+创建Webhook渠道的通知后经投递任务发送到本地HTTP服务，校验请求内容、签名和通知状态
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.test import TestCase
+
+from apps.auth_service.models import User
+from apps.notification_service.models import (
+    Notification, NotificationChannel, NotificationTemplate, NotificationType,
+    UserNotificationPreference
+)
+from apps.notification_service.services import NotificationService
+from apps.notification_service.services.webhook_service import CircuitBreaker, WebhookService
+from apps.tenant_service.models import Tenant, TenantUser
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """记录收到的Webhook请求"""
+
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        WebhookReceiver.requests.append((dict(self.headers), body))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookNotificationTests(TestCase):
+    """Webhook通知测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), WebhookReceiver)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/hook"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        WebhookReceiver.requests = []
+        WebhookService._breakers = {}
+        self.tenant = Tenant.objects.create(name='T', slug='t', subdomain='t', contact_email='t@example.com')
+        self.user = User.objects.create(email='u@example.com', username='u')
+        TenantUser.objects.create(tenant=self.tenant, user=self.user)
+        self.notification_type = NotificationType.objects.create(
+            code='order.paid', name='订单支付', category='system'
+        )
+        self.channel = NotificationChannel.objects.create(
+            code='webhook', name='Webhook', channel_type='webhook',
+            config={'url': self.url, 'secret': 'secret'}
+        )
+        NotificationTemplate.objects.create(
+            code='order.paid.webhook', name='订单支付', notification_type=self.notification_type,
+            channel=self.channel, subject_template='订单 {{ order }} 已支付', content_template='金额 {{ amount }}'
+        )
+
+    def create_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return NotificationService.create_notification(
+                self.tenant.id, self.user.id, 'order.paid', channel_code='webhook',
+                data={'order': 'A001', 'amount': 10}
+            )
+
+    def test_webhook_notification_is_delivered(self):
+        notification = self.create_notification()
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'sent')
+        self.assertEqual(len(WebhookReceiver.requests), 1)
+        headers, body = WebhookReceiver.requests[0]
+        payload = json.loads(body)
+        self.assertEqual(payload['id'], str(notification.id))
+        self.assertEqual(payload['subject'], '订单 A001 已支付')
+        signature = WebhookService.sign('secret', headers['X-Webhook-Timestamp'], body)
+        self.assertEqual(headers['X-Webhook-Signature'], f"sha256={signature}")
+
+    def test_webhook_disabled_by_preference(self):
+        UserNotificationPreference.objects.create(
+            tenant=self.tenant, user=self.user, notification_type=self.notification_type,
+            webhook_enabled=False
+        )
+
+        self.assertIsNone(self.create_notification())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(WebhookReceiver.requests, [])
+
+    def test_breaker_probe_cleared_on_unexpected_error(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        WebhookService._breakers[self.url] = breaker
+        breaker.record_failure()
+
+        notification = Notification(
+            tenant=self.tenant, user=self.user, notification_type=self.notification_type,
+            channel=self.channel, subject='s', content='c'
+        )
+        original = WebhookService._post_with_retry
+        WebhookService._post_with_retry = classmethod(lambda cls, *args: 1 / 0)
+        try:
+            with self.assertRaises(ZeroDivisionError):
+                WebhookService.send(notification)
+        finally:
+            WebhookService._post_with_retry = original
+
+        # 试探请求结束后熔断器可以再次放行试探请求
+        self.assertTrue(breaker.allow())
@@ -10,7 +10,9 @@ from apps.notification_service.views.platform import (
     NotificationChannelViewSet,
     NotificationTemplateViewSet,
     NotificationViewSet,
-    UserNotificationPreferenceViewSet
+    UserNotificationPreferenceViewSet,
+    BroadcastNotificationViewSet,
+    notification_stream
 )
 
 # 创建路由器
@@ -20,7 +22,10 @@ router.register(r'channels', NotificationChannelViewSet, basename='notification-
 router.register(r'templates', NotificationTemplateViewSet, basename='notification-template')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'preferences', UserNotificationPreferenceViewSet, basename='notification-preference')
+router.register(r'broadcasts', BroadcastNotificationViewSet, basename='notification-broadcast')
 
 urlpatterns = [
+    # 需在路由器之前注册，避免被通知详情路由匹配
+    path('notifications/stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
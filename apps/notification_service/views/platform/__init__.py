@@ -7,6 +7,8 @@ from apps.notification_service.views.platform.notification_channel_views import
 from apps.notification_service.views.platform.notification_template_views import NotificationTemplateViewSet
 from apps.notification_service.views.platform.notification_views import NotificationViewSet
 from apps.notification_service.views.platform.user_notification_preference_views import UserNotificationPreferenceViewSet
+from apps.notification_service.views.platform.broadcast_notification_views import BroadcastNotificationViewSet
+from apps.notification_service.views.platform.notification_stream_views import notification_stream
 
 __all__ = [
     'NotificationTypeViewSet',
@@ -14,4 +16,6 @@ __all__ = [
     'NotificationTemplateViewSet',
     'NotificationViewSet',
     'UserNotificationPreferenceViewSet',
+    'BroadcastNotificationViewSet',
+    'notification_stream',
 ]
@@ -0,0 +1,91 @@
+"""
+广播通知平台API视图
+"""
+
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+
+from core.mixins import ResponseMixin
+from apps.notification_service.serializers import (
+    BroadcastNotificationSerializer, BroadcastNotificationCreateSerializer
+)
+from apps.notification_service.permissions import BroadcastNotificationPermission
+from apps.notification_service.services import BroadcastService, NotificationStreamService
+
+
+class BroadcastNotificationViewSet(ResponseMixin,
+                                   mixins.ListModelMixin,
+                                   mixins.RetrieveModelMixin,
+                                   mixins.DestroyModelMixin,
+                                   viewsets.GenericViewSet):
+    """广播通知视图集"""
+    
+    permission_classes = [BroadcastNotificationPermission]
+    
+    def get_queryset(self):
+        """获取查询集"""
+        tenant_id = getattr(self.request, 'tenant', None)
+        tenant_id = tenant_id.id if tenant_id else None
+        
+        # 删除广播时可操作租户内全部广播，其他操作只返回适用于当前用户的广播
+        if self.action == 'destroy':
+            return BroadcastService.get_broadcasts(tenant_id)
+        return BroadcastService.get_applicable_broadcasts(tenant_id, self.request.user.id)
+    
+    def get_serializer_class(self):
+        """获取序列化器类"""
+        if self.action == 'create':
+            return BroadcastNotificationCreateSerializer
+        return BroadcastNotificationSerializer
+    
+    def list(self, request, *args, **kwargs):
+        """获取适用于当前用户的广播通知列表"""
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return self.get_success_response(serializer.data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """获取广播通知详情"""
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return self.get_success_response(serializer.data)
+    
+    def create(self, request, *args, **kwargs):
+        """发布广播通知"""
+        serializer = self.get_serializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        broadcast = serializer.save()
+        
+        return self.get_success_response(
+            BroadcastNotificationSerializer(broadcast).data,
+            message="广播通知发布成功",
+            status_code=status.HTTP_201_CREATED
+        )
+    
+    def destroy(self, request, *args, **kwargs):
+        """删除广播通知"""
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        
+        return self.get_success_response(
+            message="广播通知删除成功",
+        )
+    
+    @action(detail=True, methods=['post'])
+    def mark_as_read(self, request, pk=None):
+        """标记广播通知为已读"""
+        tenant_id = getattr(request, 'tenant', None)
+        tenant_id = tenant_id.id if tenant_id else None
+        
+        success = BroadcastService.mark_as_read(pk, tenant_id, request.user.id)
+        if not success:
+            return self.get_error_response("标记广播通知为已读失败，可能是广播通知不存在")
+        
+        NotificationStreamService.publish_unread_count(tenant_id, request.user.id)
+        return self.get_success_response(message="广播通知已标记为已读")
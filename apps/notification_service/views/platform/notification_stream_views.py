@@ -0,0 +1,99 @@
+"""
+通知实时推送平台API视图
+"""
+
+import time
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.notification_service.services import NotificationStreamService
+
+logger = logging.getLogger(__name__)
+
+
+def _authenticate_token(raw_token):
+    """校验JWT令牌并返回用户"""
+    authentication = JWTAuthentication()
+    validated_token = authentication.get_validated_token(raw_token)
+    return authentication.get_user(validated_token)
+
+
+async def _get_user(request):
+    """
+    获取请求用户
+
+    EventSource无法设置请求头，除Authorization请求头外也支持通过查询参数token传递JWT令牌，
+    两者都没有时使用会话认证
+    """
+    raw_token = request.GET.get('token')
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        raw_token = header[len('Bearer '):]
+
+    if raw_token:
+        try:
+            return await sync_to_async(_authenticate_token)(raw_token)
+        except AuthenticationFailed:
+            return None
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def _format_event(event_id, event, data):
+    """格式化SSE事件"""
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def notification_stream(request):
+    """
+    通知事件流
+
+    以Server-Sent Events推送当前用户的新通知和未读数量变化，
+    断线重连时浏览器自动携带Last-Event-ID请求头，从该事件之后继续推送
+    """
+    if request.method != 'GET':
+        return JsonResponse(
+            {'success': False, 'message': '不支持的请求方法'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    user = await _get_user(request)
+    if user is None:
+        return JsonResponse(
+            {'success': False, 'message': '身份认证信息未提供或无效'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None:
+        return JsonResponse(
+            {'success': False, 'message': '缺少租户信息'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    max_duration = getattr(settings, 'NOTIFICATION_STREAM_MAX_DURATION', 3600)
+
+    async def event_stream():
+        # 客户端断线后的重连间隔(毫秒)
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + max_duration
+        async for item in NotificationStreamService.subscribe(tenant.id, user.id, last_event_id):
+            if item is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield _format_event(*item)
+            # 连接达到最长时间后关闭，客户端携带Last-Event-ID重连
+            if time.monotonic() >= deadline:
+                break
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
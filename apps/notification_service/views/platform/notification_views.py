@@ -12,10 +12,14 @@ from core.mixins import ResponseMixin
 from apps.notification_service.models import Notification
 from apps.notification_service.serializers import (
     NotificationSerializer, NotificationCreateSerializer,
-    NotificationListSerializer, NotificationMarkReadSerializer
+    NotificationListSerializer, NotificationMarkReadSerializer,
+    NotificationBulkCreateSerializer, NotificationInboxSerializer
 )
 from apps.notification_service.permissions import NotificationPermission
-from apps.notification_service.services import NotificationService
+from apps.notification_service.services import (
+    NotificationService, UnreadCounterService, NotificationStreamService, BroadcastService,
+    NotificationQuotaExceeded
+)
 from apps.notification_service.filters import NotificationFilter
 
 
@@ -29,13 +33,16 @@ class NotificationViewSet(ResponseMixin, viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'scheduled_at', 'sent_at', 'is_read', 'status']
     ordering = ['-created_at']  # 默认按创建时间降序排序
     
+    # 只使用这些查询参数时合并广播通知，其他过滤和排序条件只适用于个人通知
+    BROADCAST_MERGE_PARAMS = {'page', 'page_size', 'is_read', 'include_broadcasts', 'mine'}
+    
     def get_queryset(self):
         """获取查询集"""
         tenant_id = getattr(self.request, 'tenant', None)
         tenant_id = tenant_id.id if tenant_id else None
         
-        # 普通用户只能查看自己的通知
-        if not self.request.user.is_tenant_admin:
+        # 普通用户只能查看自己的通知，租户管理员可通过mine参数只查看自己的通知
+        if self._is_own_inbox(self.request):
             return NotificationService.get_notifications(
                 tenant_id=tenant_id, 
                 user_id=self.request.user.id
@@ -52,11 +59,45 @@ class NotificationViewSet(ResponseMixin, viewsets.ModelViewSet):
             return NotificationListSerializer
         elif self.action == 'mark_read':
             return NotificationMarkReadSerializer
+        elif self.action == 'bulk_create':
+            return NotificationBulkCreateSerializer
         return NotificationSerializer
     
+    def _is_own_inbox(self, request):
+        """检查查询集是否只包含请求用户自己的通知"""
+        if not request.user.is_tenant_admin:
+            return True
+        return request.query_params.get('mine', 'false').lower() in ('true', '1')
+    
+    def _should_merge_broadcasts(self, request):
+        """检查通知列表是否需要合并广播通知"""
+        if getattr(request, 'tenant', None) is None:
+            return False
+        # 广播通知按请求用户合并，只能合并到请求用户自己的通知列表中
+        if not self._is_own_inbox(request):
+            return False
+        if request.query_params.get('include_broadcasts', 'true').lower() in ('false', '0'):
+            return False
+        return set(request.query_params.keys()) <= self.BROADCAST_MERGE_PARAMS
+    
     def list(self, request, *args, **kwargs):
         """获取通知记录列表"""
         queryset = self.filter_queryset(self.get_queryset())
+        
+        if self._should_merge_broadcasts(request):
+            is_read = request.query_params.get('is_read')
+            merged = BroadcastService.merge_with_notifications(
+                queryset.select_related('notification_type'),
+                request.tenant.id,
+                request.user.id,
+                is_read=None if is_read is None else is_read.lower() in ('true', '1')
+            )
+            page = self.paginate_queryset(merged)
+            if page is not None:
+                serializer = NotificationInboxSerializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            return self.get_success_response(NotificationInboxSerializer(merged[:], many=True).data)
+        
         page = self.paginate_queryset(queryset)
         
         if page is not None:
@@ -70,7 +111,13 @@ class NotificationViewSet(ResponseMixin, viewsets.ModelViewSet):
         """创建通知记录"""
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
-        notification = serializer.save()
+        try:
+            notification = serializer.save()
+        except NotificationQuotaExceeded:
+            return self.get_error_response(
+                "租户今日通知数量已达上限",
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS
+            )
         
         if notification:
             result_serializer = NotificationSerializer(notification)
@@ -85,6 +132,22 @@ class NotificationViewSet(ResponseMixin, viewsets.ModelViewSet):
                 status_code=status.HTTP_201_CREATED
             )
     
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """批量创建通知"""
+        serializer = self.get_serializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        
+        return self.get_success_response(
+            result,
+            message=(
+                f"已创建 {result['created']} 条通知，跳过 {result['skipped']} 个用户，"
+                f"超出配额 {result['over_quota']} 个用户"
+            ),
+            status_code=status.HTTP_201_CREATED
+        )
+    
     def retrieve(self, request, *args, **kwargs):
         """获取通知记录详情"""
         instance = self.get_object()
@@ -103,10 +166,23 @@ class NotificationViewSet(ResponseMixin, viewsets.ModelViewSet):
         instance = self.get_object()
         self.perform_destroy(instance)
         
+        if not instance.is_read and instance.channel.channel_type == 'in_app':
+            UnreadCounterService.decrement(instance.tenant_id, instance.user_id)
+            NotificationStreamService.publish_unread_count(instance.tenant_id, instance.user_id)
+        
         return self.get_success_response(
             message="通知记录删除成功",
         )
     
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """获取当前用户的未读通知数量"""
+        tenant_id = getattr(request, 'tenant', None)
+        tenant_id = tenant_id.id if tenant_id else None
+        
+        count = UnreadCounterService.get_total_unread_count(tenant_id, request.user.id)
+        return self.get_success_response({'unread_count': count})
+    
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """标记通知为已读"""
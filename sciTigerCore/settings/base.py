@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 
 # 初始化环境变量
 env = environ.Env()
@@ -112,6 +113,7 @@ MONGODB_HOST = env('MONGODB_HOST', default='localhost')
 MONGODB_PORT = env('MONGODB_PORT', default='27017')
 MONGODB_NAME = env('MONGODB_DB', default='sciTigerLogs')
 MONGODB_COLLECTION = env('MONGODB_COLLECTION', default='logs')
+MONGODB_STATS_COLLECTION = env('MONGODB_STATS_COLLECTION', default='log_stats_hourly')
 MONGODB_USERNAME = env('MONGODB_USERNAME', default='')
 MONGODB_PASSWORD = env('MONGODB_PASSWORD', default='')
 
@@ -121,6 +123,20 @@ if MONGODB_USERNAME and MONGODB_PASSWORD:
 else:
     MONGODB_URI = f"mongodb://{MONGODB_HOST}:{MONGODB_PORT}"
 
+# 日志计数配置（count=estimate模式的计数上限和缓存秒数）
+LOG_COUNT_ESTIMATE_LIMIT = env.int('LOG_COUNT_ESTIMATE_LIMIT', default=10000)
+LOG_COUNT_CACHE_TIMEOUT = env.int('LOG_COUNT_CACHE_TIMEOUT', default=60)
+# 日志导出每批从MongoDB拉取的数量
+LOG_EXPORT_BATCH_SIZE = env.int('LOG_EXPORT_BATCH_SIZE', default=1000)
+# 日志批量接入配置（每次写入条数、错误报告上限、单行最大字节数）
+LOG_INGEST_CHUNK_SIZE = env.int('LOG_INGEST_CHUNK_SIZE', default=1000)
+LOG_INGEST_MAX_ERRORS = env.int('LOG_INGEST_MAX_ERRORS', default=1000)
+LOG_INGEST_MAX_LINE_BYTES = env.int('LOG_INGEST_MAX_LINE_BYTES', default=65536)
+# 系统检查时是否检查MongoDB日志索引（runserver、migrate、check等命令启动时执行）
+LOG_INDEX_CHECK_ENABLED = env.bool('LOG_INDEX_CHECK_ENABLED', default=True)
+# 日志索引检查连接MongoDB的超时时间(毫秒)
+LOG_INDEX_CHECK_TIMEOUT = env.int('LOG_INDEX_CHECK_TIMEOUT', default=500)
+
 # Redis配置（用于缓存和Celery）
 REDIS_URL = env('REDIS_URL', default='redis://localhost:6379/0')
 
@@ -278,3 +294,151 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+
+# 通知批量处理与模板缓存配置
+NOTIFICATION_BULK_BATCH_SIZE = env.int('NOTIFICATION_BULK_BATCH_SIZE', default=1000)
+NOTIFICATION_SEND_BATCH_SIZE = env.int('NOTIFICATION_SEND_BATCH_SIZE', default=100)
+NOTIFICATION_TEMPLATE_CACHE_SIZE = env.int('NOTIFICATION_TEMPLATE_CACHE_SIZE', default=512)
+
+# 通知投递队列配置
+# 各渠道由独立的worker消费，并发数通过worker的 -c 参数配置
+NOTIFICATION_CHANNEL_QUEUES = {
+    'email': 'notifications.email',
+    'sms': 'notifications.sms',
+    'push': 'notifications.push',
+    'webhook': 'notifications.webhook',
+    'in_app': 'notifications.in_app',
+}
+NOTIFICATION_DEAD_LETTER_QUEUE = 'notifications.dead_letter'
+NOTIFICATION_MAX_RETRIES = env.int('NOTIFICATION_MAX_RETRIES', default=5)
+NOTIFICATION_RETRY_BACKOFF = env.int('NOTIFICATION_RETRY_BACKOFF', default=30)
+NOTIFICATION_RETRY_BACKOFF_MAX = env.int('NOTIFICATION_RETRY_BACKOFF_MAX', default=3600)
+
+# 计划通知调度配置
+NOTIFICATION_DISPATCH_INTERVAL = env.int('NOTIFICATION_DISPATCH_INTERVAL', default=30)
+NOTIFICATION_DISPATCH_BATCH_SIZE = env.int('NOTIFICATION_DISPATCH_BATCH_SIZE', default=500)
+NOTIFICATION_DISPATCH_MAX_BATCHES = env.int('NOTIFICATION_DISPATCH_MAX_BATCHES', default=20)
+# 立即发送的通知超过该时间(秒)仍未投递时由调度器补发
+NOTIFICATION_ENQUEUE_GRACE = env.int('NOTIFICATION_ENQUEUE_GRACE', default=60)
+# 发送中超过该时间(秒)的通知视为投递中断，由调度器恢复为待发送
+NOTIFICATION_SENDING_TIMEOUT = env.int('NOTIFICATION_SENDING_TIMEOUT', default=600)
+
+# 未读通知计数配置
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = env.int('NOTIFICATION_UNREAD_CACHE_TIMEOUT', default=86400)
+NOTIFICATION_UNREAD_RECONCILE_INTERVAL = env.int('NOTIFICATION_UNREAD_RECONCILE_INTERVAL', default=3600)
+NOTIFICATION_BROADCAST_CACHE_TIMEOUT = env.int('NOTIFICATION_BROADCAST_CACHE_TIMEOUT', default=300)
+
+# 通知实时推送配置
+# redis: 通过Redis Stream跨进程推送；memory: 进程内推送，仅适用于单节点开发环境
+NOTIFICATION_STREAM_BACKEND = env('NOTIFICATION_STREAM_BACKEND', default='redis')
+NOTIFICATION_STREAM_REDIS_URL = REDIS_URL
+NOTIFICATION_STREAM_MAX_LENGTH = env.int('NOTIFICATION_STREAM_MAX_LENGTH', default=100)
+NOTIFICATION_STREAM_TTL = env.int('NOTIFICATION_STREAM_TTL', default=86400)
+NOTIFICATION_STREAM_HEARTBEAT = env.int('NOTIFICATION_STREAM_HEARTBEAT', default=15)
+NOTIFICATION_STREAM_MAX_DURATION = env.int('NOTIFICATION_STREAM_MAX_DURATION', default=3600)
+
+# Webhook通知配置
+NOTIFICATION_WEBHOOK_CONNECT_TIMEOUT = env.float('NOTIFICATION_WEBHOOK_CONNECT_TIMEOUT', default=3)
+NOTIFICATION_WEBHOOK_TIMEOUT = env.float('NOTIFICATION_WEBHOOK_TIMEOUT', default=5)
+NOTIFICATION_WEBHOOK_WORKERS = env.int('NOTIFICATION_WEBHOOK_WORKERS', default=32)
+NOTIFICATION_WEBHOOK_POOL_HOSTS = env.int('NOTIFICATION_WEBHOOK_POOL_HOSTS', default=64)
+NOTIFICATION_WEBHOOK_MAX_PER_HOST = env.int('NOTIFICATION_WEBHOOK_MAX_PER_HOST', default=8)
+NOTIFICATION_WEBHOOK_RETRIES = env.int('NOTIFICATION_WEBHOOK_RETRIES', default=2)
+NOTIFICATION_WEBHOOK_RETRY_BACKOFF = env.float('NOTIFICATION_WEBHOOK_RETRY_BACKOFF', default=0.5)
+NOTIFICATION_WEBHOOK_BREAKER_THRESHOLD = env.int('NOTIFICATION_WEBHOOK_BREAKER_THRESHOLD', default=5)
+NOTIFICATION_WEBHOOK_BREAKER_RESET = env.int('NOTIFICATION_WEBHOOK_BREAKER_RESET', default=60)
+
+# 邮件通知配置
+# 同一SMTP连接连续发送的邮件数量，达到后重新建立连接
+NOTIFICATION_EMAIL_BATCH_SIZE = env.int('NOTIFICATION_EMAIL_BATCH_SIZE', default=100)
+NOTIFICATION_EMAIL_TIMEOUT = env.int('NOTIFICATION_EMAIL_TIMEOUT', default=10)
+
+# 租户每日通知配额配置
+NOTIFICATION_QUOTA_LIMIT_CACHE_TIMEOUT = env.int('NOTIFICATION_QUOTA_LIMIT_CACHE_TIMEOUT', default=60)
+NOTIFICATION_QUOTA_RECONCILE_INTERVAL = env.int('NOTIFICATION_QUOTA_RECONCILE_INTERVAL', default=300)
+
+# 积分预留配置
+POINTS_HOLD_DEFAULT_TTL = env.int('POINTS_HOLD_DEFAULT_TTL', default=900)
+POINTS_HOLD_MAX_TTL = env.int('POINTS_HOLD_MAX_TTL', default=86400)
+POINTS_HOLD_SWEEP_INTERVAL = env.int('POINTS_HOLD_SWEEP_INTERVAL', default=60)
+POINTS_HOLD_SWEEP_BATCH_SIZE = env.int('POINTS_HOLD_SWEEP_BATCH_SIZE', default=500)
+
+# 用量计量配置
+# 结算窗口(秒)，每个窗口内同一账户的用量合并为一次余额更新和一条交易记录
+POINTS_METERING_WINDOW = env.int('POINTS_METERING_WINDOW', default=60)
+POINTS_METERING_BATCH_SIZE = env.int('POINTS_METERING_BATCH_SIZE', default=1000)
+POINTS_METERING_MAX_EVENTS = env.int('POINTS_METERING_MAX_EVENTS', default=1000)
+
+# 批量发放积分配置
+# 每批在一个事务内发放的用户数量
+POINTS_BULK_BATCH_SIZE = env.int('POINTS_BULK_BATCH_SIZE', default=1000)
+POINTS_BULK_MAX_GRANTS = env.int('POINTS_BULK_MAX_GRANTS', default=10000)
+
+# 积分过期配置
+# 获得积分的默认有效期(天)，0表示永不过期
+POINTS_LOT_TTL_DAYS = env.int('POINTS_LOT_TTL_DAYS', default=365)
+POINTS_EXPIRE_HOUR = env.int('POINTS_EXPIRE_HOUR', default=3)
+POINTS_EXPIRE_BATCH_SIZE = env.int('POINTS_EXPIRE_BATCH_SIZE', default=1000)
+
+# 积分余额快照配置
+# 快照时间相对当前时间的滞后秒数，避免遗漏尚未提交的交易
+POINTS_SNAPSHOT_LAG = env.int('POINTS_SNAPSHOT_LAG', default=300)
+POINTS_SNAPSHOT_HOUR = env.int('POINTS_SNAPSHOT_HOUR', default=2)
+POINTS_SNAPSHOT_BATCH_SIZE = env.int('POINTS_SNAPSHOT_BATCH_SIZE', default=1000)
+
+# 订阅过期处理配置
+SUBSCRIPTION_EXPIRY_SWEEP_INTERVAL = env.int('SUBSCRIPTION_EXPIRY_SWEEP_INTERVAL', default=300)
+SUBSCRIPTION_EXPIRY_BATCH_SIZE = env.int('SUBSCRIPTION_EXPIRY_BATCH_SIZE', default=500)
+SUBSCRIPTION_EXPIRED_NOTIFICATION_TYPE = env('SUBSCRIPTION_EXPIRED_NOTIFICATION_TYPE', default='billing.subscription_expired')
+
+# 订阅自动续订配置
+# 续订窗口(秒)，当前周期在该时间内结束的订阅会被续订
+SUBSCRIPTION_RENEWAL_WINDOW = env.int('SUBSCRIPTION_RENEWAL_WINDOW', default=3600)
+SUBSCRIPTION_RENEWAL_INTERVAL = env.int('SUBSCRIPTION_RENEWAL_INTERVAL', default=600)
+SUBSCRIPTION_RENEWAL_BATCH_SIZE = env.int('SUBSCRIPTION_RENEWAL_BATCH_SIZE', default=500)
+SUBSCRIPTION_RENEWAL_PAYMENT_METHOD = env('SUBSCRIPTION_RENEWAL_PAYMENT_METHOD', default='alipay')
+
+# 订阅权益配置
+# 权益缓存的最长有效期(秒)，不超过最早结束的订阅
+ENTITLEMENT_CACHE_TIMEOUT = env.int('ENTITLEMENT_CACHE_TIMEOUT', default=300)
+ENTITLEMENT_VERIFY_MAX_CHECKS = env.int('ENTITLEMENT_VERIFY_MAX_CHECKS', default=100)
+
+# Celery Beat 定时任务
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-scheduled-notifications': {
+        'task': 'apps.notification_service.tasks.dispatch_scheduled_notifications',
+        'schedule': NOTIFICATION_DISPATCH_INTERVAL,
+    },
+    'reconcile-unread-counters': {
+        'task': 'apps.notification_service.tasks.reconcile_unread_counters',
+        'schedule': NOTIFICATION_UNREAD_RECONCILE_INTERVAL,
+    },
+    'reconcile-notification-quotas': {
+        'task': 'apps.notification_service.tasks.reconcile_notification_quotas',
+        'schedule': NOTIFICATION_QUOTA_RECONCILE_INTERVAL,
+    },
+    'release-expired-points-holds': {
+        'task': 'apps.billing_service.tasks.release_expired_points_holds',
+        'schedule': POINTS_HOLD_SWEEP_INTERVAL,
+    },
+    'apply-usage-events': {
+        'task': 'apps.billing_service.tasks.apply_usage_events',
+        'schedule': POINTS_METERING_WINDOW,
+    },
+    'expire-points-lots': {
+        'task': 'apps.billing_service.tasks.expire_points_lots',
+        'schedule': crontab(hour=POINTS_EXPIRE_HOUR, minute=0),
+    },
+    'create-points-snapshots': {
+        'task': 'apps.billing_service.tasks.create_points_snapshots',
+        'schedule': crontab(hour=POINTS_SNAPSHOT_HOUR, minute=0),
+    },
+    'expire-subscriptions': {
+        'task': 'apps.billing_service.tasks.expire_subscriptions',
+        'schedule': SUBSCRIPTION_EXPIRY_SWEEP_INTERVAL,
+    },
+    'renew-subscriptions': {
+        'task': 'apps.billing_service.tasks.renew_subscriptions',
+        'schedule': SUBSCRIPTION_RENEWAL_INTERVAL,
+    },
+}
@@ -40,6 +40,12 @@ DEFAULT_FILE_STORAGE = 'django.core.files.storage.InMemoryStorage'
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# 测试环境使用进程内通知推送
+NOTIFICATION_STREAM_BACKEND = 'memory'
+
+# 测试环境不检查MongoDB日志索引
+LOG_INDEX_CHECK_ENABLED = False
+
 # 测试日志配置
 LOGGING = {
     'version': 1,